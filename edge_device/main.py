@@ -12,22 +12,19 @@ Backend: Django REST API
 
 import cv2
 import numpy as np
-import requests
 import time
 import os
 import sys
 import logging
 import threading
 import queue
+import collections
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import json
-try:
-    import boto3                          # S3-compatible R2 download (CPU — standard I/O)
-    from botocore.exceptions import ClientError
-except ImportError:
-    boto3 = None
-    ClientError = Exception
 
 # RDK X5 hardware imports
 # Calling hobot_dnn routes the workload to the BPU (Brain Processing Unit).
@@ -60,6 +57,9 @@ BACKEND_URL = os.getenv('BACKEND_URL', 'http://127.0.0.1:8000').rstrip('/')
 # Cloud migration: BACKEND_URL should point to the Cloudflare Worker URL in production
 # e.g. BACKEND_URL=https://weldvision-api.<your-subdomain>.workers.dev
 UPLOAD_ENDPOINT = os.getenv('UPLOAD_ENDPOINT', f"{BACKEND_URL}/api/upload-assessment")
+UPLOAD_BATCH_ENDPOINT = os.getenv('UPLOAD_BATCH_ENDPOINT', f"{UPLOAD_ENDPOINT}/batch")
+UPLOAD_PRESIGN_ENDPOINT = os.getenv('UPLOAD_PRESIGN_ENDPOINT', f"{UPLOAD_ENDPOINT}/presign")
+UPLOAD_COMMIT_ENDPOINT = os.getenv('UPLOAD_COMMIT_ENDPOINT', f"{UPLOAD_ENDPOINT}/commit")
 CALIBRATION_ENDPOINT = os.getenv('CALIBRATION_ENDPOINT', f"{BACKEND_URL}/api/stereo-calibrations/active")
 # JWT token for cloud API auth (set via env var or weldvision.service)
 CLOUD_API_TOKEN = os.getenv('CLOUD_API_TOKEN', '')
@@ -79,11 +79,34 @@ STEREO_CALIB_PATH = os.getenv('WELDVISION_STEREO_CALIB_PATH', os.path.join(MODEL
 BUFFER_DIR = os.getenv('WELDVISION_BUFFER_DIR', os.path.join(MODEL_DIR, 'buffer'))
 PLY_OUTPUT_DIR = os.getenv('WELDVISION_PLY_OUTPUT_DIR', os.path.join(MODEL_DIR, 'pointclouds'))
 BUFFER_MAX_BYTES = int(os.getenv('WELDVISION_BUFFER_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))
+# Above the soft limit old bundles are compacted (small heatmap) in the background; above the max they are deleted
+BUFFER_SOFT_BYTES = int(os.getenv('WELDVISION_BUFFER_SOFT_BYTES', str(BUFFER_MAX_BYTES * 3 // 4)))
+BUFFER_INDEX = os.getenv('WELDVISION_BUFFER_INDEX', 'memory')   # memory|sqlite (persistent, retry metadata)
+BUFFER_MODE = os.getenv('WELDVISION_BUFFER_MODE', 'dirs')       # dirs (one directory per bundle)|segments
+BUFFER_SEGMENT_BYTES = int(os.getenv('WELDVISION_BUFFER_SEGMENT_BYTES', str(16 * 1024 * 1024)))
+BUFFER_FSYNC_INTERVAL_S = float(os.getenv('WELDVISION_BUFFER_FSYNC_INTERVAL_S', '1'))
 PLY_DECIMATE_POINTS = int(os.getenv('WELDVISION_PLY_DECIMATE_POINTS', '50000'))
 
+# JPEG qualities: each (image, quality) is encoded once per result and shared by stream, upload and buffer
+LIVE_JPEG_QUALITY = int(os.getenv('WELDVISION_STREAM_JPEG_QUALITY', '80'))     # annotated overlay
+UPLOAD_JPEG_QUALITY = int(os.getenv('WELDVISION_UPLOAD_JPEG_QUALITY', '95'))   # original frame
+
 # Overlay stream server
 STREAM_HOST = os.getenv('WELDVISION_STREAM_HOST', '0.0.0.0')
 STREAM_PORT = int(os.getenv('WELDVISION_STREAM_PORT', '8080'))
+# threaded: one thread per connection; asyncio: every viewer on one event-loop thread
+STREAM_SERVER = os.getenv('WELDVISION_STREAM_SERVER', 'threaded').lower()
+STREAM_MAX_CLIENTS = int(os.getenv('WELDVISION_STREAM_MAX_CLIENTS', '32'))            # asyncio: MJPEG viewers, then 503
+STREAM_CLIENT_BUFFER_KB = int(os.getenv('WELDVISION_STREAM_CLIENT_BUFFER_KB', '512'))  # asyncio: unsent bytes before a viewer skips frames
+STREAM_MAX_VARIANTS = int(os.getenv('WELDVISION_STREAM_MAX_VARIANTS', '4'))   # distinct ?w=&q= encodes per frame
+# /debug/profile sampling profiler on the stream server (opt-in; answers loopback clients only)
+ENABLE_PROFILER = os.getenv('WELDVISION_ENABLE_PROFILER', '0').lower() in ('1', 'true', 'yes', 'y')
+PROFILER_MAX_SECONDS = float(os.getenv('WELDVISION_PROFILER_MAX_SECONDS', '60'))
+# Per-frame trace export (Chrome / Perfetto trace-event JSON, rolling files)
+ENABLE_TRACE = os.getenv('WELDVISION_TRACE', '0').lower() in ('1', 'true', 'yes', 'y')
+TRACE_DIR = os.getenv('WELDVISION_TRACE_DIR', os.path.join(MODEL_DIR, 'traces'))
+TRACE_MAX_EVENTS = int(os.getenv('WELDVISION_TRACE_MAX_EVENTS', '50000'))   # events per file
+TRACE_MAX_FILES = int(os.getenv('WELDVISION_TRACE_MAX_FILES', '5'))
 
 # Workpiece placement guide overlay
 WORKPIECE_WIDTH_MM  = float(os.getenv('WELDVISION_WORKPIECE_WIDTH_MM',  '100'))  # specimen width (mm)
@@ -115,10 +138,60 @@ CAPTURE_INTERVAL = float(os.getenv('WELDVISION_CAPTURE_INTERVAL', '5'))  # secon
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
 
+# Two-phase upload: presigned PUTs straight to object storage, then a small commit (multipart fallback on 404)
+ENABLE_PRESIGNED_UPLOAD = os.getenv('WELDVISION_PRESIGNED_UPLOAD', '1').lower() in ('1', 'true', 'yes', 'y')
+PRESIGNED_PUT_PARALLELISM = int(os.getenv('WELDVISION_PRESIGNED_PUT_PARALLELISM', '2'))
+
+# Training uploads (WELDVISION_UPLOAD_TRAINING=1): only the most informative frames, under a daily budget
+TRAINING_TOP_FRACTION = float(os.getenv('WELDVISION_TRAINING_TOP_FRACTION', '0.05'))
+TRAINING_DAILY_BUDGET = int(os.getenv('WELDVISION_TRAINING_DAILY_BUDGET', '200'))
+
+# Batched replay of buffered assessments (falls back to single uploads if the backend lacks the endpoint)
+ENABLE_BATCH_UPLOAD = os.getenv('WELDVISION_BATCH_UPLOAD', '1').lower() in ('1', 'true', 'yes', 'y')
+UPLOAD_BATCH_MAX_ITEMS = int(os.getenv('WELDVISION_UPLOAD_BATCH_MAX_ITEMS', '20'))
+UPLOAD_BATCH_MAX_BYTES = int(os.getenv('WELDVISION_UPLOAD_BATCH_MAX_BYTES', str(8 * 1024 * 1024)))
+
+# Buffer drain: parallel replay, backoff after failed passes, circuit breaker shared with live uploads
+DRAIN_PARALLELISM = int(os.getenv('WELDVISION_DRAIN_PARALLELISM', '2'))
+DRAIN_INTERVAL_S = float(os.getenv('WELDVISION_DRAIN_INTERVAL_S', '10'))
+BREAKER_FAILURES = int(os.getenv('WELDVISION_BREAKER_FAILURES', '3'))           # consecutive failures to open
+BREAKER_RESET_S = float(os.getenv('WELDVISION_BREAKER_RESET_S', '15'))          # first open period (doubles)
+BREAKER_MAX_RESET_S = float(os.getenv('WELDVISION_BREAKER_MAX_RESET_S', '300'))
+
+# Uplink scheduling: live > replay > training > model download; 0 = no bandwidth cap
+UPLINK_KBPS = float(os.getenv('WELDVISION_UPLINK_KBPS', '0'))                    # kilobytes per second
+UPLINK_BURST_KB = float(os.getenv('WELDVISION_UPLINK_BURST_KB', '0'))            # 0 = one second's worth
+# Step live-upload JPEG quality / resolution down so one assessment uploads within this (0 disables)
+ADAPTIVE_UPLOAD_TARGET_S = float(os.getenv('WELDVISION_ADAPTIVE_UPLOAD_TARGET_S', '3'))
+
 # Threading
 FRAME_QUEUE_MAX = int(os.getenv('WELDVISION_FRAME_QUEUE_MAX', '2'))
 RESULT_QUEUE_MAX = int(os.getenv('WELDVISION_RESULT_QUEUE_MAX', '10'))
 
+# Frame quality gate (cheap luma checks before BPU / SGBM work); opt-in: the
+# thresholds below are starting points to tune on the rig, not calibrated values
+ENABLE_QUALITY_GATE = os.getenv('WELDVISION_ENABLE_QUALITY_GATE', '0').lower() in ('1', 'true', 'yes', 'y')
+QUALITY_MIN_SHARPNESS = float(os.getenv('WELDVISION_QUALITY_MIN_SHARPNESS', '30'))   # Laplacian variance
+QUALITY_MAX_GLARE = float(os.getenv('WELDVISION_QUALITY_MAX_GLARE', '0.25'))         # fraction of pixels >= 250
+QUALITY_MAX_DARK = float(os.getenv('WELDVISION_QUALITY_MAX_DARK', '0.50'))           # fraction of pixels <= 5
+QUALITY_MIN_TEXTURE = float(os.getenv('WELDVISION_QUALITY_MIN_TEXTURE', '6'))        # luma std-dev inside ROI
+QUALITY_RETRIES = int(os.getenv('WELDVISION_QUALITY_RETRIES', '2'))                  # immediate re-captures
+
+# Pipeline stages (BPU / CPU executors)
+STAGE_QUEUE_MAX = int(os.getenv('WELDVISION_STAGE_QUEUE_MAX', '2'))   # bounded queue per stage executor
+PIPELINE_DEPTH = int(os.getenv('WELDVISION_PIPELINE_DEPTH', '2'))     # frames in flight across BPU + CPU
+
+# Out-of-process depth stage (SGBM + feature extraction in a worker process, shared-memory frames)
+ENABLE_DEPTH_PROCESS = os.getenv('WELDVISION_DEPTH_PROCESS', '0').lower() in ('1', 'true', 'yes', 'y')
+DEPTH_PROCESS_SLOTS = int(os.getenv('WELDVISION_DEPTH_PROCESS_SLOTS', '3'))
+DEPTH_PROCESS_TIMEOUT = float(os.getenv('WELDVISION_DEPTH_PROCESS_TIMEOUT', '10'))
+
+# Deadline-aware load shedding: budget from capture to result (opt-in; 0 = off).
+# Optional stages in priority order: heatmap blend → preview JSON → PLY (deferrable).
+# The live overlay encode is never shed: uploads need the same bytes anyway.
+SCAN_BUDGET_MS = float(os.getenv('WELDVISION_SCAN_BUDGET_MS', '0'))
+BACKGROUND_QUEUE_MAX = int(os.getenv('WELDVISION_BACKGROUND_QUEUE_MAX', '4'))
+
 # ============================================================================
 # LOGGING SETUP
 # ============================================================================
@@ -130,43 +203,122 @@ try:
 except Exception:
     pass
 
-_log_path = os.getenv('WELDVISION_LOG_PATH', os.path.join(MODEL_DIR, 'weldvision.log'))
-_handlers = [logging.StreamHandler(sys.stdout)]
-try:
-    os.makedirs(os.path.dirname(_log_path) or '.', exist_ok=True)
-    _handlers.insert(0, logging.FileHandler(_log_path, encoding='utf-8'))
-except Exception:
-    pass
+# The depth worker process (spawn start method) re-runs this file as
+# ``__mp_main__``; only the real process owns the rotating log and the clients.
+SPAWNED_CHILD = __name__ == '__mp_main__'
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=_handlers,
-)
+# Worker threads only enqueue records; one listener thread writes stdout and the rotating file
+from modules.logging_setup import logging_stats, setup_logging
+
+if not SPAWNED_CHILD:
+    setup_logging(
+        os.getenv('WELDVISION_LOG_PATH', os.path.join(MODEL_DIR, 'weldvision.log')),
+        max_bytes=int(os.getenv('WELDVISION_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+        backup_count=int(os.getenv('WELDVISION_LOG_BACKUPS', '5')),
+        rate_window_s=float(os.getenv('WELDVISION_LOG_RATE_WINDOW_S', '60')),   # 0 disables rate limiting
+        rate_burst=int(os.getenv('WELDVISION_LOG_RATE_BURST', '5')),            # warnings per call site per window
+    )
 logger = logging.getLogger(__name__)
 
 # Local modules (pure python)
 try:
-    from modules.buffering import LocalBuffer
+    from modules.buffering import LocalBuffer, check_jpeg
+    from modules.frame_quality import FrameQualityGate
     from modules.overlay_stream import LiveState, OverlayStreamServer
-    from modules.stereo_depth import (
-        StereoDepthEstimator, 
-        load_calibration_json, 
-        depth_to_colormap,
-        WeldFeatureExtractor,
-    )
-    from modules.ply_exporter import generate_ply_from_depth, generate_preview_json, decimate_point_cloud
+    from modules.async_stream import AsyncStreamServer
 except Exception:
     LocalBuffer = None
+    check_jpeg = None
+    FrameQualityGate = None
     LiveState = None
     OverlayStreamServer = None
-    StereoDepthEstimator = None
-    load_calibration_json = None
-    depth_to_colormap = None
-    WeldFeatureExtractor = None
-    generate_ply_from_depth = None
-    generate_preview_json = None
-    decimate_point_cloud = None
+    AsyncStreamServer = None
+
+# Stereo / point-cloud stack: imported by load_stereo_modules() only when stereo is enabled
+StereoDepthEstimator = None
+load_calibration_json = None
+depth_to_colormap = None
+WeldFeatureExtractor = None
+generate_ply_from_depth = None
+generate_preview_json = None
+decimate_point_cloud = None
+DepthProcessClient = None
+
+from modules.startup import STARTUP, lazy_import
+from modules.artifacts import ResultArtifact
+from modules.batch_upload import BatchEntry, BatchUnsupported, BatchUploader, pack_batches
+from modules.drain import Backoff, CircuitBreaker, DrainEngine
+from modules.http_client import BackendClient
+from modules.load_shedding import DEFER, RUN, LoadShedder, OptionalStage
+from modules.pipeline import StageExecutor
+from modules.presigned_upload import PresignedUploader, PresignedUploadFailed, PresignUnsupported
+from modules.profiler import StackSampler
+from modules.tracing import TRACER
+from modules.training_sampler import TrainingSampler
+from modules.upload_scheduler import LIVE, MODEL, REPLAY, TRAINING, AdaptiveQuality, UploadScheduler
+from modules.telemetry import FRAMES_TOTAL, REGISTRY, SHED_TOTAL, STAGE_SECONDS, UPLOADS_TOTAL
+
+# HTTP client is first needed by the calibration fetch, which runs off the startup critical path
+requests = lazy_import('requests')
+
+if SPAWNED_CHILD:
+    BACKEND = STORAGE = UPLINK = PRESIGNED = ADAPTIVE_QUALITY = None
+else:
+    # One pooled keep-alive session for all backend traffic; (connect, read) timeouts per endpoint
+    BACKEND = BackendClient(
+        BACKEND_URL,
+        CLOUD_API_TOKEN,
+        timeouts={
+            'calibration': (3.05, 5),
+            'deploy_poll': (3.05, 10),
+            'assessment_upload': (3.05, 10),
+            'training_upload': (3.05, 15),
+            'batch_upload': (3.05, 60),
+            'presign': (3.05, 10),
+            'commit': (3.05, 10),
+        },
+    )
+
+    # Presigned object-storage URLs are absolute and signed: no bearer token on that session
+    STORAGE = BackendClient('', timeouts={'object_put': (3.05, 30)})
+
+    # Every uplink transfer takes its bytes from here, in priority order
+    UPLINK = UploadScheduler(UPLINK_KBPS * 1024, burst_bytes=UPLINK_BURST_KB * 1024 or None)
+
+    PRESIGNED = PresignedUploader(
+        BACKEND,
+        STORAGE,
+        UPLOAD_PRESIGN_ENDPOINT,
+        UPLOAD_COMMIT_ENDPOINT,
+        scheduler=UPLINK,
+        parallelism=PRESIGNED_PUT_PARALLELISM,
+    ) if ENABLE_PRESIGNED_UPLOAD else None
+    ADAPTIVE_QUALITY = AdaptiveQuality(
+        ADAPTIVE_UPLOAD_TARGET_S,
+        levels=[(q, s) for q, s in ((UPLOAD_JPEG_QUALITY, 1.0), (85, 1.0), (75, 1.0), (70, 0.75), (60, 0.5))
+                if q <= UPLOAD_JPEG_QUALITY],
+    )
+
+
+def load_stereo_modules() -> bool:
+    """Import the stereo depth, PLY and depth-process modules on first use."""
+    global StereoDepthEstimator, load_calibration_json, depth_to_colormap, WeldFeatureExtractor
+    global generate_ply_from_depth, generate_preview_json, decimate_point_cloud, DepthProcessClient
+    if StereoDepthEstimator is not None:
+        return True
+    try:
+        from modules.stereo_depth import (
+            StereoDepthEstimator,
+            load_calibration_json,
+            depth_to_colormap,
+            WeldFeatureExtractor,
+        )
+        from modules.ply_exporter import generate_ply_from_depth, generate_preview_json, decimate_point_cloud
+        from modules.depth_process import DepthProcessClient
+        return True
+    except Exception as e:
+        logger.warning(f"Stereo modules unavailable: {e}")
+        return False
 
 
 # ============================================================================
@@ -220,8 +372,27 @@ def calculate_depth(left_image, right_image=None):
     }
 
 
+def roi_pixels(image_shape):
+    """Workpiece ROI (x, y, w, h) in pixels for a frame of the given shape."""
+    h, w = image_shape[:2]
+    return (
+        int(ROI_X_PCT * w),
+        int(ROI_Y_PCT * h),
+        int(ROI_W_PCT * w),
+        int(ROI_H_PCT * h),
+    )
+
+
 def draw_overlay(image_bgr, detections, depth_heatmap_bgr=None):
     """Draw workpiece guide lines, detection boxes and optionally blend a depth heatmap."""
+    overlay = annotate_frame(image_bgr, detections)
+    if depth_heatmap_bgr is not None:
+        overlay = blend_depth_heatmap(overlay, depth_heatmap_bgr)
+    return stamp_timestamp(overlay)
+
+
+def annotate_frame(image_bgr, detections):
+    """Copy of the frame with the workpiece guide and detection boxes drawn on it."""
     overlay = image_bgr.copy()
     H, W = overlay.shape[:2]
 
@@ -288,11 +459,17 @@ def draw_overlay(image_bgr, detections, depth_heatmap_bgr=None):
             2,
             cv2.LINE_AA,
         )
+    return overlay
 
-    if depth_heatmap_bgr is not None:
-        heat = cv2.resize(depth_heatmap_bgr, (overlay.shape[1], overlay.shape[0]))
-        overlay = cv2.addWeighted(overlay, 0.75, heat, 0.25, 0)
 
+def blend_depth_heatmap(overlay, depth_heatmap_bgr):
+    """Blend a depth colormap over the overlay (25 % heat)."""
+    heat = cv2.resize(depth_heatmap_bgr, (overlay.shape[1], overlay.shape[0]))
+    return cv2.addWeighted(overlay, 0.75, heat, 0.25, 0)
+
+
+def stamp_timestamp(overlay):
+    """Draw the wall-clock timestamp in the top-left corner (in place)."""
     cv2.putText(
         overlay,
         datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -319,10 +496,7 @@ class CalibrationWatchdog:
         If different from current, download and save.
         """
         try:
-            headers = {}
-            if CLOUD_API_TOKEN:
-                headers['Authorization'] = f'Bearer {CLOUD_API_TOKEN}'
-            response = requests.get(CALIBRATION_ENDPOINT, headers=headers, timeout=5)
+            response = BACKEND.get(CALIBRATION_ENDPOINT, endpoint='calibration')
             if response.status_code != 200:
                 return False
                 
@@ -441,10 +615,6 @@ class ModelWatchdog:
         Returns:
             bool: True if a new model was downloaded.
         """
-        if boto3 is None:
-            logger.debug("boto3 not installed — skipping R2 model check")
-            return False
-
         account_id  = os.getenv('R2_ACCOUNT_ID', '')
         access_key  = os.getenv('R2_ACCESS_KEY_ID', '')
         secret_key  = os.getenv('R2_SECRET_ACCESS_KEY', '')
@@ -455,6 +625,13 @@ class ModelWatchdog:
             logger.debug("R2 credentials not configured — skipping model pull")
             return False
 
+        try:
+            import boto3                          # S3-compatible R2 download (CPU — standard I/O)
+            from botocore.exceptions import ClientError
+        except ImportError:
+            logger.debug("boto3 not installed — skipping R2 model check")
+            return False
+
         endpoint = f'https://{account_id}.r2.cloudflarestorage.com'
         try:
             # CPU — boto3 uses standard HTTPS I/O, no BPU involvement
@@ -480,7 +657,11 @@ class ModelWatchdog:
 
             logger.info(f"⬇️  Downloading new model from R2: {bucket}/{object_key}")
             os.makedirs(os.path.dirname(self.update_path) or '.', exist_ok=True)
-            s3.download_file(bucket, object_key, self.update_path)
+            # Lowest uplink priority: the callback blocks the transfer thread while live uploads need the link
+            s3.download_file(
+                bucket, object_key, self.update_path,
+                Callback=lambda nbytes: UPLINK.throttle(MODEL, nbytes),
+            )
 
             # Cache the ETag so the next boot skips the download if unchanged
             with open(etag_cache, 'w') as fh:
@@ -509,18 +690,11 @@ class ModelWatchdog:
         Required env vars (same as download_from_r2):
             BACKEND_URL, CLOUD_API_TOKEN, R2_* credentials
         """
-        backend = os.getenv('BACKEND_URL', 'http://127.0.0.1:8000').rstrip('/')
-        token   = os.getenv('CLOUD_API_TOKEN', '')
-        headers = {'Authorization': f'Bearer {token}'} if token else {}
         last_deployed_at = None
 
         while True:
             try:
-                resp = requests.get(
-                    f'{backend}/api/models/deployed',
-                    headers=headers,
-                    timeout=10,
-                )
+                resp = BACKEND.get('/api/models/deployed', endpoint='deploy_poll')
                 if resp.status_code == 200:
                     data = resp.json()
                     deployed_at = data.get('deployed_at')
@@ -712,9 +886,12 @@ class InferenceEngine:
             return self._generate_mock_detections()
 
         try:
-            input_tensor = self.preprocess(image)               # CPU — numpy/cv2
-            outputs      = self.model.forward([input_tensor])   # → BPU via hobot_dnn
-            detections   = self._parse_yolo_output(outputs, image.shape)
+            with STAGE_SECONDS.time(stage='preprocess'):
+                input_tensor = self.preprocess(image)               # CPU — numpy/cv2
+            with STAGE_SECONDS.time(stage='bpu_forward'):
+                outputs      = self.model.forward([input_tensor])   # → BPU via hobot_dnn
+            with STAGE_SECONDS.time(stage='decode'):
+                detections   = self._parse_yolo_output(outputs, image.shape)
             logger.debug(f"BPU detected {len(detections)} defects")
             return detections
 
@@ -844,30 +1021,39 @@ def count_defects(detections):
     return counts
 
 
-def upload_training_image(image, label: str = '', folder: str = 'images/training') -> bool:
+def training_upload_enabled() -> bool:
+    return os.getenv('WELDVISION_UPLOAD_TRAINING', '0').lower() in ('1', 'true', 'yes', 'y')
+
+
+def upload_training_image(image, label: str = '', folder: str = 'images/training', artifact=None) -> bool:
     """
     Upload a raw frame to R2 via the Worker for use as training data.
     Saves to weldvision-media/<folder>/<timestamp>_<label>.jpg
 
     Set WELDVISION_UPLOAD_TRAINING=1 env var to enable at runtime.
+    Pass the result's ``artifact`` to reuse its encoded original.
     """
-    if os.getenv('WELDVISION_UPLOAD_TRAINING', '0').lower() not in ('1', 'true', 'yes', 'y'):
+    if not training_upload_enabled():
         return False
+    if artifact is None:
+        artifact = ResultArtifact(original=image)
+    with STAGE_SECONDS.time(stage='upload_training'):
+        ok = _upload_training_image(artifact, label, folder)
+    UPLOADS_TOTAL.inc(kind='training', outcome='ok' if ok else 'failed')
+    return ok
+
+
+def _upload_training_image(artifact, label: str, folder: str) -> bool:
     try:
-        success, buf = cv2.imencode('.jpg', image)
-        if not success:
-            return False
+        jpeg = artifact.jpeg('original', UPLOAD_JPEG_QUALITY)
         fname = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}_{label or 'frame'}.jpg"
-        headers = {}
-        if CLOUD_API_TOKEN:
-            headers['Authorization'] = f'Bearer {CLOUD_API_TOKEN}'
-        resp = requests.post(
-            f"{BACKEND_URL}/api/storage/upload",
-            files={'file': (fname, buf.tobytes(), 'image/jpeg')},
-            data={'folder': folder},
-            headers=headers,
-            timeout=15,
-        )
+        with UPLINK.transfer(TRAINING, len(jpeg)):
+            resp = BACKEND.post(
+                '/api/storage/upload',
+                endpoint='training_upload',
+                files={'file': (fname, jpeg, 'image/jpeg')},
+                data={'folder': folder},
+            )
         if resp.status_code == 201:
             key = resp.json().get('key', fname)
             logger.info(f"📸 Training image uploaded: {key}")
@@ -879,7 +1065,17 @@ def upload_training_image(image, label: str = '', folder: str = 'images/training
         return False
 
 
-def upload_assessment(image, geometric_metrics, visual_defects, student_id=STUDENT_ID):
+# Outcome of one assessment upload.  Only UPLOAD_TRANSPORT (connection error,
+# timeout, 5xx) says the backend is unreachable and counts toward the circuit
+# breaker; UPLOAD_REJECTED is this upload refused by a healthy backend (4xx).
+UPLOAD_OK = 'ok'
+UPLOAD_REJECTED = 'rejected'
+UPLOAD_TRANSPORT = 'transport'
+_UPLOAD_OUTCOMES = {UPLOAD_OK: 'ok', UPLOAD_REJECTED: 'rejected', UPLOAD_TRANSPORT: 'failed'}
+
+
+def upload_assessment(image, geometric_metrics, visual_defects, student_id=STUDENT_ID, frame_id=None, artifact=None,
+                      priority=LIVE):
     """
     Upload assessment data to Django backend
     
@@ -888,76 +1084,154 @@ def upload_assessment(image, geometric_metrics, visual_defects, student_id=STUDE
         geometric_metrics: Dict with depth measurements
         visual_defects: Dict with defect counts
         student_id: Student identifier
+        frame_id: Pipeline frame id (trace correlation only)
+        artifact: The result's ResultArtifact; its encodings are reused
+        priority: Uplink class (LIVE uploads adapt JPEG quality to throughput)
     
     Returns:
-        bool: True if upload successful
+        str: UPLOAD_OK, UPLOAD_REJECTED or UPLOAD_TRANSPORT
     """
-    try:
-        # Encode image as JPEG
-        success, encoded_image = cv2.imencode('.jpg', image)
-        if not success:
-            logger.error("Failed to encode image")
-            return False
-        
-        # Create heatmap (simplified - just overlay detections)
-        heatmap = image.copy()
-        # TODO: Add actual heatmap visualization
-        success, encoded_heatmap = cv2.imencode('.jpg', heatmap)
-        
-        # Prepare multipart form data
-        files = {
-            'image_original': ('original.jpg', encoded_image.tobytes(), 'image/jpeg'),
-            'image_heatmap': ('heatmap.jpg', encoded_heatmap.tobytes(), 'image/jpeg'),
-        }
-        
-        # Prepare JSON data
-        metrics_json = {
+    if artifact is None:
+        artifact = ResultArtifact(original=image)
+    with TRACER.span('upload_assessment', frame_id) as span, STAGE_SECONDS.time(stage='upload'):
+        status = _upload_assessment(artifact, geometric_metrics, visual_defects, student_id, priority)
+        span['ok'] = status == UPLOAD_OK
+    UPLOADS_TOTAL.inc(kind='assessment', outcome=_UPLOAD_OUTCOMES[status])
+    return status
+
+
+def assessment_jpegs(artifact, quality=UPLOAD_JPEG_QUALITY, scale=1.0):
+    """(original, heatmap) JPEG bytes for an assessment upload or buffer entry.
+
+    The heatmap part is the annotated overlay (detections + depth blend) at the
+    live-stream quality, so it is usually already encoded; without an overlay
+    the original's bytes are sent again rather than re-encoded.  A reduced
+    ``quality`` / ``scale`` (adaptive upload on a slow link) applies to both.
+    """
+    original = artifact.jpeg('original', quality, scale)
+    if artifact.has('overlay'):
+        return original, artifact.jpeg('overlay', min(quality, LIVE_JPEG_QUALITY), scale)
+    return original, original
+
+
+def stream_variant_jpeg(artifact, width, quality):
+    """Overlay JPEG for a ``/stream.mjpg?w=&q=`` viewer; width 0 keeps the frame width (never upscales)."""
+    full_width = artifact.image('overlay').shape[1]
+    scale = min(1.0, width / float(full_width)) if width else 1.0
+    return artifact.jpeg('overlay', quality, scale)
+
+
+def assessment_fields(geometric_metrics, visual_defects, student_id, captured_at=None) -> dict:
+    """Form fields of one assessment (metrics_json left as a dict)."""
+    return {
+        'student_id': student_id,
+        'metrics_json': {
             'geometric': geometric_metrics,
             'visual': visual_defects
-        }
-        
-        data = {
-            'student_id': student_id,
-            'metrics_json': json.dumps(metrics_json),
-            'device_id': DEVICE_ID,
-            'model_version': 'v2.0.0',
-            'notes': f'Captured at {datetime.now().isoformat()}'
-        }
-        
+        },
+        'device_id': DEVICE_ID,
+        'model_version': 'v2.0.0',
+        'notes': f'Captured at {captured_at or datetime.now().isoformat()}'
+    }
+
+
+def upload_encoded_assessment(encoded_image: bytes, encoded_heatmap: bytes, fields: dict, priority=REPLAY) -> str:
+    """
+    Upload an assessment whose JPEGs are already encoded (buffer replay).
+
+    The stored bytes go into the request as-is: no decode, no re-encode and
+    no generational quality loss.  ``fields`` is ``assessment_fields(...)``.
+    Returns an UPLOAD_* status, as ``upload_assessment``.
+    """
+    with STAGE_SECONDS.time(stage='upload'):
+        status = _send_assessment(encoded_image, encoded_heatmap, fields, priority)
+    UPLOADS_TOTAL.inc(kind='assessment', outcome=_UPLOAD_OUTCOMES[status])
+    return status
+
+
+def _upload_assessment(artifact, geometric_metrics, visual_defects, student_id, priority=LIVE):
+    try:
+        quality, scale = UPLOAD_JPEG_QUALITY, 1.0
+        if priority == LIVE:
+            quality, scale = ADAPTIVE_QUALITY.choose(UPLINK.throughput_bps())
+        encoded_image, encoded_heatmap = assessment_jpegs(artifact, quality, scale)
+        if priority == LIVE:
+            ADAPTIVE_QUALITY.observe(quality, scale, len(encoded_image) + len(encoded_heatmap))
+    except Exception:
+        logger.error("Failed to encode image")
+        return UPLOAD_REJECTED
+
+    data = assessment_fields(geometric_metrics, visual_defects, student_id)
+    return _send_assessment(encoded_image, encoded_heatmap, data, priority)
+
+
+def _response_status(status_code: int) -> str:
+    if status_code == 201:
+        return UPLOAD_OK
+    return UPLOAD_TRANSPORT if status_code >= 500 else UPLOAD_REJECTED
+
+
+def _send_assessment(encoded_image: bytes, encoded_heatmap: bytes, data: dict, priority) -> str:
+    try:
+        nbytes = len(encoded_image) + len(encoded_heatmap)
+        student_id = data.get('student_id')
+
         logger.info(f"📤 Uploading assessment for {student_id}...")
 
-        # Build headers — include Bearer token when talking to Cloudflare Worker
-        headers = {}
-        if CLOUD_API_TOKEN:
-            headers['Authorization'] = f'Bearer {CLOUD_API_TOKEN}'
-
-        # Send POST request
-        response = requests.post(
-            UPLOAD_ENDPOINT,
-            data=data,
-            files=files,
-            headers=headers,
-            timeout=10
-        )
-        
+        response = None
+        if PRESIGNED is not None and PRESIGNED.available():
+            # Images go straight to object storage; the Worker only sees the metrics record
+            try:
+                response = PRESIGNED.upload(
+                    data,
+                    {'image_original': (encoded_image, 'image/jpeg'), 'image_heatmap': (encoded_heatmap, 'image/jpeg')},
+                    priority=priority,
+                )
+            except PresignUnsupported as e:
+                logger.info(f"Presigned upload unavailable ({e}) - using multipart upload")
+            except PresignedUploadFailed as e:
+                logger.error(f"❌ Upload failed: {e}")
+                return _response_status(e.status) if e.status is not None else UPLOAD_REJECTED
+
+        if response is None:
+            # Prepare multipart form data
+            files = {
+                'image_original': ('original.jpg', encoded_image, 'image/jpeg'),
+                'image_heatmap': ('heatmap.jpg', encoded_heatmap, 'image/jpeg'),
+            }
+            data = dict(data, metrics_json=json.dumps(data['metrics_json']))
+
+            # Send POST request (pooled session adds the Bearer token for the Cloudflare Worker)
+            with UPLINK.transfer(priority, nbytes):
+                response = BACKEND.post(
+                    UPLOAD_ENDPOINT,
+                    endpoint='assessment_upload',
+                    data=data,
+                    files=files,
+                )
+
         if response.status_code == 201:
             logger.info(f"✅ Upload successful: {response.json().get('message', 'OK')}")
-            return True
+            return UPLOAD_OK
         else:
             logger.error(f"❌ Upload failed: {response.status_code} - {response.text}")
-            return False
+            return _response_status(response.status_code)
             
     except requests.exceptions.ConnectionError:
         logger.warning("⚠️  Server offline - data not uploaded (continuing...)")
-        return False
+        return UPLOAD_TRANSPORT
         
     except requests.exceptions.Timeout:
         logger.warning("⚠️  Upload timeout - server may be slow")
-        return False
+        return UPLOAD_TRANSPORT
+
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"⚠️  Upload transport error: {e}")
+        return UPLOAD_TRANSPORT
         
     except Exception as e:
         logger.error(f"❌ Upload error: {e}")
-        return False
+        return UPLOAD_REJECTED
 
 
 class SharedModel:
@@ -975,32 +1249,81 @@ class SharedModel:
 
 
 class CaptureWorker(threading.Thread):
-    def __init__(self, stop_event, camera: CameraManager, out_q: queue.Queue, interval_s: float):
-        super().__init__(daemon=True)
+    def __init__(
+        self,
+        stop_event,
+        camera: CameraManager,
+        out_q: queue.Queue,
+        interval_s: float,
+        quality_gate=None,
+        quality_retries: int = QUALITY_RETRIES,
+    ):
+        super().__init__(daemon=True, name='CaptureWorker')
         self.stop_event = stop_event
         self.camera = camera
         self.out_q = out_q
         self.interval_s = interval_s
+        self.quality_gate = quality_gate
+        self.quality_retries = max(0, int(quality_retries))
+        self.captured = 0
+        self.dropped = 0   # frames displaced from a full queue (latest-wins)
+        self._frame_ids = itertools.count(1)
+
+    def _capture_gated(self, frame_id: int):
+        """Capture a stereo pair, re-capturing immediately while the quality gate rejects it."""
+        for attempt in range(1 + self.quality_retries):
+            with TRACER.span('capture', frame_id, attempt=attempt), STAGE_SECONDS.time(stage='capture'):
+                left, right = self.camera.capture_stereo()
+            if left is None or self.quality_gate is None:
+                return left, right
+            try:
+                verdict = self.quality_gate.evaluate(left)
+            except Exception as e:
+                logger.debug(f"Quality gate failed, passing frame through: {e}")
+                return left, right
+            if verdict.ok:
+                return left, right
+            FRAMES_TOTAL.inc(event='rejected')
+            logger.debug(f"Frame rejected by quality gate: {verdict.reason}")
+        # Every re-capture failed too: this scan is lost, which must not go unnoticed
+        FRAMES_TOTAL.inc(event='gated')
+        logger.warning(
+            f"Scan dropped by the quality gate after {1 + self.quality_retries} captures "
+            f"(last: {verdict.reason}); check WELDVISION_QUALITY_* thresholds"
+        )
+        return None, None
 
     def run(self):
         while not self.stop_event.is_set():
-            left, right = self.camera.capture_stereo()
+            # Taken before capturing so the capture spans share the frame's trace key
+            # (a cycle that yields no frame leaves a gap in the ids)
+            frame_id = next(self._frame_ids)
+            left, right = self._capture_gated(frame_id)
             if left is not None:
-                pkt = {'ts': time.time(), 'left': left, 'right': right}
+                self.captured += 1
+                FRAMES_TOTAL.inc(event='captured')
+                STARTUP.mark('first_frame')
+                pkt = {'ts': time.time(), 'frame_id': frame_id, 'left': left, 'right': right}
                 try:
                     self.out_q.put(pkt, timeout=0.2)
                 except queue.Full:
                     # latest-wins
                     try:
                         _ = self.out_q.get_nowait()
+                        self.dropped += 1
+                        FRAMES_TOTAL.inc(event='dropped')
                     except Exception:
                         pass
                     try:
                         self.out_q.put(pkt, timeout=0.2)
                     except Exception:
-                        pass
+                        self.dropped += 1
+                        FRAMES_TOTAL.inc(event='dropped')
             time.sleep(self.interval_s)
 
+    def stats(self) -> dict:
+        return {'captured': self.captured, 'dropped': self.dropped}
+
 
 class ProcessWorker(threading.Thread):
     def __init__(
@@ -1012,8 +1335,10 @@ class ProcessWorker(threading.Thread):
         live_state,
         shared_calib: SharedCalibration = None,
         feature_extractor=None,
+        pipeline_depth: int = PIPELINE_DEPTH,
+        depth_process=None,
     ):
-        super().__init__(daemon=True)
+        super().__init__(daemon=True, name='ProcessWorker')
         self.stop_event = stop_event
         self.shared_model = shared_model
         self.in_q = in_q
@@ -1021,305 +1346,574 @@ class ProcessWorker(threading.Thread):
         self.live_state = live_state
         self.shared_calib = shared_calib
         self.feature_extractor = feature_extractor
+        self.pipeline_depth = max(1, int(pipeline_depth))
+        self.depth_process = depth_process
+
+        # ══════════════════════════════════════════════════════════════════
+        # HARDWARE LOAD BALANCING
+        # Stage A  →  BPU  (hobot_dnn / YOLOv8 Int8)
+        # Stage B  →  CPU  (OpenCV SGBM, numpy)
+        #
+        # Each stage is a long-lived executor thread fed by a bounded queue.
+        # The BPU accelerator and the quad-core CPU run simultaneously, and
+        # because frames are dispatched before the previous one is combined,
+        # SGBM for frame N overlaps YOLO inference for frame N+1.
+        # ══════════════════════════════════════════════════════════════════
+        self.bpu_stage = StageExecutor("BPU-YOLO", max_queue=STAGE_QUEUE_MAX)
+        self.cpu_stage = StageExecutor("CPU-SGBM", max_queue=STAGE_QUEUE_MAX)
+
+        # Optional tail stages are shed (or deferred to the background lane)
+        # when the scan is about to overrun its latency budget.
+        self.background_lane = StageExecutor("background-lane", max_queue=BACKGROUND_QUEUE_MAX)
+        self.shedder = LoadShedder(
+            SCAN_BUDGET_MS,
+            [
+                OptionalStage('heatmap', priority=1),
+                OptionalStage('preview', priority=2),
+                OptionalStage('ply', priority=3, deferrable=True),
+            ],
+            background=self.background_lane,
+            on_stage_timed=lambda name, seconds: STAGE_SECONDS.observe(seconds, stage=name),
+        )
 
-    def run(self):
-        while not self.stop_event.is_set():
+    # ── Stage A: BPU ──────────────────────────────────────────────────────
+    # hobot_dnn.forward() hands the Int8 .bin to the dedicated AI
+    # accelerator chip.  The CPU is free the moment forward() is
+    # dispatched; it does not spin-wait for the result.
+    def _run_bpu(self, left, frame_id=None) -> dict:
+        with TRACER.span('bpu', frame_id):
             try:
-                pkt = self.in_q.get(timeout=0.5)
-            except queue.Empty:
-                continue
+                inference = InferenceEngine(self.shared_model.get())
+                return {'detections': inference.run_inference(left)}  # → BPU
+            except Exception as e:
+                logger.warning(f"BPU stage failed: {e}")
+                return {'detections': []}
+
+    # ── Stage B: CPU ──────────────────────────────────────────────────────
+    # Every call here is cv2 / numpy — the OS routes these to the
+    # standard quad-core CPU.  No BPU involvement whatsoever.
+    def _run_cpu(self, left, right, frame_id=None) -> dict:
+        with TRACER.span('cpu', frame_id) as span:
+            span['remote'] = self.depth_process is not None
+            return self._run_depth(left, right)
+
+    def _run_depth(self, left, right) -> dict:
+        cpu_result = {}
+        current_depth_estimator = self.shared_calib.get() if self.shared_calib else None
+        if current_depth_estimator is None or right is None:
+            return cpu_result
+
+        if self.depth_process is not None and self.depth_process.is_alive():
+            try:
+                return self._run_cpu_remote(left, right, current_depth_estimator)
+            except Exception as e:
+                logger.warning(f"Depth worker process failed, running in-process: {e}")
 
-            left = pkt['left']
-            right = pkt.get('right')
-
-            # ══════════════════════════════════════════════════════════════
-            # HARDWARE LOAD BALANCING
-            # Thread A  →  BPU  (hobot_dnn / YOLOv8 Int8)
-            # Thread B  →  CPU  (OpenCV SGBM, numpy)
-            #
-            # The two threads operate on entirely different physical silicon.
-            # The BPU accelerator and the quad-core CPU run simultaneously,
-            # cutting per-frame latency roughly in half compared to running
-            # the two pipelines sequentially.
-            # ══════════════════════════════════════════════════════════════
-
-            # Shared result containers written by each thread
-            bpu_result = {}   # filled by Thread A
-            cpu_result = {}   # filled by Thread B
-
-            # ── Thread A: BPU ─────────────────────────────────────────────
-            # hobot_dnn.forward() hands the Int8 .bin to the dedicated AI
-            # accelerator chip.  The CPU is free the moment forward() is
-            # dispatched; it does not spin-wait for the result.
-            def _run_bpu():
-                try:
-                    inference = InferenceEngine(self.shared_model.get())
-                    bpu_result['detections'] = inference.run_inference(left)  # → BPU
-                except Exception as e:
-                    logger.warning(f"BPU thread failed: {e}")
-                    bpu_result['detections'] = []
-
-            # ── Thread B: CPU ─────────────────────────────────────────────
-            # Every call here is cv2 / numpy — the OS routes these to the
-            # standard quad-core CPU.  No BPU involvement whatsoever.
-            def _run_cpu():
-                current_depth_estimator = self.shared_calib.get() if self.shared_calib else None
-                if current_depth_estimator is None or right is None:
-                    return
-                try:
-                    left_rect, right_rect = current_depth_estimator.rectify(left, right)          # CPU — cv2.remap
-
-                    # SGBM: classical block-matching on metal texture → CPU
-                    disp = current_depth_estimator.disparity(left_rect, right_rect)               # CPU — cv2.StereoSGBM
-                    Z    = current_depth_estimator.depth_map(disp)                                # CPU — cv2.reprojectImageTo3D
-
-                    # Expose for PLY export after threads join
-                    cpu_result['disp']             = disp
-                    cpu_result['depth_estimator']  = current_depth_estimator
-
-                    if self.feature_extractor:
-                        h_orig, w_orig = left.shape[:2]
-                        roi_px = (
-                            int(ROI_X_PCT * w_orig),
-                            int(ROI_Y_PCT * h_orig),
-                            int(ROI_W_PCT * w_orig),
-                            int(ROI_H_PCT * h_orig),
-                        )
-                        geo = self.feature_extractor.extract_features(Z, roi_px)                  # CPU — numpy
-                        geo.update(self.feature_extractor.score_weld(geo))                        # CPU — numpy
-                        cpu_result['geometric_metrics'] = geo
+        try:
+            left_rect, right_rect = current_depth_estimator.rectify(left, right)          # CPU — cv2.remap
 
-                    if depth_to_colormap is not None:
-                        cpu_result['depth_heat'] = depth_to_colormap(disp)                        # CPU — cv2
+            # SGBM: classical block-matching on metal texture → CPU
+            disp = current_depth_estimator.disparity(left_rect, right_rect)               # CPU — cv2.StereoSGBM
+            Z    = current_depth_estimator.depth_map(disp)                                # CPU — cv2.reprojectImageTo3D
 
-                except Exception as e:
-                    logger.warning(f"CPU/SGBM thread failed: {e}")
+            # Expose for PLY export once both stages are combined
+            cpu_result['disp']             = disp
+            cpu_result['depth_estimator']  = current_depth_estimator
 
-            # ── Launch both threads and wait for both chips to finish ──────
-            thread_bpu = threading.Thread(target=_run_bpu, name="BPU-YOLO",  daemon=True)
-            thread_cpu = threading.Thread(target=_run_cpu, name="CPU-SGBM",  daemon=True)
+            if self.feature_extractor:
+                roi_px = roi_pixels(left.shape)
+                with STAGE_SECONDS.time(stage='features'):
+                    geo = self.feature_extractor.extract_features(Z, roi_px)              # CPU — numpy
+                    geo.update(self.feature_extractor.score_weld(geo))                    # CPU — numpy
+                cpu_result['geometric_metrics'] = geo
 
-            thread_bpu.start()
-            thread_cpu.start()
+            if depth_to_colormap is not None:
+                cpu_result['depth_heat'] = depth_to_colormap(disp)                        # CPU — cv2
 
-            thread_bpu.join()   # wait for BPU accelerator result
-            thread_cpu.join()   # wait for CPU SGBM result
-
-            # ── Combine results ────────────────────────────────────────────
-            detections      = bpu_result.get('detections', [])
-            visual_defects  = count_defects(detections)
-            geometric_metrics = cpu_result.get('geometric_metrics', None)
-            depth_heat        = cpu_result.get('depth_heat', None)
+        except Exception as e:
+            logger.warning(f"CPU/SGBM stage failed: {e}")
+        return cpu_result
+
+    def _run_cpu_remote(self, left, right, current_depth_estimator) -> dict:
+        """Same work as _run_cpu, executed by the depth worker process over shared memory."""
+        remote = self.depth_process.submit(left, right, roi_pixels(left.shape)).result(timeout=DEPTH_PROCESS_TIMEOUT)
+        cpu_result = {
+            'disp': remote['disp'],
+            'depth_estimator': current_depth_estimator,
+            'depth_heat': remote['depth_heat'],
+        }
+        if self.feature_extractor and remote.get('geometric_metrics') is not None:
+            cpu_result['geometric_metrics'] = remote['geometric_metrics']
+        return cpu_result
+
+    def _dispatch(self, pkt):
+        """Hand one frame to both stage executors; returns the in-flight job."""
+        left = pkt['left']
+        right = pkt.get('right')
+        frame_id = pkt.get('frame_id')
+        bpu_fut = self.bpu_stage.submit(self._run_bpu, left, frame_id)
+        cpu_fut = self.cpu_stage.submit(self._run_cpu, left, right, frame_id)
+        return pkt, bpu_fut, cpu_fut
+
+    @staticmethod
+    def _job_done(job) -> bool:
+        _, bpu_fut, cpu_fut = job
+        return bpu_fut.done() and cpu_fut.done()
+
+    @staticmethod
+    def _future_result(fut, default):
+        try:
+            return fut.result()
+        except Exception:
+            return default
+
+    @staticmethod
+    def _export_ply(disp, left, Q, ply_path, frame_id=None) -> bool:
+        """Save the full-resolution PLY locally."""
+        with TRACER.span('ply_export', frame_id):
+            os.makedirs(os.path.dirname(ply_path) or '.', exist_ok=True)
+            success = generate_ply_from_depth(disp, left, Q, ply_path)
+        if success:
+            logger.info(f"📦 PLY saved: {ply_path}")
+        return success
+
+    def _finish(self, job):
+        with TRACER.span('combine', job[0].get('frame_id')):
+            self._combine(job)
+
+    def _combine(self, job):
+        pkt, bpu_fut, cpu_fut = job
+        left = pkt['left']
+        frame_id = pkt.get('frame_id')
+        scan = self.shedder.begin(pkt.get('ts'))
+
+        # ── Combine results (waits for both chips to finish this frame) ────
+        bpu_result = self._future_result(bpu_fut, {})
+        cpu_result = self._future_result(cpu_fut, {})
+
+        detections      = bpu_result.get('detections', [])
+        visual_defects  = count_defects(detections)
+        geometric_metrics = cpu_result.get('geometric_metrics', None)
+        depth_heat        = cpu_result.get('depth_heat', None)
+
+        if geometric_metrics is None:
+            geometric_metrics = calculate_depth(left)
+
+        # ── Live overlay: only the depth blend can be shed; the overlay is
+        # always encoded, so the stream keeps updating under load.
+        overlay = annotate_frame(left, detections)
+        if depth_heat is not None:
+            decision, blended = self.shedder.execute(scan, 'heatmap', blend_depth_heatmap, overlay, depth_heat)
+            if decision == RUN:
+                overlay = blended
+        stamp_timestamp(overlay)
+
+        metrics_payload = {
+            'ts': datetime.utcnow().isoformat() + 'Z',
+            'device_id': DEVICE_ID,
+            'student_id': STUDENT_ID,
+            'visual_defects': visual_defects,
+            'geometric_metrics': geometric_metrics,
+        }
 
-            if geometric_metrics is None:
-                geometric_metrics = calculate_depth(left)
+        # Encoded once here; uploads and the buffer reuse these bytes
+        artifact = ResultArtifact(original=left, overlay=overlay)
+        if self.live_state is not None:
+            try:
+                with STAGE_SECONDS.time(stage='encode'):
+                    jpeg = artifact.jpeg('overlay', LIVE_JPEG_QUALITY)
+                self.live_state.update(
+                    jpeg_bytes=jpeg,
+                    metrics=dict(metrics_payload),   # a snapshot: shed_stages is added to ours after publishing
+                    encoder=functools.partial(stream_variant_jpeg, artifact),
+                )
+            except Exception as e:
+                logger.debug(f"Live overlay encode failed: {e}")
+
+        # PLY Point Cloud Generation (on scan/trigger)
+        ply_path = None
+        ply_pending = None
+        mesh_preview_json = None
+        disp             = cpu_result.get('disp')
+        current_depth_estimator = cpu_result.get('depth_estimator')
+        if ENABLE_PLY_EXPORT and current_depth_estimator is not None and disp is not None:
+            try:
+                # Get Q matrix from calibration
+                Q = current_depth_estimator.calib.Q if current_depth_estimator else None
+
+                if Q is not None and generate_ply_from_depth is not None:
+                    # Generate decimated preview for web viewer
+                    if generate_preview_json is not None:
+                        decision, mesh_preview_json = self.shedder.execute(
+                            scan, 'preview', generate_preview_json, disp, left, Q, target_points=PLY_DECIMATE_POINTS
+                        )
+                        if mesh_preview_json is not None:
+                            logger.debug(f"Preview JSON: {mesh_preview_json.get('count', 0)} points")
 
-            # PLY Point Cloud Generation (on scan/trigger)
-            ply_path = None
-            mesh_preview_json = None
-            disp             = cpu_result.get('disp')
-            current_depth_estimator = cpu_result.get('depth_estimator')
-            if ENABLE_PLY_EXPORT and current_depth_estimator is not None and disp is not None:
-                try:
-                    # Generate timestamp-based filename
+                    # Full-resolution PLY: lowest priority, deferred to the
+                    # background lane rather than dropped when time is short.
                     ts_str = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
                     ply_filename = f"weld_{STUDENT_ID}_{ts_str}.ply"
-                    ply_path = os.path.join(PLY_OUTPUT_DIR, ply_filename)
-                    os.makedirs(PLY_OUTPUT_DIR, exist_ok=True)
-                    
-                    # Get Q matrix from calibration
-                    Q = current_depth_estimator.calib.Q if current_depth_estimator else None
-                    
-                    if Q is not None and generate_ply_from_depth is not None:
-                        # Save full-resolution PLY locally
-                        success = generate_ply_from_depth(disp, left, Q, ply_path)
-                        if success:
-                            logger.info(f"📦 PLY saved: {ply_path}")
-                        
-                        # Generate decimated preview for web viewer
-                        if generate_preview_json is not None:
-                            mesh_preview_json = generate_preview_json(
-                                disp, left, Q, target_points=PLY_DECIMATE_POINTS
-                            )
-                            logger.debug(f"Preview JSON: {mesh_preview_json.get('count', 0)} points")
-                except Exception as e:
-                    logger.warning(f"PLY export failed: {e}")
-
-            overlay = draw_overlay(left, detections, depth_heat)
-            ok, jpeg = cv2.imencode('.jpg', overlay, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
+                    candidate = os.path.join(PLY_OUTPUT_DIR, ply_filename)
+                    decision, saved = self.shedder.execute(scan, 'ply', self._export_ply, disp, left, Q, candidate, frame_id)
+                    if decision == RUN and saved:
+                        ply_path = candidate
+                    elif decision == DEFER:
+                        ply_pending = candidate   # written later by the background lane; not guaranteed to appear
+            except Exception as e:
+                logger.warning(f"PLY export failed: {e}")
+
+        self.shedder.finish(scan)
+        STAGE_SECONDS.observe(scan.elapsed_ms() / 1000.0, stage='scan')
+        FRAMES_TOTAL.inc(event='processed')
+        if STARTUP.mark('first_scan'):
+            logger.info(f"🏁 First scan {STARTUP.milestone_ms('first_scan'):.0f} ms after process start")
+        for stage_name, decision in scan.shed.items():
+            SHED_TOTAL.inc(stage=stage_name, decision=decision)
+        if scan.shed:
+            metrics_payload['shed_stages'] = dict(scan.shed)
+            logger.debug(f"Scan over budget ({scan.elapsed_ms():.0f} ms), shed: {scan.shed}")
+
+        result = {
+            'frame_id': frame_id,
+            'image': left,
+            'heatmap': overlay,
+            'artifact': artifact,
+            'detections': detections,
+            'geometric_metrics': geometric_metrics,
+            'visual_defects': visual_defects,
+            'metrics_payload': metrics_payload,
+            'ply_path': ply_path,          # written and on disk
+            'ply_pending': ply_pending,    # deferred: not on disk yet
+            'mesh_preview_json': mesh_preview_json,
+            'shed_stages': dict(scan.shed),
+        }
 
-            metrics_payload = {
-                'ts': datetime.utcnow().isoformat() + 'Z',
-                'device_id': DEVICE_ID,
-                'student_id': STUDENT_ID,
-                'visual_defects': visual_defects,
-                'geometric_metrics': geometric_metrics,
-            }
+        try:
+            self.out_q.put(result, timeout=0.5)
+        except queue.Full:
+            try:
+                _ = self.out_q.get_nowait()
+            except Exception:
+                pass
+            try:
+                self.out_q.put(result, timeout=0.2)
+            except Exception:
+                pass
 
-            if ok and self.live_state is not None:
-                try:
-                    self.live_state.update(jpeg_bytes=jpeg.tobytes(), metrics=metrics_payload)
-                except Exception:
-                    pass
-
-            result = {
-                'image': left,
-                'heatmap': overlay,
-                'geometric_metrics': geometric_metrics,
-                'visual_defects': visual_defects,
-                'metrics_payload': metrics_payload,
-                'ply_path': ply_path,
-                'mesh_preview_json': mesh_preview_json,
-            }
+    def stage_stats(self) -> list:
+        return [self.bpu_stage.stats(), self.cpu_stage.stats(), self.background_lane.stats()]
 
-            try:
-                self.out_q.put(result, timeout=0.5)
-            except queue.Full:
-                try:
-                    _ = self.out_q.get_nowait()
-                except Exception:
-                    pass
+    def run(self):
+        self.bpu_stage.start()
+        self.cpu_stage.start()
+        self.background_lane.start()
+        inflight = collections.deque()
+        try:
+            while not self.stop_event.is_set():
                 try:
-                    self.out_q.put(result, timeout=0.2)
-                except Exception:
-                    pass
+                    pkt = self.in_q.get(timeout=0.5)
+                except queue.Empty:
+                    pkt = None
+
+                if pkt is not None:
+                    inflight.append(self._dispatch(pkt))
+
+                # Combine frames in capture order.  Only block on the oldest
+                # frame once the pipeline is full or no new frame arrived.
+                while inflight and (
+                    pkt is None
+                    or len(inflight) >= self.pipeline_depth
+                    or self._job_done(inflight[0])
+                ):
+                    self._finish(inflight.popleft())
+        finally:
+            self.bpu_stage.stop()
+            self.cpu_stage.stop()
+            self.background_lane.stop()
 
 
 class UploadWorker(threading.Thread):
-    def __init__(self, stop_event, in_q: queue.Queue, buffer_obj):
-        super().__init__(daemon=True)
+    """Uploads live results; the buffered backlog is replayed by a DrainEngine.
+
+    Both share one circuit breaker: once the backend has failed repeatedly,
+    new results are spooled to LocalBuffer immediately instead of each
+    waiting out a request timeout first.
+    """
+
+    def __init__(self, stop_event, in_q: queue.Queue, buffer_obj, batcher=None, breaker=None, sampler=None):
+        super().__init__(daemon=True, name='UploadWorker')
         self.stop_event = stop_event
         self.in_q = in_q
         self.buffer = buffer_obj
+        self.batcher = batcher
+        self.sampler = sampler
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=BREAKER_FAILURES,
+            reset_backoff=Backoff(base_s=BREAKER_RESET_S, max_s=BREAKER_MAX_RESET_S),
+        )
+        self.drain = None
+        if buffer_obj is not None:
+            self.drain = DrainEngine(
+                buffer_obj,
+                self._send_buffered,
+                breaker=self.breaker,
+                chunker=self._chunk,
+                parallelism=DRAIN_PARALLELISM,
+                idle_interval_s=DRAIN_INTERVAL_S,
+            )
+
+    # ── buffered replay (called from the drain engine's threads) ─────────
+
+    def _chunk(self, pending):
+        """Units of work for the drain engine: bounded batches, or single bundles without batch support."""
+        if self.batcher is None or not self.batcher.available():
+            return [[item] for item in pending]
 
-    def _flush_buffer(self):
+        return pack_batches(pending, self.buffer.size_of, UPLOAD_BATCH_MAX_ITEMS, UPLOAD_BATCH_MAX_BYTES)
+
+    def _send_buffered(self, items):
+        """Deliver one unit. Returns (delivered items, transport failed; None if nothing was sent)."""
+        if self.batcher is not None and self.batcher.available():
+            try:
+                return self._send_batch(items)
+            except BatchUnsupported as e:
+                logger.info(f"Batch upload unavailable ({e}) - replaying one assessment per request")
+                items = [item for item in items if self.buffer.size_of(item)]   # minus any just quarantined
+
+        delivered, sent = [], False
+        for item in items:   # rejected items stay undelivered; the drain backs them off one by one
+            if self.stop_event.is_set():
+                break
+            try:
+                fields, original, heatmap = self._read_bundle(item)
+            except Exception as e:
+                self._quarantine(item, e)
+                continue
+            # One bundle's stored JPEG bytes in memory at a time, sent without decoding
+            sent = True
+            status = upload_encoded_assessment(original, heatmap, fields, priority=REPLAY)
+            if status == UPLOAD_TRANSPORT:
+                return delivered, True
+            if status == UPLOAD_OK:
+                delivered.append(item)
+        return delivered, (False if sent else None)
+
+    def _quarantine(self, item, error) -> None:
+        # A local read / parse problem, not a network one: no retry, no circuit breaker
+        logger.warning(f"Quarantining unreadable buffered bundle {item.bundle_id}: {error}")
+        UPLOADS_TOTAL.inc(kind='assessment', outcome='quarantined')
+        self.buffer.quarantine(item, f"{type(error).__name__}: {error}")
+
+    @staticmethod
+    def _read_bundle(item):
+        """(fields, original JPEG, heatmap JPEG) of a buffered bundle; raises if it is unreadable or corrupt."""
+        metrics = item.read_metrics()
+        meta = item.read_meta()
+        fields = assessment_fields(
+            metrics.get('geometric'),
+            metrics.get('visual'),
+            meta.get('student_id', STUDENT_ID),
+            captured_at=meta.get('created_at'),
+        )
+        original = check_jpeg(item.read_original(), 'original')
+        heatmap = item.read_heatmap()
+        heatmap = check_jpeg(heatmap, 'heatmap') if heatmap is not None else original
+        return fields, original, heatmap
+
+    @classmethod
+    def _batch_entry(cls, item) -> BatchEntry:
+        fields, original, heatmap = cls._read_bundle(item)
+        return BatchEntry(item.bundle_id, fields, original, heatmap)
+
+    def _send_batch(self, items):
+        entries, by_id = [], {}
+        for item in items:
+            try:
+                entry = self._batch_entry(item)
+            except Exception as e:
+                self._quarantine(item, e)
+                continue
+            entries.append(entry)
+            by_id[entry.id] = item
+        if not entries:
+            return [], None
+
+        try:
+            with STAGE_SECONDS.time(stage='upload_batch'), UPLINK.transfer(REPLAY, sum(e.nbytes for e in entries)):
+                results = self.batcher.send(entries)
+        except BatchUnsupported:
+            raise
+        except Exception as e:
+            logger.warning(f"Batch upload failed, will retry: {e}")
+            return [], True
+
+        delivered = []
+        for r in results:
+            UPLOADS_TOTAL.inc(kind='assessment_batch', outcome='ok' if r.ok else 'failed')
+            if r.ok:
+                delivered.append(by_id[r.id])
+            else:
+                logger.warning(f"Buffered assessment {r.id} rejected: {r.status} {r.error}")
+        logger.info(f"📤 Batch replay: {len(delivered)}/{len(entries)} buffered assessments uploaded")
+        return delivered, False
+
+    # ── live results ──────────────────────────────────────────────────────
+
+    def _spool(self, res, artifact) -> None:
         if self.buffer is None:
             return
+        try:
+            metrics_json = {
+                'geometric': res['geometric_metrics'],
+                'visual': res['visual_defects'],
+            }
+            meta = {
+                'student_id': STUDENT_ID,
+                'device_id': DEVICE_ID,
+                'created_at': datetime.utcnow().isoformat() + 'Z',
+            }
+            image_jpeg, heatmap_jpeg = assessment_jpegs(artifact)
+            self.buffer.enqueue(
+                image_jpeg=image_jpeg,
+                heatmap_jpeg=heatmap_jpeg,
+                metrics_json=metrics_json,
+                meta=meta,
+            )
+        except Exception as e:
+            logger.warning(f"Buffer enqueue failed: {e}")
 
-        for item in self.buffer.list_pending():
-            if self.stop_event.is_set():
+    def _maybe_upload_training(self, res, artifact) -> None:
+        """Upload the frame as training data if the sampler rates it informative enough."""
+        if not training_upload_enabled():
+            return
+        label = 'weld'
+        if self.sampler is not None:
+            decision = self.sampler.consider(res['image'], res.get('detections') or [])
+            if not decision.upload:
                 return
-            try:
-                img = cv2.imread(str(item.original_path))
-                heat = cv2.imread(str(item.heatmap_path))
-                metrics = json.loads(item.metrics_path.read_text(encoding='utf-8'))
-                meta = json.loads(item.meta_path.read_text(encoding='utf-8'))
-
-                ok = upload_assessment(img, metrics['geometric'], metrics['visual'], student_id=meta.get('student_id', STUDENT_ID))
-                if ok:
-                    self.buffer.delete(item)
-                else:
-                    break
-            except Exception:
-                break
+            label = decision.label
+        upload_training_image(res['image'], label=label, artifact=artifact)
 
     def run(self):
-        last_flush = 0.0
-        while not self.stop_event.is_set():
-            if time.time() - last_flush > 10.0:
-                self._flush_buffer()
-                last_flush = time.time()
+        if self.drain is not None:
+            self.drain.start()
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    res = self.in_q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
 
-            try:
-                res = self.in_q.get(timeout=0.5)
-            except queue.Empty:
-                continue
+                artifact = res.get('artifact') or ResultArtifact(original=res['image'], overlay=res.get('heatmap'))
+                if not self.breaker.allow():
+                    # Backend known to be down: spool now rather than wait for a timeout
+                    UPLOADS_TOTAL.inc(kind='assessment', outcome='short_circuited')
+                    self._spool(res, artifact)
+                    continue
 
-            upload_training_image(res['image'], label='weld')
-            ok = upload_assessment(res['image'], res['geometric_metrics'], res['visual_defects'])
-            if not ok and self.buffer is not None:
-                try:
-                    metrics_json = {
-                        'geometric': res['geometric_metrics'],
-                        'visual': res['visual_defects'],
-                    }
-                    meta = {
-                        'student_id': STUDENT_ID,
-                        'device_id': DEVICE_ID,
-                        'created_at': datetime.utcnow().isoformat() + 'Z',
-                    }
-                    self.buffer.enqueue(
-                        image_bgr=res['image'],
-                        heatmap_bgr=res['heatmap'],
-                        metrics_json=metrics_json,
-                        meta=meta,
-                    )
-                except Exception as e:
-                    logger.warning(f"Buffer enqueue failed: {e}")
+                self._maybe_upload_training(res, artifact)
+                status = upload_assessment(
+                    res['image'],
+                    res['geometric_metrics'],
+                    res['visual_defects'],
+                    frame_id=res.get('frame_id'),
+                    artifact=artifact,
+                )
+                if status == UPLOAD_TRANSPORT:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()   # a 4xx still means the backend is up
+                if status == UPLOAD_OK:
+                    if self.drain is not None:
+                        self.drain.notify()
+                else:
+                    self._spool(res, artifact)
+        finally:
+            if self.drain is not None:
+                self.drain.stop()
 
 
 # ============================================================================
-# MAIN LOOP
+# STARTUP
 # ============================================================================
+# Each init_* function is one independent chain of startup phases; main()
+# runs them concurrently and records every phase in STARTUP (served on /ready).
 
-def main():
-    """Main execution loop"""
-    
-    logger.info("=" * 60)
-    logger.info("🔥 WeldVision X5 - Edge Device Started")
-    logger.info("=" * 60)
-    
-    logger.info("Initializing components...")
+def init_stream_server():
+    """Start the overlay stream server. Returns (live_state, stream_server), both None if disabled."""
+    if OverlayStreamServer is None or LiveState is None or not ENABLE_STREAM:
+        STARTUP.skip('stream_server', 'disabled')
+        return None, None
+
+    try:
+        with STARTUP.phase('stream_server'):
+            live_state = LiveState(max_variants=STREAM_MAX_VARIANTS)
+            common = dict(
+                host=STREAM_HOST,
+                port=STREAM_PORT,
+                live_state=live_state,
+                registry=REGISTRY,
+                profiler=StackSampler(max_seconds=PROFILER_MAX_SECONDS) if ENABLE_PROFILER else None,
+                startup=STARTUP,
+            )
+            if STREAM_SERVER == 'asyncio':
+                stream_server = AsyncStreamServer(
+                    **common,
+                    max_clients=STREAM_MAX_CLIENTS,
+                    client_buffer_bytes=STREAM_CLIENT_BUFFER_KB * 1024,
+                )
+            else:
+                stream_server = OverlayStreamServer(**common)
+            stream_server.start()
+        logger.info(f"📺 Live stream on http://{STREAM_HOST}:{STREAM_PORT}/stream.mjpg")
+        return live_state, stream_server
+    except Exception as e:
+        logger.warning(f"Stream server init failed: {e}")
+        return None, None
 
-    # Watchdogs
-    watchdog = ModelWatchdog(MODEL_PATH, MODEL_UPDATE_PATH)
-    calib_watchdog = CalibrationWatchdog(STEREO_CALIB_PATH)
 
+def init_model(watchdog):
+    """R2 pull → hot-swap → BPU model load."""
     # Pull latest compiled .bin from Cloudflare R2 before loading.
     # download_from_r2() writes model_update.bin; check_for_update() swaps it
     # into place as model.bin.  Both are no-ops if env vars are absent.
-    watchdog.download_from_r2()
-    watchdog.check_for_update()
+    with STARTUP.phase('r2_download') as info:
+        info['downloaded'] = watchdog.download_from_r2()
+    with STARTUP.phase('model_swap') as info:
+        info['swapped'] = watchdog.check_for_update()
 
     # Start background thread: polls /api/models/deployed every 5 min.
     # When user clicks "Deploy Now" in the webapp, this thread detects the
     # new deployed_at timestamp, downloads the .bin from R2, and hot-swaps it.
     watchdog.start_deploy_poll(interval_seconds=300)
 
-    # Initial loads
-    model = watchdog.load_model()
-    if model is None and dnn is not None:
-        logger.error("❌ Failed to load model - exiting")
-        return 1
-    shared_model = SharedModel(model)
+    with STARTUP.phase('model_load') as info:
+        model = watchdog.load_model()
+        if model is None:
+            info['status'] = 'simulation' if dnn is None else 'failed'
+    return model
 
-    # Initial calibration pull
-    calib_watchdog.check_for_update()
 
-    # Camera
-    camera = CameraManager()
-    if not camera.initialize():
-        logger.error("❌ Failed to initialize camera - exiting")
-        return 1
+def init_stereo(calib_watchdog):
+    """Calibration pull → stereo estimator → depth worker process.
 
-    # Optional: local buffering
-    buffer_obj = None
-    if LocalBuffer is not None and ENABLE_BUFFERING:
-        try:
-            buffer_obj = LocalBuffer(root_dir=BUFFER_DIR, max_bytes=BUFFER_MAX_BYTES)
-        except Exception as e:
-            logger.warning(f"Buffer init failed: {e}")
-            buffer_obj = None
+    Returns (depth_estimator, feature_extractor, depth_process); any may be None.
+    """
+    with STARTUP.phase('calibration_fetch') as info:
+        info['updated'] = calib_watchdog.check_for_update()
 
-    # Optional: live overlay stream
-    live_state = None
-    stream_server = None
-    if OverlayStreamServer is not None and LiveState is not None and ENABLE_STREAM:
-        try:
-            live_state = LiveState()
-            stream_server = OverlayStreamServer(host=STREAM_HOST, port=STREAM_PORT, live_state=live_state)
-            stream_server.start()
-            logger.info(f"📺 Live stream on http://{STREAM_HOST}:{STREAM_PORT}/stream.mjpg")
-        except Exception as e:
-            logger.warning(f"Stream server init failed: {e}")
-            live_state = None
-            stream_server = None
+    if not ENABLE_STEREO:
+        STARTUP.skip('stereo_init', 'disabled')
+        return None, None, None
 
     # Stereo depth: SGBM (CPU/OpenCV) for disparity + WeldFeatureExtractor for geometry
     depth_estimator = None
     feature_extractor = None
-
-    if StereoDepthEstimator is not None and ENABLE_STEREO:
+    with STARTUP.phase('stereo_init') as info:
+        if not load_stereo_modules():
+            info['status'] = 'failed'
+            return None, None, None
         try:
             depth_estimator = StereoDepthEstimator.from_json_path(STEREO_CALIB_PATH)
             logger.info(f"🟦 Stereo SGBM depth enabled using {STEREO_CALIB_PATH}")
@@ -1332,6 +1926,131 @@ def main():
 
         except Exception as e:
             logger.warning(f"Stereo depth disabled or partially failed: {e}")
+            info['status'] = 'failed'
+            info['error'] = str(e)
+
+    # Optional: run the depth stage in a worker process (shared-memory frames)
+    depth_process = None
+    if not ENABLE_DEPTH_PROCESS or depth_estimator is None:
+        STARTUP.skip('depth_process', 'disabled')
+        return depth_estimator, feature_extractor, None
+
+    with STARTUP.phase('depth_process') as info:
+        try:
+            depth_process = DepthProcessClient(
+                depth_estimator.calib,
+                focal_length_px=feature_extractor.focal_length_px if feature_extractor else 800.0,
+                baseline_mm=feature_extractor.baseline_mm if feature_extractor else 65.0,
+                with_features=feature_extractor is not None,
+                slots=DEPTH_PROCESS_SLOTS,
+                slot_timeout_s=DEPTH_PROCESS_TIMEOUT,
+            )
+            depth_process.start()
+        except Exception as e:
+            logger.warning(f"Depth worker process disabled: {e}")
+            info['status'] = 'failed'
+            info['error'] = str(e)
+            depth_process = None
+
+    return depth_estimator, feature_extractor, depth_process
+
+
+def init_camera(camera) -> bool:
+    with STARTUP.phase('camera') as info:
+        ok = camera.initialize()
+        if not ok:
+            info['status'] = 'failed'
+        elif camera.camera is None:
+            info['status'] = 'simulation'
+    return ok
+
+
+def init_buffer():
+    """Optional local buffering. Returns the LocalBuffer or None."""
+    if LocalBuffer is None or not ENABLE_BUFFERING:
+        STARTUP.skip('buffer', 'disabled')
+        return None
+
+    with STARTUP.phase('buffer') as info:
+        try:
+            if BUFFER_MODE == 'segments':
+                from modules.segment_spool import SegmentSpool
+                return SegmentSpool(
+                    BUFFER_DIR,
+                    max_bytes=BUFFER_MAX_BYTES,
+                    segment_bytes=BUFFER_SEGMENT_BYTES,
+                    fsync_interval_s=BUFFER_FSYNC_INTERVAL_S,
+                )
+            buffer_obj = LocalBuffer(
+                BUFFER_DIR,
+                max_bytes=BUFFER_MAX_BYTES,
+                index=BUFFER_INDEX,
+                soft_limit_bytes=BUFFER_SOFT_BYTES,
+            )
+            buffer_obj.start_compactor()
+            return buffer_obj
+        except Exception as e:
+            logger.warning(f"Buffer init failed: {e}")
+            info['status'] = 'failed'
+            info['error'] = str(e)
+            return None
+
+
+# ============================================================================
+# MAIN LOOP
+# ============================================================================
+
+def main():
+    """Main execution loop"""
+    
+    logger.info("=" * 60)
+    logger.info("🔥 WeldVision X5 - Edge Device Started")
+    logger.info("=" * 60)
+    
+    logger.info("Initializing components...")
+
+    if ENABLE_TRACE:
+        TRACER.enable(TRACE_DIR, max_events_per_file=TRACE_MAX_EVENTS, max_files=TRACE_MAX_FILES)
+        logger.info(f"🧵 Frame tracing enabled → {TRACE_DIR}")
+
+    # Optional: live overlay stream — started first so /ready can be polled during init
+    live_state, stream_server = init_stream_server()
+
+    # Watchdogs
+    watchdog = ModelWatchdog(MODEL_PATH, MODEL_UPDATE_PATH)
+    calib_watchdog = CalibrationWatchdog(STEREO_CALIB_PATH)
+    camera = CameraManager()
+
+    # Independent init chains run concurrently; each chain is sequential inside.
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix='init') as pool:
+        model_fut = pool.submit(init_model, watchdog)
+        stereo_fut = pool.submit(init_stereo, calib_watchdog)
+        camera_fut = pool.submit(init_camera, camera)
+        buffer_fut = pool.submit(init_buffer)
+
+    model = model_fut.result()
+    if model is None and dnn is not None:
+        logger.error("❌ Failed to load model - exiting")
+        return 1
+    shared_model = SharedModel(model)
+
+    if not camera_fut.result():
+        logger.error("❌ Failed to initialize camera - exiting")
+        return 1
+
+    depth_estimator, feature_extractor, depth_process = stereo_fut.result()
+    buffer_obj = buffer_fut.result()
+
+    # Optional: frame quality gate
+    quality_gate = None
+    if FrameQualityGate is not None and ENABLE_QUALITY_GATE:
+        quality_gate = FrameQualityGate(
+            roi_pct=(ROI_X_PCT, ROI_Y_PCT, ROI_W_PCT, ROI_H_PCT),
+            min_sharpness=QUALITY_MIN_SHARPNESS,
+            max_glare_fraction=QUALITY_MAX_GLARE,
+            max_dark_fraction=QUALITY_MAX_DARK,
+            min_roi_texture=QUALITY_MIN_TEXTURE,
+        )
 
     shared_calib = SharedCalibration(depth_estimator)
 
@@ -1340,7 +2059,13 @@ def main():
     q_cap = queue.Queue(maxsize=FRAME_QUEUE_MAX)
     q_out = queue.Queue(maxsize=RESULT_QUEUE_MAX)
 
-    cap_worker = CaptureWorker(stop_event, camera=camera, out_q=q_cap, interval_s=CAPTURE_INTERVAL)
+    cap_worker = CaptureWorker(
+        stop_event,
+        camera=camera,
+        out_q=q_cap,
+        interval_s=CAPTURE_INTERVAL,
+        quality_gate=quality_gate,
+    )
     proc_worker = ProcessWorker(
         stop_event,
         shared_model=shared_model,
@@ -1349,14 +2074,18 @@ def main():
         live_state=live_state,
         shared_calib=shared_calib,
         feature_extractor=feature_extractor,
+        depth_process=depth_process,
     )
-    up_worker = UploadWorker(stop_event, in_q=q_out, buffer_obj=buffer_obj)
+    batcher = BatchUploader(BACKEND, UPLOAD_BATCH_ENDPOINT) if ENABLE_BATCH_UPLOAD and buffer_obj is not None else None
+    sampler = TrainingSampler(top_fraction=TRAINING_TOP_FRACTION, daily_budget=TRAINING_DAILY_BUDGET)
+    up_worker = UploadWorker(stop_event, in_q=q_out, buffer_obj=buffer_obj, batcher=batcher, sampler=sampler)
 
     cap_worker.start()
     proc_worker.start()
     up_worker.start()
 
-    logger.info("✅ All components initialized")
+    STARTUP.set_ready()
+    logger.info(f"✅ All components initialized ({STARTUP.snapshot()['time_to_ready_ms']:.0f} ms after process start)")
     logger.info(f"📸 Capture interval: {CAPTURE_INTERVAL} seconds")
     logger.info(f"🎯 Confidence threshold: {CONFIDENCE_THRESHOLD}")
     logger.info("-" * 60)
@@ -1370,21 +2099,48 @@ def main():
                 shared_model.set(model)
 
             # Calibration Watchdog - Check for updates from backend
-            if calib_watchdog.check_for_update():
+            if calib_watchdog.check_for_update() and load_stereo_modules():
                 logger.info("🔄 Reloading calibration...")
                 try:
                     new_estimator = StereoDepthEstimator.from_json_path(STEREO_CALIB_PATH)
                     shared_calib.set(new_estimator)
+                    if depth_process is not None:
+                        depth_process.reload_calibration(new_estimator.calib)
                     logger.info("✅ Calibration hot-swapped successfully")
                 except Exception as e:
                     logger.error(f"❌ Failed to reload calibration: {e}")
 
-            if buffer_obj is not None and live_state is not None:
-                try:
-                    stats = buffer_obj.stats()
-                    live_state.set_extra({'buffer': stats})
-                except Exception:
-                    pass
+            if live_state is not None:
+                extra = {}
+                if buffer_obj is not None:
+                    try:
+                        extra['buffer'] = buffer_obj.stats()
+                    except Exception:
+                        pass
+                if quality_gate is not None:
+                    extra['frame_quality'] = quality_gate.stats()
+                extra['stages'] = proc_worker.stage_stats()
+                extra['load_shedding'] = proc_worker.shedder.stats()
+                extra['capture'] = cap_worker.stats()
+                extra['logging'] = logging_stats()
+                extra['http'] = BACKEND.stats()
+                extra['object_storage'] = STORAGE.stats()
+                if PRESIGNED is not None:
+                    extra['presigned_upload'] = PRESIGNED.stats()
+                extra['uplink'] = dict(UPLINK.stats(), adaptive_quality=ADAPTIVE_QUALITY.stats())
+                if training_upload_enabled():
+                    extra['training_sampler'] = sampler.stats()
+                if batcher is not None:
+                    extra['batch_upload'] = batcher.stats()
+                if up_worker.drain is not None:
+                    extra['drain'] = up_worker.drain.stats()
+                else:
+                    extra['upload_breaker'] = up_worker.breaker.stats()
+                if TRACER.enabled:
+                    extra['tracing'] = TRACER.stats()
+                if stream_server is not None:
+                    extra['stream'] = stream_server.stats()
+                live_state.set_extra(extra)
 
             time.sleep(5.0)  # Check every 5 seconds
 
@@ -1406,6 +2162,15 @@ def main():
             pass
 
         camera.close()
+        TRACER.close()
+        if buffer_obj is not None:
+            buffer_obj.close()
+        if PRESIGNED is not None:
+            PRESIGNED.close()
+        BACKEND.close()
+        STORAGE.close()
+        if depth_process is not None:
+            depth_process.stop()
         if stream_server is not None:
             try:
                 stream_server.stop()
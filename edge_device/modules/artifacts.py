@@ -0,0 +1,72 @@
+"""
+Encode-once result artifacts
+
+A ``ResultArtifact`` carries the images of one scan (the original frame
+and the annotated overlay) together with their JPEG encodings.  Each
+(image, quality, scale) combination is encoded at most once, on whichever
+thread asks first; the live stream, assessment upload, local buffer and
+training upload all read the same bytes.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .telemetry import REGISTRY
+
+JPEG_ENCODES_TOTAL = REGISTRY.counter(
+    "weldvision_jpeg_encodes_total",
+    "JPEG requests on result artifacts: 'encoded' ran cv2.imencode, 'reused' was served from cache.",
+    ("image", "outcome"),
+)
+
+
+def encode_jpeg(image: np.ndarray, quality: int) -> bytes:
+    ok, buf = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)])
+    if not ok:
+        raise RuntimeError("JPEG encode failed")
+    return buf.tobytes()
+
+
+class ResultArtifact:
+    def __init__(self, **images: Optional[np.ndarray]):
+        self._images: Dict[str, np.ndarray] = {k: v for k, v in images.items() if v is not None}
+        self._jpeg: Dict[Tuple[str, int, float], bytes] = {}
+        self._lock = threading.Lock()
+
+    def has(self, name: str) -> bool:
+        return name in self._images
+
+    def image(self, name: str) -> np.ndarray:
+        return self._images[name]
+
+    def jpeg(self, name: str, quality: int, scale: float = 1.0) -> bytes:
+        """JPEG bytes of image ``name`` at ``quality`` (downscaled by ``scale``), encoded on first request only."""
+        key = (name, int(quality), float(scale))
+        data = self._jpeg.get(key)
+        if data is not None:
+            JPEG_ENCODES_TOTAL.inc(image=name, outcome="reused")
+            return data
+
+        # Per-artifact lock: a concurrent second caller waits rather than encoding again
+        with self._lock:
+            data = self._jpeg.get(key)
+            if data is None:
+                image = self._images[name]
+                if scale < 1.0:
+                    image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                data = encode_jpeg(image, quality)
+                self._jpeg[key] = data
+                JPEG_ENCODES_TOTAL.inc(image=name, outcome="encoded")
+                return data
+        JPEG_ENCODES_TOTAL.inc(image=name, outcome="reused")
+        return data
+
+    def encoded(self) -> Dict[Tuple[str, int, float], int]:
+        """(image, quality, scale) → byte size of every encoding produced so far."""
+        with self._lock:
+            return {k: len(v) for k, v in self._jpeg.items()}
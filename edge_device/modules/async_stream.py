@@ -0,0 +1,304 @@
+"""
+Asyncio overlay stream server
+
+Drop-in alternative to ``OverlayStreamServer`` (``WELDVISION_STREAM_SERVER=
+asyncio``): one event-loop thread serves every connection instead of one OS
+thread per MJPEG viewer, so a room full of browsers does not put dozens of
+threads next to the inference pipeline.
+
+Frames reach the loop through a ``LiveState`` listener (one
+``call_soon_threadsafe`` per published frame, however many viewers).  Each
+viewer coroutine writes the newest prebuilt multipart chunk and then awaits
+``drain()``; while a slow client's socket buffer is above
+``client_buffer_bytes`` it is not handed new frames, so it skips to the
+newest one instead of queueing, and a client that stays stalled for
+``stall_timeout_s`` is dropped.  Viewers beyond ``max_clients`` get a 503.
+
+Routes match the threaded server; ``/debug/profile`` (loopback clients
+only) runs in the loop's default executor because sampling blocks for
+``seconds``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import socket
+import threading
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .overlay_stream import MJPEG_BOUNDARY, LiveState, StreamStats, is_loopback, parse_variant
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 503: "Service Unavailable"}
+_INDEX = (
+    "WeldVision X5 Stream\n"
+    "- /stream.mjpg?w=640&q=60&fps=10 (all optional)\n"
+    "- /snapshot.jpg\n"
+    "- /metrics.json\n"
+    "- /metrics\n"
+    "- /ready\n"
+    "- /debug/profile?seconds=N&hz=M\n"
+).encode("utf-8")
+
+
+def _head(status: int, headers: dict) -> bytes:
+    lines = [f"HTTP/1.0 {status} {_REASONS.get(status, '')}", "Server: WeldVisionStream/1.0 asyncio"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("ascii")
+
+
+class AsyncStreamServer:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        live_state: LiveState,
+        registry=None,
+        profiler=None,
+        startup=None,
+        *,
+        max_clients: int = 32,
+        client_buffer_bytes: int = 512 * 1024,
+        stall_timeout_s: float = 10.0,
+        header_timeout_s: float = 5.0,
+    ):
+        self.host = host
+        self.port = port
+        self.live_state = live_state
+        self.registry = registry
+        self.profiler = profiler
+        self.startup = startup
+        self.max_clients = max(1, int(max_clients))
+        self.client_buffer_bytes = max(64 * 1024, int(client_buffer_bytes))
+        self.stall_timeout_s = float(stall_timeout_s)
+        self.header_timeout_s = float(header_timeout_s)
+        self.stream_stats = StreamStats()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._frame: Optional[asyncio.Future] = None    # resolved (and replaced) on every published frame
+        self._stopping: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+        self._start_error: Optional[BaseException] = None
+        self._connections: set = set()
+        self._dropped = 0
+
+    # ── lifecycle (called from other threads) ────────────────────────────
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="AsyncStreamServer", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self._thread = None
+            raise self._start_error
+
+    def stop(self) -> None:
+        if not self._thread or self._loop is None:
+            return
+        self.live_state.remove_listener(self._on_frame_threadsafe)
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout=5.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._serve())
+        except BaseException as e:
+            if not self._started.is_set():
+                self._start_error = e
+                self._started.set()
+            else:
+                logger.warning(f"Async stream server stopped: {e}")
+        finally:
+            loop.close()
+
+    async def _serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self._frame = loop.create_future()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.live_state.add_listener(self._on_frame_threadsafe)
+        self._started.set()
+        try:
+            await self._stopping.wait()
+        finally:
+            self._server.close()
+            self._wake_viewers()   # viewers see _stopping and hang up
+            if self._connections:
+                _, stuck = await asyncio.wait(self._connections, timeout=2.0)
+                for task in stuck:   # blocked in drain() or a profile run
+                    task.cancel()
+                await asyncio.gather(*stuck, return_exceptions=True)
+            await asyncio.sleep(0)   # let the transports finish closing
+
+    # ── frame fan-out ────────────────────────────────────────────────────
+
+    def _on_frame_threadsafe(self, _version: int) -> None:
+        # Publisher thread: one hop into the loop per frame, not per viewer
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake_viewers)
+
+    def _wake_viewers(self) -> None:
+        frame, self._frame = self._frame, self._loop.create_future()
+        if frame is not None and not frame.done():
+            frame.set_result(None)
+
+    # ── connections ──────────────────────────────────────────────────────
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.header_timeout_s)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            try:
+                method, target, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+            except ValueError:
+                await self._respond(writer, 400)
+                return
+            if method != "GET":
+                await self._respond(writer, 405)
+                return
+            await self._route(writer, target)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.debug(f"Stream client error: {e}")
+        finally:
+            writer.close()
+            self._connections.discard(task)
+
+    async def _respond(self, writer, status: int, body: bytes = b"", content_type: str = "text/plain; charset=utf-8") -> None:
+        headers = {"Content-Type": content_type, "Cache-Control": "no-store", "Content-Length": str(len(body))}
+        writer.write(_head(status, headers) + body)
+        await writer.drain()
+
+    async def _route(self, writer, target: str) -> None:
+        path = target.split("?", 1)[0]
+        query = parse_qs(urlsplit(target).query)
+
+        if path == "/stream.mjpg":
+            await self._stream(writer, query)
+        elif path == "/snapshot.jpg":
+            jpeg, _, _ = self.live_state.snapshot()
+            if jpeg:
+                await self._respond(writer, 200, jpeg, "image/jpeg")
+            else:
+                await self._respond(writer, 503)
+        elif path == "/metrics.json":
+            _, metrics, _ = self.live_state.snapshot()
+            await self._respond(writer, 200, json.dumps(metrics).encode("utf-8"), "application/json")
+        elif path == "/metrics" and self.registry is not None:
+            body = self.registry.render_prometheus().encode("utf-8")
+            await self._respond(writer, 200, body, "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/ready" and self.startup is not None:
+            report = self.startup.snapshot()
+            await self._respond(writer, 200 if report.get("ready") else 503,
+                                json.dumps(report).encode("utf-8"), "application/json")
+        elif path == "/debug/profile" and self.profiler is not None:
+            peer = writer.get_extra_info("peername")
+            if peer and is_loopback(peer[0]):
+                await self._profile(writer, query)
+            else:
+                await self._respond(writer, 403)
+        elif path in ("/", "/index", "/index.html"):
+            await self._respond(writer, 200, _INDEX)
+        else:
+            await self._respond(writer, 404)
+
+    async def _profile(self, writer, query: dict) -> None:
+        try:
+            seconds = float(query.get("seconds", ["10"])[0])
+            hz = int(query.get("hz", ["100"])[0])
+        except ValueError:
+            await self._respond(writer, 400)
+            return
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(None, self.profiler.profile, seconds, hz)
+        except RuntimeError as e:  # ProfilerBusy
+            await self._respond(writer, 409, f"{e}\n".encode("utf-8"))
+            return
+        await self._respond(writer, 200, body.encode("utf-8"))
+
+    async def _stream(self, writer: asyncio.StreamWriter, query: dict) -> None:
+        if self.stream_stats.clients >= self.max_clients:
+            self.stream_stats.client_rejected()
+            writer.write(_head(503, {"Retry-After": "5", "Content-Length": "0"}))
+            await writer.drain()
+            return
+        try:
+            fps = float(query.get("fps", ["0"])[0])
+            variant = parse_variant(query)
+        except ValueError:
+            await self._respond(writer, 400)
+            return
+        min_interval = 1.0 / fps if fps > 0 else 0.0
+        if not self.live_state.subscribe(variant):
+            self.stream_stats.client_rejected()
+            writer.write(_head(503, {"Retry-After": "5", "Content-Length": "0"}))
+            await writer.drain()
+            return
+
+        # drain() suspends this viewer once its unsent bytes pass the high-water mark; the
+        # kernel send buffer is capped too, or autotuning hides megabytes of backlog from us
+        writer.transport.set_write_buffer_limits(high=self.client_buffer_bytes)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.client_buffer_bytes)
+        writer.write(_head(200, {
+            "Content-Type": f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+            "Cache-Control": "no-store",
+        }))
+
+        self.stream_stats.client_joined()
+        loop = asyncio.get_running_loop()
+        version = 0
+        try:
+            while not self._stopping.is_set():
+                latest, chunk = self.live_state.latest_chunk(variant)
+                if latest <= version:
+                    await self._frame
+                    continue
+                if chunk is None and variant is not None:
+                    # First viewer of this variant for this frame encodes it, off the loop
+                    latest, chunk = await loop.run_in_executor(None, self.live_state.encode_variant, variant)
+                if chunk is None:
+                    await self._frame
+                    continue
+                self.stream_stats.frame_sent(skipped=max(0, latest - version - 1) if version else 0)
+                version = latest
+                writer.write(chunk)
+                try:
+                    await asyncio.wait_for(writer.drain(), self.stall_timeout_s)
+                except asyncio.TimeoutError:
+                    self._dropped += 1
+                    return
+                if min_interval:
+                    await asyncio.sleep(min_interval)
+        finally:
+            self.stream_stats.client_left()
+            self.live_state.unsubscribe(variant)
+
+    def stats(self) -> dict:
+        return dict(
+            self.stream_stats.snapshot(),
+            server="asyncio",
+            max_clients=self.max_clients,
+            variants=self.live_state.variant_stats(),
+            dropped_stalled=self._dropped,
+        )
@@ -0,0 +1,142 @@
+"""
+Batched assessment upload
+
+Packs several spooled assessments into one multipart request:
+
+  manifest            JSON {"items": [{"id", "student_id", "device_id",
+                      "model_version", "notes", "metrics_json",
+                      "image_original", "image_heatmap"}, ...]}
+                      where image_* name a file part of the same request
+  <id>.original       JPEG part per item
+  <id>.heatmap        JPEG part per item
+
+The backend answers with per-item results
+``{"results": [{"id", "status", "error"?}, ...]}`` so one bad item does not
+fail the batch.  Batches are bounded by item count and payload bytes.  A 404
+from the batch endpoint means the backend predates it: the uploader reports
+"unsupported" and callers fall back to one request per assessment, probing
+again after ``reprobe_s``.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class BatchEntry:
+    id: str
+    fields: dict                      # student_id, device_id, model_version, notes, metrics_json
+    image_original: bytes
+    image_heatmap: Optional[bytes] = None
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.image_original) + len(self.image_heatmap or b"") + len(json.dumps(self.fields))
+
+
+@dataclass
+class ItemResult:
+    id: str
+    ok: bool
+    status: Optional[int] = None
+    error: Optional[str] = None
+    body: dict = field(default_factory=dict)
+
+
+def pack_batches(items: Iterable[T], size_of: Callable[[T], int], max_items: int, max_bytes: int) -> List[List[T]]:
+    """Greedy in-order packing; an item larger than ``max_bytes`` travels alone."""
+    batches: List[List[T]] = []
+    current: List[T] = []
+    current_bytes = 0
+    for item in items:
+        size = size_of(item)
+        if current and (len(current) >= max_items or current_bytes + size > max_bytes):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(item)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+class BatchUnsupported(Exception):
+    pass
+
+
+class BatchUploader:
+    def __init__(self, client, endpoint: str, *, reprobe_s: float = 3600.0):
+        self.client = client
+        self.endpoint = endpoint
+        self.reprobe_s = float(reprobe_s)
+        self._unsupported_until = 0.0
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items_ok = 0
+        self._items_failed = 0
+        self._fallbacks = 0
+
+    def available(self) -> bool:
+        return time.time() >= self._unsupported_until
+
+    def send(self, entries: Sequence[BatchEntry]) -> List[ItemResult]:
+        """Upload one batch.  Raises BatchUnsupported on 404; transport errors propagate."""
+        manifest = []
+        files = []
+        for e in entries:
+            item = dict(e.fields)
+            item["id"] = e.id
+            item["image_original"] = f"{e.id}.original"
+            files.append((item["image_original"], (f"{e.id}_original.jpg", e.image_original, "image/jpeg")))
+            if e.image_heatmap is not None:
+                item["image_heatmap"] = f"{e.id}.heatmap"
+                files.append((item["image_heatmap"], (f"{e.id}_heatmap.jpg", e.image_heatmap, "image/jpeg")))
+            manifest.append(item)
+
+        response = self.client.post(
+            self.endpoint,
+            endpoint="batch_upload",
+            data={"manifest": json.dumps({"items": manifest})},
+            files=files,
+        )
+        if response.status_code in (404, 405):
+            with self._lock:
+                self._unsupported_until = time.time() + self.reprobe_s
+                self._fallbacks += 1
+            raise BatchUnsupported(f"batch endpoint returned {response.status_code}")
+        if response.status_code >= 300:
+            raise RuntimeError(f"batch upload failed: {response.status_code} {response.text[:200]}")
+
+        by_id = {str(r.get("id")): r for r in (response.json().get("results") or [])}
+        results = []
+        for e in entries:
+            r = by_id.get(e.id)
+            if r is None:
+                results.append(ItemResult(e.id, False, error="missing from response"))
+                continue
+            status = r.get("status")
+            ok = isinstance(status, int) and 200 <= status < 300
+            results.append(ItemResult(e.id, ok, status=status, error=r.get("error"), body=r))
+
+        with self._lock:
+            self._batches += 1
+            self._items_ok += sum(1 for r in results if r.ok)
+            self._items_failed += sum(1 for r in results if not r.ok)
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "available": self.available(),
+                "batches": self._batches,
+                "items_ok": self._items_ok,
+                "items_failed": self._items_failed,
+                "fallbacks": self._fallbacks,
+            }
@@ -1,22 +1,42 @@
 from __future__ import annotations
 
+import bisect
 import json
 import os
 import shutil
+import threading
 import time
 import uuid
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2
+import numpy as np
 
 
 @dataclass(frozen=True)
 class BufferedItem:
     dir_path: Path
 
+    @property
+    def bundle_id(self) -> str:
+        return self.dir_path.name
+
+    # Spool-agnostic accessors (segment_spool.SpoolItem has the same ones)
+    def read_original(self) -> bytes:
+        return self.original_path.read_bytes()
+
+    def read_heatmap(self) -> Optional[bytes]:
+        return self.heatmap_path.read_bytes() if self.heatmap_path.exists() else None
+
+    def read_metrics(self) -> dict:
+        return json.loads(self.metrics_path.read_text(encoding="utf-8"))
+
+    def read_meta(self) -> dict:
+        return json.loads(self.meta_path.read_text(encoding="utf-8"))
+
     @property
     def metrics_path(self) -> Path:
         return self.dir_path / "metrics.json"
@@ -33,6 +53,144 @@ class BufferedItem:
     def meta_path(self) -> Path:
         return self.dir_path / "meta.json"
 
+    @property
+    def created_at(self) -> float:
+        """Epoch seconds the bundle was spooled (from its id; directory mtime as fallback)."""
+        try:
+            ts = datetime.strptime(self.dir_path.name.split("_", 1)[0], "%Y%m%dT%H%M%SZ")
+            return ts.replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            try:
+                return self.dir_path.stat().st_mtime
+            except OSError:
+                return time.time()
+
+
+class CorruptBundle(ValueError):
+    """A buffered bundle whose files cannot be replayed (truncated or garbled on disk)."""
+
+
+def check_jpeg(data: bytes, name: str) -> bytes:
+    """``data`` if it is a complete JPEG (SOI marker first, EOI marker last), else CorruptBundle."""
+    if len(data) < 4 or data[:2] != b"\xff\xd8" or data.rstrip(b"\x00")[-2:] != b"\xff\xd9":
+        raise CorruptBundle(f"{name}: not a complete JPEG ({len(data)} bytes)")
+    return data
+
+
+QUARANTINE_DIR = "quarantine"   # unreplayable bundles, kept for inspection, never retried
+QUARANTINE_KEEP = 20
+
+FULL = "full"          # images as spooled
+COMPACT = "compact"    # heatmap downscaled or dropped; original and metrics untouched
+COMPACT_MARKER = ".compact"
+
+
+def _insert_sorted(ids: List[str], bundle_id: str) -> None:
+    # New bundles carry the newest timestamp, so this is almost always an append
+    if not ids or bundle_id > ids[-1]:
+        ids.append(bundle_id)
+    else:
+        bisect.insort(ids, bundle_id)
+
+
+def _remove_sorted(ids: List[str], bundle_id: str) -> None:
+    i = bisect.bisect_left(ids, bundle_id)
+    if i < len(ids) and ids[i] == bundle_id:
+        del ids[i]
+
+
+class BundleIndex:
+    """Bundle ids in spool order with their on-disk sizes, retention tier and running totals.
+
+    Ids start with the UTC spool timestamp, so sorted order is oldest first.
+    Not thread-safe on its own; LocalBuffer holds its lock around every call.
+    """
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._sizes: Dict[str, int] = {}
+        self._tiers: Dict[str, str] = {}
+        self._tier_ids: Dict[str, List[str]] = {}       # tier → its bundle ids, sorted (oldest first)
+        self._tier_totals: Dict[str, List[int]] = {}    # tier → [count, bytes]
+        self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, bundle_id: str) -> bool:
+        return bundle_id in self._sizes
+
+    def add(
+        self, bundle_id: str, size: int, created_at: Optional[float] = None, priority: int = 0, tier: str = FULL,
+    ) -> None:
+        if bundle_id in self._sizes:
+            self.remove(bundle_id)
+        _insert_sorted(self._ids, bundle_id)
+        self._sizes[bundle_id] = size
+        self.total_bytes += size
+        self._tiers[bundle_id] = tier
+        _insert_sorted(self._tier_ids.setdefault(tier, []), bundle_id)
+        self._count_tier(tier, 1, size)
+
+    def remove(self, bundle_id: str) -> Optional[int]:
+        size = self._sizes.pop(bundle_id, None)
+        if size is None:
+            return None
+        _remove_sorted(self._ids, bundle_id)
+        self.total_bytes -= size
+        tier = self._tiers.pop(bundle_id)
+        _remove_sorted(self._tier_ids[tier], bundle_id)
+        self._count_tier(tier, -1, -size)
+        return size
+
+    def _count_tier(self, tier: str, count: int, size: int) -> None:
+        totals = self._tier_totals.setdefault(tier, [0, 0])
+        totals[0] += count
+        totals[1] += size
+
+    def set_tier(self, bundle_id: str, tier: str, size: int) -> None:
+        old_size = self._sizes.get(bundle_id)
+        if old_size is None:
+            return
+        old_tier = self._tiers[bundle_id]
+        self._count_tier(old_tier, -1, -old_size)
+        if tier != old_tier:
+            _remove_sorted(self._tier_ids[old_tier], bundle_id)
+            _insert_sorted(self._tier_ids.setdefault(tier, []), bundle_id)
+        self._tiers[bundle_id] = tier
+        self._sizes[bundle_id] = size
+        self.total_bytes += size - old_size
+        self._count_tier(tier, 1, size)
+
+    def oldest_in_tier(self, tier: str) -> Optional[str]:
+        ids = self._tier_ids.get(tier)
+        return ids[0] if ids else None
+
+    def tier_stats(self) -> Dict[str, dict]:
+        return {tier: {"count": c, "bytes": b} for tier, (c, b) in self._tier_totals.items() if c}
+
+    def size(self, bundle_id: str) -> Optional[int]:
+        return self._sizes.get(bundle_id)
+
+    def oldest(self) -> Optional[str]:
+        return self._ids[0] if self._ids else None
+
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    # No retry metadata in memory: every bundle is always due, oldest first
+    def begin(self, bundle_id: str, created_at: Optional[float] = None, priority: int = 0) -> None:
+        pass
+
+    def ready(self, now: float, limit: Optional[int] = None) -> List[str]:
+        return self._ids[:limit] if limit is not None else list(self._ids)
+
+    def record_attempt(self, bundle_id: str, error: Optional[str], next_retry: float = 0.0) -> None:
+        pass
+
+    def attempts(self, bundle_id: str) -> int:
+        return 0
+
 
 class LocalBuffer:
     """Disk-backed spool for assessments when server is offline.
@@ -44,12 +202,93 @@ class LocalBuffer:
           image_heatmap.jpg
           metrics.json
           meta.json
+        quarantine/            bundles that could not be replayed (newest few kept)
+
+    The directory tree is walked once at startup to build an in-memory
+    ``BundleIndex``; afterwards enqueue / delete keep it current, so
+    listing, pruning and stats never touch the filesystem.
+
+    With ``index="sqlite"`` the index persists in ``spool.db`` (see
+    spool_index) and also carries priority, attempt count, next-retry time
+    and last error per bundle; the tree is walked only on first use.
+
+    Retention is tiered.  Above ``soft_limit_bytes`` a background compactor
+    (``start_compactor``) shrinks the oldest full bundles: the heatmap is
+    re-encoded at ``compact_width`` px / ``compact_quality``, or dropped when
+    it is just a copy of the original.  Originals and metrics are never
+    touched.  Only above ``max_bytes`` are whole bundles deleted, oldest first.
     """
 
-    def __init__(self, buffer_root: str, max_bytes: int = 2 * 1024 * 1024 * 1024):
+    def __init__(
+        self,
+        buffer_root: str,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        *,
+        index: str = "memory",
+        retry_base_s: float = 30.0,
+        retry_max_s: float = 3600.0,
+        soft_limit_bytes: Optional[int] = None,
+        compact_width: int = 320,
+        compact_quality: int = 60,
+    ):
         self.root = Path(buffer_root)
         self.max_bytes = int(max_bytes)
+        self.soft_limit_bytes = int(soft_limit_bytes) if soft_limit_bytes else int(self.max_bytes * 0.75)
+        self.compact_width = int(compact_width)
+        self.compact_quality = int(compact_quality)
+        self.retry_base_s = float(retry_base_s)
+        self.retry_max_s = float(retry_max_s)
         self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._compact_wake = threading.Event()
+        self._compact_stop = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        self._compacted = 0
+        self._compact_failed = 0
+        self._pruned = 0
+        self._quarantined = 0
+        self.index_kind = index
+        if index == "sqlite":
+            from .spool_index import SqliteBundleIndex
+
+            self._index = SqliteBundleIndex(str(self.root / "spool.db"))
+            if self._index.needs_import:
+                self._rebuild_index()
+                self._index.mark_imported()
+            else:
+                self._recover_unfinished()
+        elif index == "memory":
+            self._index = BundleIndex()
+            self._rebuild_index()
+        else:
+            raise ValueError(f"Unknown buffer index: {index!r} (expected 'memory' or 'sqlite')")
+
+    def _rebuild_index(self) -> None:
+        """Index existing bundles; drop ``.tmp`` leftovers of an interrupted enqueue."""
+        with self._lock:
+            for p in self.root.iterdir():
+                if not p.is_dir():
+                    continue
+                if p.name.endswith(".tmp"):
+                    shutil.rmtree(p, ignore_errors=True)
+                    continue
+                if p.name == QUARANTINE_DIR:
+                    continue
+                if p.name not in self._index:
+                    tier = COMPACT if (p / COMPACT_MARKER).exists() else FULL
+                    self._index.add(p.name, self._dir_size_bytes(p), created_at=BufferedItem(p).created_at, tier=tier)
+
+    def _recover_unfinished(self) -> None:
+        """Settle bundles the index saw start but not finish (no tree walk)."""
+        with self._lock:
+            for bundle_id in self._index.unfinished():
+                final_dir = self.root / bundle_id
+                if final_dir.is_dir():
+                    # Renamed into place, crashed before the index update
+                    self._index.add(bundle_id, self._dir_size_bytes(final_dir))
+                else:
+                    shutil.rmtree(self.root / (bundle_id + ".tmp"), ignore_errors=True)
+                    self._index.remove(bundle_id)
 
     def _dir_size_bytes(self, path: Path) -> int:
         total = 0
@@ -62,80 +301,252 @@ class LocalBuffer:
         return total
 
     def _total_size_bytes(self) -> int:
-        total = 0
-        for p in self.root.glob("*"):
-            if p.is_dir():
-                total += self._dir_size_bytes(p)
-        return total
+        with self._lock:
+            return self._index.total_bytes
 
     def _prune_if_needed(self) -> None:
-        total = self._total_size_bytes()
-        if total <= self.max_bytes:
+        # Hard limit: delete oldest bundles first, whatever their tier
+        while True:
+            with self._lock:
+                if self._index.total_bytes <= self.max_bytes or not len(self._index):
+                    break
+                oldest = self._index.oldest()
+                self._index.remove(oldest)
+                self._pruned += 1
+            shutil.rmtree(self.root / oldest, ignore_errors=True)
+        # Soft limit: let the compactor shrink old bundles before the hard limit is reached
+        if self._total_size_bytes() > self.soft_limit_bytes:
+            self._compact_wake.set()
+
+    # ── tiered retention ─────────────────────────────────────────────────
+
+    def start_compactor(self, interval_s: float = 60.0) -> None:
+        if self._compactor is not None:
             return
 
-        # Delete oldest bundles first
-        dirs = sorted([p for p in self.root.glob("*") if p.is_dir()], key=lambda p: p.name)
-        for d in dirs:
+        def loop():
+            while not self._compact_stop.is_set():
+                try:
+                    self.compact_until_soft_limit()
+                except Exception:
+                    pass
+                self._compact_wake.wait(interval_s)
+                self._compact_wake.clear()
+
+        self._compactor = threading.Thread(target=loop, name="buffer-compactor", daemon=True)
+        self._compactor.start()
+
+    def compact_until_soft_limit(self) -> int:
+        """Compact oldest full bundles until under the soft limit (or none are left). Returns bundles compacted."""
+        done = 0
+        while not self._compact_stop.is_set():
+            with self._lock:
+                if self._index.total_bytes <= self.soft_limit_bytes:
+                    break
+                bundle_id = self._index.oldest_in_tier(FULL)
+            if bundle_id is None:
+                break
+            if self._compact_bundle(bundle_id):
+                done += 1
+            else:
+                self._skip_compaction(bundle_id)
+        return done
+
+    def _skip_compaction(self, bundle_id: str) -> None:
+        # Unreadable now, unreadable on the next wake: take it out of the FULL tier as it is
+        # so the next-oldest bundle gets compacted.  Replay validates (and quarantines) it.
+        with self._lock:
+            size = self._index.size(bundle_id)
+            if size is None:
+                return   # delivered or pruned meanwhile
+            self._index.set_tier(bundle_id, COMPACT, size)
+            self._compact_failed += 1
+        try:
+            (self.root / bundle_id / COMPACT_MARKER).touch()
+        except OSError:
+            pass
+
+    def _compact_bundle(self, bundle_id: str) -> bool:
+        bundle_dir = self.root / bundle_id
+        item = BufferedItem(bundle_dir)
+        try:
+            original = item.read_original()
+            heatmap = item.read_heatmap()
+            # Decode / resize / encode outside the lock; only the file swap needs it
+            small = None
+            if heatmap is not None and heatmap != original:
+                small = self._shrink(heatmap)
+        except Exception:
+            return False
+
+        with self._lock:
+            if bundle_id not in self._index:
+                return True  # delivered or pruned meanwhile
             try:
-                shutil.rmtree(d, ignore_errors=True)
-            except Exception:
-                pass
-            total = self._total_size_bytes()
-            if total <= self.max_bytes:
-                return
+                if heatmap is not None and heatmap == original:
+                    item.heatmap_path.unlink()   # replay sends the original in its place
+                elif small is not None and len(small) < len(heatmap):
+                    tmp = bundle_dir / "image_heatmap.jpg.tmp"
+                    tmp.write_bytes(small)
+                    os.replace(str(tmp), str(item.heatmap_path))
+                (bundle_dir / COMPACT_MARKER).touch()
+                size = self._dir_size_bytes(bundle_dir)
+            except OSError:
+                return False
+            self._index.set_tier(bundle_id, COMPACT, size)
+            self._compacted += 1
+        return True
+
+    def _shrink(self, jpeg: bytes) -> Optional[bytes]:
+        image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        h, w = image.shape[:2]
+        if w > self.compact_width:
+            image = cv2.resize(image, (self.compact_width, max(1, h * self.compact_width // w)), interpolation=cv2.INTER_AREA)
+        return self._encode(image, self.compact_quality)
 
     def enqueue(
         self,
         *,
-        image_bgr,
-        heatmap_bgr,
+        image_bgr=None,
+        heatmap_bgr=None,
         metrics_json: dict,
         meta: dict,
         jpeg_quality: int = 85,
+        image_jpeg: Optional[bytes] = None,
+        heatmap_jpeg: Optional[bytes] = None,
+        priority: int = 0,
     ) -> BufferedItem:
+        """Spool one assessment. Pass ``*_jpeg`` bytes to store already-encoded images as-is.
+
+        ``priority`` orders the drain (lower first) when the index supports it.
+        """
         ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
         bundle_id = f"{ts}_{uuid.uuid4().hex[:10]}"
         bundle_dir = self.root / bundle_id
         tmp_dir = self.root / (bundle_id + ".tmp")
 
+        with self._lock:
+            self._index.begin(bundle_id, priority=priority)
         tmp_dir.mkdir(parents=True, exist_ok=True)
 
-        # Write images
-        ok1, buf1 = cv2.imencode(
-            ".jpg", image_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
-        )
-        ok2, buf2 = cv2.imencode(
-            ".jpg", heatmap_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
-        )
-        if not ok1 or not ok2:
-            raise RuntimeError("Failed to JPEG-encode buffered images")
+        # Write images (encode only what the caller didn't hand over as JPEG bytes)
+        image_jpeg = image_jpeg if image_jpeg is not None else self._encode(image_bgr, jpeg_quality)
+        heatmap_jpeg = heatmap_jpeg if heatmap_jpeg is not None else self._encode(heatmap_bgr, jpeg_quality)
+
+        metrics_bytes = json.dumps(metrics_json).encode("utf-8")
+        meta_bytes = json.dumps(meta).encode("utf-8")
 
-        (tmp_dir / "image_original.jpg").write_bytes(buf1.tobytes())
-        (tmp_dir / "image_heatmap.jpg").write_bytes(buf2.tobytes())
+        (tmp_dir / "image_original.jpg").write_bytes(image_jpeg)
+        (tmp_dir / "image_heatmap.jpg").write_bytes(heatmap_jpeg)
 
-        (tmp_dir / "metrics.json").write_text(json.dumps(metrics_json), encoding="utf-8")
-        (tmp_dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        (tmp_dir / "metrics.json").write_bytes(metrics_bytes)
+        (tmp_dir / "meta.json").write_bytes(meta_bytes)
 
         # Atomic rename
         os.replace(str(tmp_dir), str(bundle_dir))
 
+        size = len(image_jpeg) + len(heatmap_jpeg) + len(metrics_bytes) + len(meta_bytes)
+        with self._lock:
+            self._index.add(bundle_id, size, priority=priority)
         self._prune_if_needed()
         return BufferedItem(bundle_dir)
 
+    @staticmethod
+    def _encode(image_bgr, jpeg_quality: int) -> bytes:
+        if image_bgr is None:
+            raise ValueError("enqueue() needs either an image or its JPEG bytes")
+        ok, buf = cv2.imencode(".jpg", image_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)])
+        if not ok:
+            raise RuntimeError("Failed to JPEG-encode buffered images")
+        return buf.tobytes()
+
     def list_pending(self) -> list[BufferedItem]:
-        items = []
-        for p in sorted(self.root.glob("*") , key=lambda x: x.name):
-            if p.is_dir() and not p.name.endswith(".tmp"):
-                items.append(BufferedItem(p))
-        return items
+        with self._lock:
+            ids = self._index.ids()
+        return [BufferedItem(self.root / bundle_id) for bundle_id in ids]
+
+    def backlog(self) -> Tuple[int, Optional[float]]:
+        """(bundles buffered, created_at of the oldest) straight from the index."""
+        with self._lock:
+            count, oldest = len(self._index), self._index.oldest()
+        return count, BufferedItem(self.root / oldest).created_at if oldest else None
+
+    def list_ready(self, limit: Optional[int] = None) -> list[BufferedItem]:
+        """Bundles due for delivery now, in drain order (priority, then age)."""
+        with self._lock:
+            ids = self._index.ready(time.time(), limit)
+        return [BufferedItem(self.root / bundle_id) for bundle_id in ids]
+
+    def record_failure(self, item: BufferedItem, error: str, *, retry_later: bool = True) -> None:
+        """Count a failed delivery; ``retry_later`` holds the bundle back with exponential backoff.
+
+        Transport failures pass ``retry_later=False``: the circuit breaker
+        already paces those, and the bundle should go as soon as the link is back.
+        """
+        bundle_id = item.dir_path.name
+        with self._lock:
+            next_retry = 0.0
+            if retry_later:
+                attempts = self._index.attempts(bundle_id) + 1
+                next_retry = time.time() + min(self.retry_max_s, self.retry_base_s * 2 ** min(attempts - 1, 20))
+            self._index.record_attempt(bundle_id, error, next_retry)
+
+    def quarantine(self, item: BufferedItem, reason: str) -> None:
+        """Take an unreplayable bundle out of the spool into ``quarantine/`` (newest ``QUARANTINE_KEEP`` kept)."""
+        bundle_id = item.dir_path.name
+        with self._lock:
+            self._index.remove(bundle_id)
+            self._quarantined += 1
+        target = self.root / QUARANTINE_DIR
+        try:
+            target.mkdir(exist_ok=True)
+            os.replace(str(item.dir_path), str(target / bundle_id))
+            (target / bundle_id / "quarantine_reason.txt").write_text(reason, encoding="utf-8")
+            for old in sorted(p for p in target.iterdir() if p.is_dir())[:-QUARANTINE_KEEP]:
+                shutil.rmtree(old, ignore_errors=True)
+        except OSError:
+            shutil.rmtree(item.dir_path, ignore_errors=True)
+
+    def size_of(self, item: BufferedItem) -> int:
+        """Indexed byte size of a bundle (0 if it is no longer buffered)."""
+        with self._lock:
+            return self._index.size(item.dir_path.name) or 0
 
     def delete(self, item: BufferedItem) -> None:
+        with self._lock:
+            self._index.remove(item.dir_path.name)
         shutil.rmtree(item.dir_path, ignore_errors=True)
 
     def stats(self) -> dict:
-        return {
+        with self._lock:
+            count, total = len(self._index), self._index.total_bytes
+            retry = self._index.retry_stats(time.time()) if self.index_kind == "sqlite" else None
+            tiers = self._index.tier_stats()
+        stats = {
             "root": str(self.root),
-            "count": len(self.list_pending()),
-            "bytes": self._total_size_bytes(),
+            "index": self.index_kind,
+            "count": count,
+            "bytes": total,
+            "soft_limit_bytes": self.soft_limit_bytes,
             "max_bytes": self.max_bytes,
+            "tiers": tiers,
+            "compacted": self._compacted,
+            "compact_failed": self._compact_failed,
+            "pruned": self._pruned,
+            "quarantined": self._quarantined,
         }
+        if retry is not None:
+            stats["waiting_retry"], stats["max_attempts"], stats["last_error"] = retry
+        return stats
+
+    def close(self) -> None:
+        self._compact_stop.set()
+        self._compact_wake.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=2.0)
+            self._compactor = None
+        if self.index_kind == "sqlite":
+            with self._lock:
+                self._index.close()
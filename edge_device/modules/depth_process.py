@@ -0,0 +1,318 @@
+"""
+Out-of-process depth stage
+
+Runs rectify → SGBM → reprojection → WeldFeatureExtractor → colormap in a
+separate Python process so the NumPy-heavy work does not compete for the
+GIL with inference dispatch, uploads and the stream server.
+
+Frames and results are exchanged through a ring of
+``multiprocessing.shared_memory`` slots.  Only small control tuples
+(job id, slot index, ROI, feature dict) travel over the pipes; the image
+and disparity arrays are never pickled.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .telemetry import REGISTRY, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class SharedFrameRing:
+    """Fixed ring of shared-memory slots sized for one stereo pair.
+
+    Slot layout (contiguous, one SharedMemory block per slot):
+        left  (H, W, 3) uint8
+        right (H, W, 3) uint8
+        disp  (H, W)    float32
+        heat  (H, W, 3) uint8
+    """
+
+    def __init__(self, height: int, width: int, slots: int = 3, names: Optional[List[str]] = None):
+        self.height = int(height)
+        self.width = int(width)
+        self._owner = names is None
+
+        px = self.height * self.width
+        self._offsets = {
+            "left": (0, (self.height, self.width, 3), np.uint8),
+            "right": (px * 3, (self.height, self.width, 3), np.uint8),
+            "disp": (px * 6, (self.height, self.width), np.float32),
+            "heat": (px * 10, (self.height, self.width, 3), np.uint8),
+        }
+        self.slot_bytes = px * 13
+
+        self._shms: List[shared_memory.SharedMemory] = []
+        if names is None:
+            for _ in range(int(slots)):
+                self._shms.append(shared_memory.SharedMemory(create=True, size=self.slot_bytes))
+        else:
+            for name in names:
+                self._shms.append(_attach(name))
+
+    @property
+    def names(self) -> List[str]:
+        return [shm.name for shm in self._shms]
+
+    def __len__(self) -> int:
+        return len(self._shms)
+
+    def view(self, slot: int, field: str) -> np.ndarray:
+        offset, shape, dtype = self._offsets[field]
+        return np.ndarray(shape, dtype=dtype, buffer=self._shms[slot].buf, offset=offset)
+
+    def close(self) -> None:
+        for shm in self._shms:
+            try:
+                shm.close()
+                if self._owner:
+                    shm.unlink()
+            except Exception:
+                pass
+        self._shms = []
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # The parent owns (and unlinks) every segment.  A spawned child shares the
+    # parent's resource tracker, so its registration is the parent's one: it
+    # must not unregister (the parent's unlink would then hit a KeyError in the
+    # tracker), and registering the same name again is a no-op.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(req_q, res_q, calib, focal_length_px, baseline_mm, with_features):
+    """Child-process loop: one depth job per request, results written back into the slot."""
+    from modules.stereo_depth import StereoDepthEstimator, WeldFeatureExtractor, depth_to_colormap
+
+    estimator = StereoDepthEstimator(calib)
+    extractor = WeldFeatureExtractor(focal_length_px=focal_length_px, baseline_mm=baseline_mm) if with_features else None
+    ring: Optional[SharedFrameRing] = None
+
+    while True:
+        msg = req_q.get()
+        if msg is None:
+            break
+        kind = msg[0]
+
+        if kind == "ring":
+            _, names, height, width = msg
+            if ring is not None:
+                ring.close()
+            ring = SharedFrameRing(height, width, names=names)
+            continue
+
+        if kind == "calib":
+            estimator = StereoDepthEstimator(msg[1])
+            continue
+
+        _, job_id, slot, roi = msg
+        try:
+            left = ring.view(slot, "left")
+            right = ring.view(slot, "right")
+            left_rect, right_rect = estimator.rectify(left, right)
+            disp = estimator.disparity(left_rect, right_rect)
+            Z = estimator.depth_map(disp)
+            ring.view(slot, "disp")[...] = disp
+
+            geo = None
+            if extractor is not None:
+                with STAGE_SECONDS.time(stage="features"):
+                    geo = extractor.extract_features(Z, roi)
+                    geo.update(extractor.score_weld(geo))
+
+            ring.view(slot, "heat")[...] = depth_to_colormap(disp)
+            # Stage timings observed in this process are forwarded to the parent's registry
+            res_q.put((job_id, {"ok": True, "geometric_metrics": geo, "histograms": REGISTRY.export_histograms()}))
+        except Exception as e:
+            res_q.put((job_id, {"ok": False, "error": str(e)}))
+
+    if ring is not None:
+        ring.close()
+
+
+class DepthProcessClient:
+    """Parent-side handle for the depth worker process.
+
+    ``submit(left, right, roi)`` copies the pair into a free ring slot and
+    returns a Future resolving to ``{'disp', 'depth_heat', 'geometric_metrics'}``.
+    Submission blocks while every slot is in flight, for at most
+    ``slot_timeout_s``; it raises RuntimeError then, or as soon as the worker
+    process is found dead, so the caller can run the depth stage in-process.
+    """
+
+    def __init__(
+        self,
+        calib,
+        *,
+        focal_length_px: float = 800.0,
+        baseline_mm: float = 65.0,
+        with_features: bool = True,
+        slots: int = 3,
+        slot_timeout_s: float = 10.0,
+    ):
+        self._calib = calib
+        self._focal_length_px = float(focal_length_px)
+        self._baseline_mm = float(baseline_mm)
+        self._with_features = bool(with_features)
+        self._slots = max(1, int(slots))
+        self.slot_timeout_s = float(slot_timeout_s)
+
+        # spawn: never fork a process that already runs camera / BPU threads
+        self._ctx = mp.get_context("spawn")
+        self._req_q = None
+        self._res_q = None
+        self._proc = None
+        self._reader: Optional[threading.Thread] = None
+
+        self._lock = threading.Lock()
+        self._ring: Optional[SharedFrameRing] = None
+        self._free: "queue.Queue[int]" = queue.Queue()
+        self._pending: dict = {}
+        self._job_ids = itertools.count(1)
+
+    def start(self) -> None:
+        if self._proc is not None:
+            return
+        self._req_q = self._ctx.Queue()
+        self._res_q = self._ctx.Queue()
+        self._proc = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                self._req_q,
+                self._res_q,
+                self._calib,
+                self._focal_length_px,
+                self._baseline_mm,
+                self._with_features,
+            ),
+            name="depth-worker",
+            daemon=True,
+        )
+        self._proc.start()
+        self._reader = threading.Thread(target=self._read_results, name="depth-results", daemon=True)
+        self._reader.start()
+        logger.info(f"Depth worker process started (pid={self._proc.pid}, slots={self._slots})")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if self._proc is None:
+            return
+        try:
+            self._req_q.put(None)
+            self._proc.join(timeout=timeout)
+            if self._proc.is_alive():
+                self._proc.terminate()
+        except Exception:
+            pass
+        try:
+            self._res_q.put(None)
+        except Exception:
+            pass
+        with self._lock:
+            for fut, _ in self._pending.values():
+                fut.cancel()
+            self._pending.clear()
+            if self._ring is not None:
+                self._ring.close()
+                self._ring = None
+        self._proc = None
+
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.is_alive()
+
+    def reload_calibration(self, calib) -> None:
+        self._calib = calib
+        if self._req_q is not None:
+            self._req_q.put(("calib", calib))
+
+    def _ensure_ring(self, height: int, width: int) -> SharedFrameRing:
+        with self._lock:
+            ring = self._ring
+            if ring is not None and (ring.height, ring.width) == (height, width):
+                return ring
+            if self._pending:
+                raise RuntimeError("Frame size changed while depth jobs are in flight")
+            if ring is not None:
+                ring.close()
+            ring = SharedFrameRing(height, width, slots=self._slots)
+            self._ring = ring
+            self._free = queue.Queue()
+            for i in range(len(ring)):
+                self._free.put(i)
+            self._req_q.put(("ring", ring.names, height, width))
+        return ring
+
+    def submit(self, left: np.ndarray, right: np.ndarray, roi: Tuple[int, int, int, int]) -> Future:
+        if not self.is_alive():
+            raise RuntimeError("Depth worker process is not running")
+        if left.shape != right.shape or left.ndim != 3 or left.shape[2] != 3:
+            raise ValueError(f"Unsupported stereo pair shapes {left.shape} / {right.shape}")
+
+        h, w = left.shape[:2]
+        ring = self._ensure_ring(h, w)
+        slot = self._acquire_slot()
+        np.copyto(ring.view(slot, "left"), left)
+        np.copyto(ring.view(slot, "right"), right)
+
+        fut: Future = Future()
+        job_id = next(self._job_ids)
+        with self._lock:
+            self._pending[job_id] = (fut, slot)
+        self._req_q.put(("job", job_id, slot, tuple(int(v) for v in roi)))
+        return fut
+
+    def _acquire_slot(self) -> int:
+        # A hung or dead worker never frees its slots: don't wait for it forever
+        deadline = time.monotonic() + self.slot_timeout_s
+        while True:
+            try:
+                return self._free.get(timeout=max(0.0, min(0.5, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+            if not self.is_alive():
+                raise RuntimeError("Depth worker process exited")
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"No free depth slot within {self.slot_timeout_s:g}s; depth worker stuck")
+
+    def _read_results(self) -> None:
+        while True:
+            try:
+                msg = self._res_q.get()
+            except (EOFError, OSError):
+                return
+            if msg is None:
+                return
+            job_id, payload = msg
+            with self._lock:
+                fut, slot = self._pending.pop(job_id, (None, None))
+                ring = self._ring
+            REGISTRY.merge_histograms(payload.get("histograms"))
+            if fut is None:
+                continue
+            try:
+                if not payload.get("ok"):
+                    fut.set_exception(RuntimeError(payload.get("error", "depth worker failed")))
+                else:
+                    result = {
+                        "disp": np.array(ring.view(slot, "disp")),
+                        "depth_heat": np.array(ring.view(slot, "heat")),
+                    }
+                    if payload.get("geometric_metrics") is not None:
+                        result["geometric_metrics"] = payload["geometric_metrics"]
+                    fut.set_result(result)
+            finally:
+                self._free.put(slot)
@@ -0,0 +1,281 @@
+"""
+Buffer drain engine
+
+Replays the LocalBuffer backlog to the backend on its own thread:
+
+- bounded parallelism: up to ``parallelism`` units (a single bundle or a
+  batch) in flight at once;
+- exponential backoff with jitter after a failed pass;
+- a shared ``CircuitBreaker``: after ``failure_threshold`` consecutive
+  transport failures it opens, and callers (including the live upload
+  path) skip the network until the reset timeout lets one probe through.
+
+Only bundles the buffer reports as due (``list_ready``) are sent; undelivered
+bundles are reported back through ``record_failure`` so a buffer with retry
+metadata can hold rejected ones back.  Bundles that cannot be read locally
+are the send function's business (it quarantines them); they say nothing
+about the link, so they never touch the breaker.  Stats report backlog size, age of the
+oldest bundle and the recent drain rate.
+"""
+
+from __future__ import annotations
+
+import collections
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Backoff:
+    """Exponential delay with equal jitter: attempt n waits in [d/2, d], d = min(max_s, base_s * 2**(n-1))."""
+
+    def __init__(self, base_s: float = 1.0, max_s: float = 300.0, rng: Optional[random.Random] = None):
+        self.base_s = float(base_s)
+        self.max_s = float(max_s)
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        if attempt <= 0:
+            return 0.0
+        d = min(self.max_s, self.base_s * (2 ** min(attempt - 1, 30)))
+        return d / 2.0 + self._rng.uniform(0.0, d / 2.0)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, reset_backoff: Optional[Backoff] = None):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_backoff = reset_backoff or Backoff(base_s=15.0, max_s=300.0)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opens = 0              # consecutive opens without a success; drives the reset backoff
+        self._open_until = 0.0
+        self._probe_inflight = False
+        self._short_circuited = 0
+        self._trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.time() >= self._open_until:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """May a request go out now?  In half-open state only one probe is let through."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.time() >= self._open_until:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probe_inflight:
+                self._probe_inflight = True
+                return True
+            self._short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._opens = 0
+            self._probe_inflight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_inflight = False
+            if self._state == OPEN:
+                return  # a request that was already in flight when the breaker tripped
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opens += 1
+                self._trips += 1
+                self._state = OPEN
+                self._open_until = time.time() + self.reset_backoff.delay(self._opens)
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.time())
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "trips": self._trips,
+                "short_circuited": self._short_circuited,
+                "retry_in_s": round(max(0.0, self._open_until - time.time()), 1) if state == OPEN else 0.0,
+            }
+
+
+# send(unit) -> (delivered items, transport_failed); transport_failed is None
+# when nothing reached the network (every item was unreadable and quarantined)
+SendFn = Callable[[Sequence], Tuple[List, Optional[bool]]]
+
+
+class DrainEngine:
+    def __init__(
+        self,
+        buffer,
+        send: SendFn,
+        *,
+        breaker: CircuitBreaker,
+        chunker: Optional[Callable[[list], List[list]]] = None,
+        parallelism: int = 2,
+        backoff: Optional[Backoff] = None,
+        idle_interval_s: float = 10.0,
+        rate_window_s: float = 60.0,
+    ):
+        self.buffer = buffer
+        self.send = send
+        self.breaker = breaker
+        self.chunker = chunker or (lambda items: [[item] for item in items])
+        self.parallelism = max(1, int(parallelism))
+        self.backoff = backoff or Backoff(base_s=2.0, max_s=120.0)
+        self.idle_interval_s = float(idle_interval_s)
+        self.rate_window_s = float(rate_window_s)
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        self._lock = threading.Lock()
+        self._delivered_at: collections.deque = collections.deque()
+        self._delivered_total = 0
+        self._failed_units = 0
+        self._backlog = 0
+        self._oldest_created_at: Optional[float] = None
+        self._consecutive_failed_passes = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._pool = ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="drain")
+        self._thread = threading.Thread(target=self._run, name="buffer-drain", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def notify(self) -> None:
+        """Drain now (e.g. a live upload just succeeded, so the backend is back)."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            _, failed = self.drain_once()
+            if failed:
+                self._consecutive_failed_passes += 1
+                delay = self.backoff.delay(self._consecutive_failed_passes)
+            else:
+                self._consecutive_failed_passes = 0
+                delay = self.idle_interval_s
+            delay = max(delay, self.breaker.retry_in())
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _observe_backlog(self) -> None:
+        # From the buffer's index: a count and the oldest bundle, not a listing
+        count, oldest = self.buffer.backlog()
+        with self._lock:
+            self._backlog = count
+            self._oldest_created_at = oldest
+
+    def drain_once(self) -> Tuple[int, bool]:
+        """One pass over the current backlog.  Returns (bundles delivered, a unit failed)."""
+        delivered_total = 0
+        attempted = set()
+        map_fn = self._pool.map if self._pool is not None else map
+
+        while not self._stop.is_set():
+            self._observe_backlog()
+            pending = [item for item in self.buffer.list_ready() if item not in attempted]
+            if not pending:
+                return delivered_total, False
+
+            wave = []
+            for unit in self.chunker(pending):
+                if len(wave) >= self.parallelism or not self.breaker.allow():
+                    break
+                wave.append(unit)
+                if self.breaker.state == HALF_OPEN:
+                    break  # single probe
+            if not wave:
+                return delivered_total, False
+            for unit in wave:
+                attempted.update(unit)
+
+            failed = False
+            for unit, (delivered, transport_failed) in zip(wave, map_fn(self._send_unit, wave)):
+                for item in delivered:
+                    self.buffer.delete(item)
+                self._record_undelivered(unit, delivered, transport_failed)
+                delivered_total += len(delivered)
+                self._record_delivered(len(delivered))
+                if transport_failed is None:
+                    continue   # no request went out: nothing to tell the breaker
+                if transport_failed:
+                    failed = True
+                    self.breaker.record_failure()
+                    with self._lock:
+                        self._failed_units += 1
+                else:
+                    self.breaker.record_success()
+            if failed:
+                return delivered_total, True
+        return delivered_total, False
+
+    def _record_undelivered(self, unit, delivered, transport_failed: bool) -> None:
+        # Rejected items back off individually; transport failures are paced by the breaker
+        done = set(delivered)
+        error = "transport error" if transport_failed else "rejected by backend"
+        for item in unit:
+            if item not in done:
+                self.buffer.record_failure(item, error, retry_later=not transport_failed)
+
+    def _send_unit(self, unit) -> Tuple[List, bool]:
+        try:
+            return self.send(unit)
+        except Exception:
+            return [], True
+
+    def _record_delivered(self, n: int) -> None:
+        if n <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._delivered_total += n
+            self._delivered_at.append((now, n))
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            while self._delivered_at and now - self._delivered_at[0][0] > self.rate_window_s:
+                self._delivered_at.popleft()
+            recent = sum(n for _, n in self._delivered_at)
+            return {
+                "backlog": self._backlog,
+                "backlog_age_s": round(now - self._oldest_created_at, 1) if self._oldest_created_at else 0.0,
+                "drain_rate_per_min": round(recent * 60.0 / self.rate_window_s, 1),
+                "delivered": self._delivered_total,
+                "failed_units": self._failed_units,
+                "parallelism": self.parallelism,
+                "breaker": self.breaker.stats(),
+            }
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+@dataclass(frozen=True)
+class QualityVerdict:
+    ok: bool
+    reason: Optional[str]
+    sharpness: float
+    glare_fraction: float
+    dark_fraction: float
+    roi_texture: float
+
+    def as_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "reason": self.reason,
+            "sharpness": round(self.sharpness, 2),
+            "glare_fraction": round(self.glare_fraction, 4),
+            "dark_fraction": round(self.dark_fraction, 4),
+            "roi_texture": round(self.roi_texture, 2),
+        }
+
+
+class FrameQualityGate:
+    """
+    Cheap pre-filter run on every captured frame before BPU/SGBM work.
+
+    All checks operate on a small luma image (default 320 px wide), so a
+    verdict costs well under a millisecond on the RDK X5 CPU:
+        glare        — fraction of clipped-white pixels (arc flash)
+        underexposed — fraction of clipped-black pixels
+        blur         — variance of the Laplacian (focus / motion blur)
+        no_workpiece — luma standard deviation inside the placement ROI
+    """
+
+    def __init__(
+        self,
+        *,
+        roi_pct: Tuple[float, float, float, float] = (0.08, 0.15, 0.84, 0.70),
+        downscale_width: int = 320,
+        min_sharpness: float = 30.0,
+        max_glare_fraction: float = 0.25,
+        max_dark_fraction: float = 0.50,
+        min_roi_texture: float = 6.0,
+    ):
+        self.roi_pct = roi_pct
+        self.downscale_width = max(32, int(downscale_width))
+        self.min_sharpness = float(min_sharpness)
+        self.max_glare_fraction = float(max_glare_fraction)
+        self.max_dark_fraction = float(max_dark_fraction)
+        self.min_roi_texture = float(min_roi_texture)
+
+        self._lock = threading.Lock()
+        self._evaluated = 0
+        self._accepted = 0
+        self._rejected_by_reason: dict = {}
+        self._last: Optional[QualityVerdict] = None
+
+    def _luma(self, image_bgr: np.ndarray) -> np.ndarray:
+        h, w = image_bgr.shape[:2]
+        if w > self.downscale_width:
+            scale = self.downscale_width / float(w)
+            image_bgr = cv2.resize(
+                image_bgr,
+                (self.downscale_width, max(1, int(h * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+        if image_bgr.ndim == 3:
+            return cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
+        return image_bgr
+
+    def evaluate(self, image_bgr: np.ndarray) -> QualityVerdict:
+        gray = self._luma(image_bgr)
+        total = float(gray.size) or 1.0
+
+        glare = np.count_nonzero(gray >= 250) / total
+        dark = np.count_nonzero(gray <= 5) / total
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+        h, w = gray.shape[:2]
+        x_pct, y_pct, w_pct, h_pct = self.roi_pct
+        x, y = int(x_pct * w), int(y_pct * h)
+        roi = gray[y : y + max(1, int(h_pct * h)), x : x + max(1, int(w_pct * w))]
+        texture = float(cv2.meanStdDev(roi)[1][0][0]) if roi.size else 0.0
+
+        reason = None
+        if glare > self.max_glare_fraction:
+            reason = "glare"
+        elif dark > self.max_dark_fraction:
+            reason = "underexposed"
+        elif sharpness < self.min_sharpness:
+            reason = "blur"
+        elif texture < self.min_roi_texture:
+            reason = "no_workpiece"
+
+        verdict = QualityVerdict(
+            ok=reason is None,
+            reason=reason,
+            sharpness=sharpness,
+            glare_fraction=glare,
+            dark_fraction=dark,
+            roi_texture=texture,
+        )
+
+        with self._lock:
+            self._evaluated += 1
+            if verdict.ok:
+                self._accepted += 1
+            else:
+                self._rejected_by_reason[reason] = self._rejected_by_reason.get(reason, 0) + 1
+            self._last = verdict
+        return verdict
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "evaluated": self._evaluated,
+                "accepted": self._accepted,
+                "rejected": self._evaluated - self._accepted,
+                "rejected_by_reason": dict(self._rejected_by_reason),
+                "last": self._last.as_dict() if self._last else None,
+            }
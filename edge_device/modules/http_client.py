@@ -0,0 +1,150 @@
+"""
+Pooled backend HTTP client
+
+One ``requests.Session`` shared by every backend call (assessment and
+training uploads, calibration fetch, deploy poll), so TLS connections to
+the Cloudflare Worker are kept alive and reused instead of re-handshaking
+per request.  Adds the ``Authorization`` header, applies a per-endpoint
+timeout and keeps per-endpoint latency stats plus pool-level connection
+reuse counts.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+from .telemetry import REGISTRY
+
+Timeout = Union[float, Tuple[float, float]]
+
+HTTP_SECONDS = REGISTRY.histogram(
+    "weldvision_http_request_seconds",
+    "Backend HTTP request latency in seconds.",
+    ("endpoint", "outcome"),
+)
+
+
+class BackendClient:
+    def __init__(
+        self,
+        base_url: str,
+        token: str = "",
+        *,
+        timeouts: Optional[Dict[str, Timeout]] = None,
+        default_timeout: Timeout = (3.05, 10.0),
+        pool_connections: int = 4,
+        pool_maxsize: int = 8,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.pool_connections = int(pool_connections)
+        self.pool_maxsize = int(pool_maxsize)
+
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, dict] = {}
+
+    @property
+    def session(self):
+        """The shared session, created (and ``requests`` imported) on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    if self.token:
+                        session.headers["Authorization"] = f"Bearer {self.token}"
+                    self._session = session
+        return self._session
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method: str, path: str, *, endpoint: str, timeout: Optional[Timeout] = None, **kwargs):
+        """Send one request; ``endpoint`` names the per-endpoint timeout and stats bucket."""
+        if timeout is None:
+            timeout = self.timeouts.get(endpoint, self.default_timeout)
+        t0 = time.perf_counter()
+        status = None
+        try:
+            response = self.session.request(method, self.url(path), timeout=timeout, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            self._observe(endpoint, time.perf_counter() - t0, status)
+
+    def get(self, path: str, *, endpoint: str, **kwargs):
+        return self.request("GET", path, endpoint=endpoint, **kwargs)
+
+    def post(self, path: str, *, endpoint: str, **kwargs):
+        return self.request("POST", path, endpoint=endpoint, **kwargs)
+
+    def _observe(self, endpoint: str, seconds: float, status: Optional[int]) -> None:
+        outcome = "error" if status is None else f"{status // 100}xx"
+        HTTP_SECONDS.observe(seconds, endpoint=endpoint, outcome=outcome)
+        ms = seconds * 1000.0
+        with self._lock:
+            s = self._endpoints.setdefault(endpoint, {
+                "requests": 0, "errors": 0, "latency_ms_total": 0.0, "latency_ms_max": 0.0, "last_status": None,
+            })
+            s["requests"] += 1
+            if status is None:
+                s["errors"] += 1
+            s["latency_ms_total"] += ms
+            s["latency_ms_max"] = max(s["latency_ms_max"], ms)
+            s["last_status"] = status
+
+    def _pool_counts(self) -> Tuple[int, int]:
+        """(connections opened, requests sent) summed over the live urllib3 pools."""
+        opened = sent = 0
+        if self._session is None:
+            return opened, sent
+        for adapter in set(self._session.adapters.values()):
+            manager = getattr(adapter, "poolmanager", None)
+            if manager is None:
+                continue
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is None:
+                    continue
+                opened += getattr(pool, "num_connections", 0)
+                sent += getattr(pool, "num_requests", 0)
+        return opened, sent
+
+    def stats(self) -> dict:
+        opened, sent = self._pool_counts()
+        with self._lock:
+            endpoints = {
+                name: {
+                    "requests": s["requests"],
+                    "errors": s["errors"],
+                    "latency_ms_avg": round(s["latency_ms_total"] / s["requests"], 1) if s["requests"] else 0.0,
+                    "latency_ms_max": round(s["latency_ms_max"], 1),
+                    "last_status": s["last_status"],
+                }
+                for name, s in self._endpoints.items()
+            }
+        return {
+            "connections_opened": opened,
+            "requests_sent": sent,
+            "connections_reused": max(0, sent - opened),
+            "endpoints": endpoints,
+        }
+
+    def close(self) -> None:
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
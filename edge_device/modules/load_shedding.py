@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional
+
+RUN = "run"
+DEFER = "deferred"
+SKIP = "skipped"
+
+
+@dataclass(frozen=True)
+class OptionalStage:
+    name: str
+    priority: int          # lower = more important; the scan runs its stages in this order
+    deferrable: bool = False
+
+
+@dataclass
+class ScanBudget:
+    started_at: float      # time.time() of capture
+    budget_ms: float
+    shed: Dict[str, str] = field(default_factory=dict)
+
+    def elapsed_ms(self) -> float:
+        return (time.time() - self.started_at) * 1000.0
+
+    def remaining_ms(self) -> float:
+        return self.budget_ms - self.elapsed_ms()
+
+
+class LoadShedder:
+    """Per-scan latency budget for the optional tail of the pipeline.
+
+    Each optional stage has a priority and an EWMA cost estimate learned from
+    previous scans.  Before a stage runs, the shedder checks that the time
+    left in the scan budget covers its estimated cost.  If not, the stage is
+    deferred to the background lane (when deferrable and the lane has room)
+    or skipped.  The scan runs its optional stages most important first, so
+    the less important ones are the ones left short of time.
+    A budget of 0 disables shedding.
+    """
+
+    def __init__(
+        self,
+        budget_ms: float,
+        stages: Iterable[OptionalStage],
+        *,
+        background=None,
+        safety_factor: float = 1.2,
+        ewma_alpha: float = 0.3,
+        on_stage_timed: Optional[Callable[[str, float], None]] = None,
+    ):
+        self.budget_ms = float(budget_ms)
+        self.stages = {s.name: s for s in stages}
+        self.background = background
+        self.safety_factor = float(safety_factor)
+        self._alpha = float(ewma_alpha)
+        self._on_stage_timed = on_stage_timed
+
+        self._lock = threading.Lock()
+        self._cost_ms: Dict[str, float] = {}
+        self._decisions: Dict[str, Dict[str, int]] = {
+            name: {RUN: 0, DEFER: 0, SKIP: 0} for name in self.stages
+        }
+        self._scans = 0
+        self._scans_shed = 0
+        self._scans_over_budget = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_ms > 0
+
+    def begin(self, started_at: Optional[float] = None) -> ScanBudget:
+        return ScanBudget(started_at=started_at or time.time(), budget_ms=self.budget_ms)
+
+    def finish(self, scan: ScanBudget) -> None:
+        with self._lock:
+            self._scans += 1
+            if scan.shed:
+                self._scans_shed += 1
+            if self.enabled and scan.remaining_ms() < 0:
+                self._scans_over_budget += 1
+
+    def plan(self, scan: ScanBudget, name: str) -> str:
+        stage = self.stages[name]
+        if not self.enabled:
+            return RUN
+
+        with self._lock:
+            cost = self._cost_ms.get(name, 0.0)
+
+        if scan.remaining_ms() >= cost * self.safety_factor:
+            return RUN
+        if stage.deferrable and self.background is not None and self.background.has_capacity():
+            return DEFER
+        return SKIP
+
+    def execute(self, scan: ScanBudget, name: str, fn: Callable, *args, **kwargs):
+        """Run, defer or skip one optional stage.  Returns (decision, result or None)."""
+        decision = self.plan(scan, name)
+        with self._lock:
+            self._decisions[name][decision] += 1
+
+        if decision == RUN:
+            return decision, self._timed(name, fn, *args, **kwargs)
+
+        scan.shed[name] = decision
+        if decision == DEFER:
+            self.background.submit(self._timed, name, fn, *args, **kwargs)
+        return decision, None
+
+    def _timed(self, name: str, fn: Callable, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            if self._on_stage_timed is not None:
+                self._on_stage_timed(name, elapsed_ms / 1000.0)
+            with self._lock:
+                prev = self._cost_ms.get(name)
+                self._cost_ms[name] = elapsed_ms if prev is None else prev + self._alpha * (elapsed_ms - prev)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "budget_ms": self.budget_ms,
+                "scans": self._scans,
+                "scans_shed": self._scans_shed,
+                "scans_over_budget": self._scans_over_budget,
+                "stage_cost_ms": {k: round(v, 2) for k, v in self._cost_ms.items()},
+                "decisions": {k: dict(v) for k, v in self._decisions.items()},
+            }
@@ -0,0 +1,141 @@
+"""
+Non-blocking logging
+
+Pipeline threads only put records on a bounded in-memory queue
+(``QueueHandler``); a single ``QueueListener`` thread does the console
+and file I/O, so a slow SD card stalls the listener, never the capture /
+process / upload workers.  A full queue drops records rather than block.
+``weldvision.log`` rotates by size.
+
+Repeated warnings from the same call site are rate-limited: at most
+``burst`` records per ``window_s``; the next record let through after a
+quiet period carries the count of those suppressed.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class RateLimitFilter(logging.Filter):
+    """Per call-site token window for WARNING and above (INFO/DEBUG pass through)."""
+
+    def __init__(self, window_s: float = 60.0, burst: int = 5, min_level: int = logging.WARNING):
+        super().__init__()
+        self.window_s = float(window_s)
+        self.burst = max(1, int(burst))
+        self.min_level = min_level
+        self._lock = threading.Lock()
+        # (pathname, lineno, levelno) -> [window_start, emitted_in_window, suppressed]
+        self._sites: Dict[Tuple[str, int, int], list] = {}
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or self.window_s <= 0:
+            return True
+
+        key = (record.pathname, record.lineno, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window_s:
+                suppressed = site[2] if site is not None else 0
+                self._sites[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} (suppressed {suppressed} similar in the last {self.window_s:.0f}s)"
+                return True
+            if site[1] < self.burst:
+                site[1] += 1
+                return True
+            site[2] += 1
+            self.suppressed_total += 1
+            return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full instead of blocking."""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_rate_filter: Optional[RateLimitFilter] = None
+
+
+def setup_logging(
+    log_path: Optional[str],
+    *,
+    level: int = logging.INFO,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    queue_size: int = 10000,
+    rate_window_s: float = 60.0,
+    rate_burst: int = 5,
+) -> logging.handlers.QueueListener:
+    """Route the root logger through a queue to rotating-file + stdout handlers (idempotent)."""
+    global _listener, _queue_handler, _rate_filter
+    if _listener is not None:
+        return _listener
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_path:
+        try:
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            handlers.insert(0, logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8',
+            ))
+        except Exception:
+            pass
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _rate_filter = RateLimitFilter(window_s=rate_window_s, burst=rate_burst)
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=max(1, int(queue_size))))
+    _queue_handler.addFilter(_rate_filter)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging() -> None:
+    """Drain the queue and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    return {
+        'queued': _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        'dropped': _queue_handler.dropped if _queue_handler is not None else 0,
+        'rate_limited': _rate_filter.suppressed_total if _rate_filter is not None else 0,
+    }
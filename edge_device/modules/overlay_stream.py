@@ -1,25 +1,201 @@
 from __future__ import annotations
 
+import ipaddress
 import json
 import threading
 import time
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+MJPEG_BOUNDARY = "frame"
+
+
+def is_loopback(host: str) -> bool:
+    """True for 127.0.0.0/8, ::1 and IPv4-mapped loopback; /debug/profile answers only these."""
+    try:
+        ip = ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        return False
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_loopback
+
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    """One multipart/x-mixed-replace part, ready to hand to a single write()."""
+    header = f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+    return b"".join((header.encode("ascii"), jpeg, b"\r\n"))
+
+
+# A variant is (width, quality); width 0 = the frame's own width
+Variant = Tuple[int, int]
+VARIANT_MIN_WIDTH = 160
+VARIANT_MAX_WIDTH = 3840
+
+
+def parse_variant(query: dict) -> Optional[Variant]:
+    """``?w=640&q=60`` → (640, 60); None for the default stream.
+
+    Width snaps to a multiple of 16 and quality to a multiple of 5, so
+    near-identical requests share one encode.  Raises ValueError on junk.
+    """
+    if "w" not in query and "q" not in query:
+        return None
+    width = int(query.get("w", ["0"])[0])
+    quality = int(query.get("q", ["70"])[0])
+    if width:
+        width = min(VARIANT_MAX_WIDTH, max(VARIANT_MIN_WIDTH, int(round(width / 16.0)) * 16))
+    quality = min(95, max(20, int(round(quality / 5.0)) * 5))
+    return width, quality
 
 
 class LiveState:
-    def __init__(self):
+    """Latest overlay frame + metrics.
+
+    Every ``update`` bumps ``version`` and wakes the stream handlers blocked
+    in ``wait_frame``; the multipart chunk is built once per frame, not once
+    per viewer.
+
+    Downscaled / re-compressed variants come from the ``encoder`` passed with
+    each frame.  A variant is encoded lazily, at most once per frame, and
+    only while some viewer is subscribed to it (at most ``max_variants`` at
+    a time); the chunk is cached here until the next frame.
+    """
+
+    def __init__(self, max_variants: int = 4):
         self._lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._lock)
         self._jpeg: Optional[bytes] = None
+        self._chunk: Optional[bytes] = None
+        self._encoder: Optional[Callable[[int, int], bytes]] = None
+        self._version = 0
         self._metrics: dict = {}
         self._extra: dict = {}
         self._updated_at = 0.0
+        self._listeners: list = []
+        self.max_variants = max(0, int(max_variants))
+        self._subscribers: Dict[Variant, int] = {}
+        self._variant_chunks: Dict[Variant, Tuple[int, bytes]] = {}   # variant → (version, chunk)
+        self._variant_locks: Dict[Variant, threading.Lock] = {}
+        self._variant_encodes: Dict[Variant, int] = {}
+
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """``callback(version)`` runs on the publishing thread after every frame; keep it cheap."""
+        with self._lock:
+            self._listeners.append(callback)
 
-    def update(self, *, jpeg_bytes: bytes, metrics: dict) -> None:
+    def remove_listener(self, callback: Callable[[int], None]) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def update(self, *, jpeg_bytes: bytes, metrics: dict, encoder: Optional[Callable[[int, int], bytes]] = None) -> None:
+        """Publish a frame; ``encoder(width, quality)`` returns JPEG bytes of this frame for variants."""
+        chunk = mjpeg_part(jpeg_bytes) if jpeg_bytes else None
         with self._lock:
             self._jpeg = jpeg_bytes
+            self._chunk = chunk
+            self._encoder = encoder
             self._metrics = metrics
             self._updated_at = time.time()
+            self._version += 1
+            version = self._version
+            listeners = list(self._listeners)
+            self._frame_ready.notify_all()
+        for callback in listeners:
+            callback(version)
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    # ── variants ─────────────────────────────────────────────────────────
+
+    def subscribe(self, variant: Optional[Variant]) -> bool:
+        """Register a viewer of ``variant``; False when ``max_variants`` others are already active."""
+        if variant is None:
+            return True
+        with self._lock:
+            if variant not in self._subscribers:
+                if len(self._subscribers) >= self.max_variants:
+                    return False
+                self._variant_locks[variant] = threading.Lock()
+            self._subscribers[variant] = self._subscribers.get(variant, 0) + 1
+            return True
+
+    def unsubscribe(self, variant: Optional[Variant]) -> None:
+        if variant is None:
+            return
+        with self._lock:
+            remaining = self._subscribers.get(variant, 0) - 1
+            if remaining > 0:
+                self._subscribers[variant] = remaining
+                return
+            self._subscribers.pop(variant, None)
+            self._variant_chunks.pop(variant, None)
+            self._variant_locks.pop(variant, None)
+
+    def encode_variant(self, variant: Variant) -> Tuple[int, Optional[bytes]]:
+        """(version, chunk) of the newest frame as ``variant``, encoding it if nobody has yet.
+
+        Blocking (runs the encoder); the caller must be subscribed.  Frames
+        published without an encoder fall back to the default chunk.
+        """
+        with self._lock:
+            version, encoder, default = self._version, self._encoder, self._chunk
+            lock = self._variant_locks.get(variant)
+        if encoder is None or lock is None:
+            return version, default
+
+        # Per-variant lock: viewers of the same variant wait for one encode
+        with lock:
+            with self._lock:
+                cached = self._variant_chunks.get(variant)
+            if cached is not None and cached[0] >= version:
+                return cached
+            chunk = mjpeg_part(encoder(*variant))
+            with self._lock:
+                if variant in self._subscribers:
+                    self._variant_chunks[variant] = (version, chunk)
+                    self._variant_encodes[variant] = self._variant_encodes.get(variant, 0) + 1
+        return version, chunk
+
+    def variant_stats(self) -> dict:
+        with self._lock:
+            return {
+                f"{w or 'full'}@q{q}": {"subscribers": n, "encodes": self._variant_encodes.get((w, q), 0)}
+                for (w, q), n in self._subscribers.items()
+            }
+
+    # ── frames ───────────────────────────────────────────────────────────
+
+    def latest_chunk(self, variant: Optional[Variant] = None) -> Tuple[int, Optional[bytes]]:
+        """Non-blocking: (version, chunk); for a variant not yet encoded for that version, chunk is None."""
+        with self._lock:
+            if variant is None or self._encoder is None:
+                return self._version, self._chunk
+            cached = self._variant_chunks.get(variant)
+            if cached is not None and cached[0] == self._version:
+                return cached
+            return self._version, None
+
+    def wait_frame(
+        self, after_version: int, timeout: Optional[float] = None, variant: Optional[Variant] = None,
+    ) -> Tuple[int, Optional[bytes]]:
+        """Block until a frame newer than ``after_version`` is published.
+
+        Returns (version, multipart chunk) of the *newest* frame, so a viewer
+        that fell behind skips straight to it; (after_version, None) on timeout.
+        """
+        with self._lock:
+            if not self._frame_ready.wait_for(lambda: self._version > after_version and self._chunk, timeout):
+                return after_version, None
+            if variant is None:
+                return self._version, self._chunk
+        return self.encode_variant(variant)
 
     def set_extra(self, extra: dict) -> None:
         with self._lock:
@@ -36,12 +212,24 @@ class _Handler(BaseHTTPRequestHandler):
     server_version = "WeldVisionStream/1.0"
 
     def do_GET(self):
+        # Named handler threads show up as such in /debug/profile output
+        threading.current_thread().name = f"HTTP {self.path.split('?', 1)[0]}"
+
         if self.path.startswith("/snapshot.jpg"):
             self._handle_snapshot()
             return
         if self.path.startswith("/metrics.json"):
             self._handle_metrics()
             return
+        if self.path.split("?", 1)[0] == "/metrics":
+            self._handle_prometheus()
+            return
+        if self.path.split("?", 1)[0] == "/ready":
+            self._handle_ready()
+            return
+        if self.path.startswith("/debug/profile"):
+            self._handle_profile()
+            return
         if self.path.startswith("/stream.mjpg"):
             self._handle_mjpeg()
             return
@@ -63,9 +251,12 @@ class _Handler(BaseHTTPRequestHandler):
     def _handle_index(self):
         body = (
             "WeldVision X5 Stream\n"
-            "- /stream.mjpg\n"
+            "- /stream.mjpg?w=640&q=60&fps=10 (all optional)\n"
             "- /snapshot.jpg\n"
             "- /metrics.json\n"
+            "- /metrics\n"
+            "- /ready\n"
+            "- /debug/profile?seconds=N&hz=M\n"
         ).encode("utf-8")
         self.send_response(200)
         self.send_header("Content-Type", "text/plain; charset=utf-8")
@@ -97,32 +288,164 @@ class _Handler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(body)
 
+    def _handle_prometheus(self):
+        registry = getattr(self.server, "registry", None)
+        if registry is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle_ready(self):
+        startup = getattr(self.server, "startup", None)
+        if startup is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        report = startup.snapshot()
+        body = json.dumps(report).encode("utf-8")
+        self.send_response(200 if report.get("ready") else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle_profile(self):
+        profiler = getattr(self.server, "profiler", None)
+        if profiler is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        # Unauthenticated and CPU-heavy: local callers only (ssh -L to reach it remotely)
+        if not is_loopback(self.client_address[0]):
+            self.send_response(403)
+            self.end_headers()
+            return
+
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            seconds = float(query.get("seconds", ["10"])[0])
+            hz = int(query.get("hz", ["100"])[0])
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        try:
+            body = profiler.profile(seconds, hz).encode("utf-8")
+        except RuntimeError as e:  # ProfilerBusy
+            body = f"{e}\n".encode("utf-8")
+            self.send_response(409)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def _handle_mjpeg(self):
-        boundary = "frame"
+        # Optional per-viewer pacing: ?fps=N caps this client below the pipeline rate
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            fps = float(query.get("fps", ["0"])[0])
+            variant = parse_variant(query)
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+        min_interval = 1.0 / fps if fps > 0 else 0.0
+        stats = self.server.stream_stats  # type: ignore[attr-defined]
+        if not self.live.subscribe(variant):
+            stats.client_rejected()
+            self.send_response(503)
+            self.send_header("Retry-After", "5")
+            self.end_headers()
+            return
+
         self.send_response(200)
-        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={boundary}")
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}")
         self.send_header("Cache-Control", "no-store")
         self.end_headers()
 
+        stats.client_joined()
+        version = 0
         try:
-            while True:
-                jpeg, _, _ = self.live.snapshot()
-                if jpeg:
-                    self.wfile.write(f"--{boundary}\r\n".encode("utf-8"))
-                    self.wfile.write(b"Content-Type: image/jpeg\r\n")
-                    self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode("utf-8"))
-                    self.wfile.write(jpeg)
-                    self.wfile.write(b"\r\n")
-                time.sleep(0.2)
+            while not self.server.stopping:  # type: ignore[attr-defined]
+                latest, chunk = self.live.wait_frame(version, timeout=1.0, variant=variant)
+                if chunk is None:
+                    continue
+                # Frames published while we were writing (or pacing) are never sent
+                stats.frame_sent(skipped=max(0, latest - version - 1) if version else 0)
+                version = latest
+                self.wfile.write(chunk)
+                if min_interval:
+                    time.sleep(min_interval)
         except Exception:
             return
+        finally:
+            stats.client_left()
+            self.live.unsubscribe(variant)
+
+
+class StreamStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clients = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.rejected = 0
+
+    def client_joined(self) -> None:
+        with self._lock:
+            self.clients += 1
+
+    def client_left(self) -> None:
+        with self._lock:
+            self.clients -= 1
+
+    def client_rejected(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def frame_sent(self, skipped: int = 0) -> None:
+        with self._lock:
+            self.frames_sent += 1
+            self.frames_skipped += skipped
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "clients": self.clients,
+                "frames_sent": self.frames_sent,
+                "frames_skipped": self.frames_skipped,
+                "rejected": self.rejected,
+            }
 
 
 class OverlayStreamServer:
-    def __init__(self, host: str, port: int, live_state: LiveState):
+    def __init__(self, host: str, port: int, live_state: LiveState, registry=None, profiler=None, startup=None):
         self.host = host
         self.port = port
         self.live_state = live_state
+        self.registry = registry
+        self.profiler = profiler
+        self.startup = startup
+        self.stream_stats = StreamStats()
         self._server: Optional[ThreadingHTTPServer] = None
         self._thread: Optional[threading.Thread] = None
 
@@ -132,17 +455,26 @@ class OverlayStreamServer:
 
         server = ThreadingHTTPServer((self.host, self.port), _Handler)
         server.live_state = self.live_state  # type: ignore[attr-defined]
+        server.registry = self.registry  # type: ignore[attr-defined]
+        server.profiler = self.profiler  # type: ignore[attr-defined]
+        server.startup = self.startup  # type: ignore[attr-defined]
+        server.stream_stats = self.stream_stats  # type: ignore[attr-defined]
+        server.stopping = False  # type: ignore[attr-defined]
         self._server = server
 
         def _run():
             server.serve_forever(poll_interval=0.5)
 
-        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread = threading.Thread(target=_run, name="OverlayStreamServer", daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
         if not self._server:
             return
+        self._server.stopping = True  # type: ignore[attr-defined]  # stream handlers exit within wait_frame's timeout
         self._server.shutdown()
         self._server.server_close()
         self._server = None
+
+    def stats(self) -> dict:
+        return dict(self.stream_stats.snapshot(), server="threaded", variants=self.live_state.variant_stats())
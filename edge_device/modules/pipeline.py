@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+
+class StageExecutor:
+    """Long-lived worker thread for one pipeline stage, fed by a bounded queue.
+
+    ``submit()`` blocks while the queue is full, so a slow stage applies
+    back-pressure to the dispatcher instead of accumulating frames.
+    Each job returns a ``concurrent.futures.Future``.
+    """
+
+    def __init__(self, name: str, max_queue: int = 2, ewma_alpha: float = 0.2):
+        self.name = name
+        self._q: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._alpha = float(ewma_alpha)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._lock = threading.Lock()
+        self._processed = 0
+        self._failed = 0
+        self._busy = False
+        self._service_ms_avg = 0.0
+        self._service_ms_last = 0.0
+        self._service_ms_max = 0.0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def has_capacity(self) -> bool:
+        return not self._q.full()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        fut: Future = Future()
+        while True:
+            if self._stop.is_set():
+                fut.cancel()
+                return fut
+            try:
+                self._q.put((fut, fn, args, kwargs), timeout=0.5)
+                return fut
+            except queue.Full:
+                continue
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                fut, fn, args, kwargs = self._q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if not fut.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                self._busy = True
+            t0 = time.perf_counter()
+            failed = False
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                failed = True
+                fut.set_exception(e)
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+
+            with self._lock:
+                self._busy = False
+                self._processed += 1
+                if failed:
+                    self._failed += 1
+                self._service_ms_last = elapsed_ms
+                self._service_ms_max = max(self._service_ms_max, elapsed_ms)
+                if self._processed == 1:
+                    self._service_ms_avg = elapsed_ms
+                else:
+                    self._service_ms_avg += self._alpha * (elapsed_ms - self._service_ms_avg)
+
+        # Release anyone still waiting on queued work
+        while True:
+            try:
+                fut, _, _, _ = self._q.get_nowait()
+            except queue.Empty:
+                break
+            fut.cancel()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "queue_depth": self._q.qsize(),
+                "queue_max": self._q.maxsize,
+                "busy": self._busy,
+                "processed": self._processed,
+                "failed": self._failed,
+                "service_ms_avg": round(self._service_ms_avg, 2),
+                "service_ms_last": round(self._service_ms_last, 2),
+                "service_ms_max": round(self._service_ms_max, 2),
+            }
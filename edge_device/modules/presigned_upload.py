@@ -0,0 +1,146 @@
+"""
+Two-phase (presigned) assessment upload
+
+Images go straight to object storage instead of through the Worker's
+multipart handler:
+
+  1. POST <upload endpoint>/presign   {"device_id", "parts": [{"name",
+     "content_type", "size"}, ...]}
+     → {"upload_id", "parts": {name: {"key", "url", "headers"?}}}
+  2. PUT each image to its presigned URL, in parallel, without the backend
+     bearer token (the URL carries the signature)
+  3. POST <upload endpoint>/commit    the assessment fields plus
+     ``upload_id`` and ``<part name>_key`` for every image
+     → 201 {"id", "message"}, same as the multipart endpoint
+
+A 404/405 from the presign endpoint means the backend predates it: the
+uploader reports "unsupported" and callers keep using the multipart
+upload, probing again after ``reprobe_s``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Optional, Tuple
+
+
+class PresignUnsupported(Exception):
+    pass
+
+
+class PresignedUploadFailed(RuntimeError):
+    """A phase got an error response; ``status`` is its HTTP status (None for a malformed grant)."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class PresignedUploader:
+    def __init__(
+        self,
+        client,
+        storage_client,
+        presign_path: str,
+        commit_path: str,
+        *,
+        scheduler=None,
+        parallelism: int = 2,
+        reprobe_s: float = 3600.0,
+    ):
+        self.client = client                  # backend API (bearer token)
+        self.storage_client = storage_client  # object storage (no token; URLs are absolute and signed)
+        self.presign_path = presign_path
+        self.commit_path = commit_path
+        self.scheduler = scheduler
+        self.reprobe_s = float(reprobe_s)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(parallelism)), thread_name_prefix="object-put")
+        self._unsupported_until = 0.0
+        self._lock = threading.Lock()
+        self._uploads = 0
+        self._failed = 0
+        self._fallbacks = 0
+        self._bytes_put = 0
+
+    def available(self) -> bool:
+        return time.time() >= self._unsupported_until
+
+    def upload(self, fields: dict, parts: Dict[str, Tuple[bytes, str]], *, priority: int = 0):
+        """Run all three phases; returns the commit response.
+
+        ``parts`` maps form name → (bytes, content type).  Raises
+        PresignUnsupported on 404, PresignedUploadFailed on an error response
+        from the presign endpoint or object storage; transport errors propagate.
+        """
+        presign = self.client.post(
+            self.presign_path,
+            endpoint="presign",
+            json={
+                "device_id": fields.get("device_id"),
+                "parts": [{"name": name, "content_type": ctype, "size": len(data)} for name, (data, ctype) in parts.items()],
+            },
+        )
+        if presign.status_code in (404, 405):
+            with self._lock:
+                self._unsupported_until = time.time() + self.reprobe_s
+                self._fallbacks += 1
+            raise PresignUnsupported(f"presign endpoint returned {presign.status_code}")
+        if presign.status_code >= 300:
+            raise PresignedUploadFailed(f"presign failed: {presign.status_code} {presign.text[:200]}", presign.status_code)
+
+        grant = presign.json()
+        targets = grant.get("parts") or {}
+        missing = [name for name in parts if name not in targets]
+        if missing:
+            raise PresignedUploadFailed(f"presign response lacks parts: {missing}")
+
+        futures = [
+            self._pool.submit(self._put, targets[name], data, ctype, priority)
+            for name, (data, ctype) in parts.items()
+        ]
+        try:
+            for f in futures:
+                f.result()
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+
+        body = dict(fields)
+        body["upload_id"] = grant.get("upload_id")
+        for name in parts:
+            body[f"{name}_key"] = targets[name]["key"]
+        response = self.client.post(self.commit_path, endpoint="commit", json=body)
+        with self._lock:
+            if response.status_code < 300:
+                self._uploads += 1
+            else:
+                self._failed += 1
+        return response
+
+    def _put(self, target: dict, data: bytes, content_type: str, priority: int) -> None:
+        headers = {"Content-Type": content_type}
+        headers.update(target.get("headers") or {})
+        transfer = self.scheduler.transfer(priority, len(data)) if self.scheduler is not None else nullcontext()
+        with transfer:
+            response = self.storage_client.request("PUT", target["url"], endpoint="object_put", data=data, headers=headers)
+        if response.status_code >= 300:
+            raise PresignedUploadFailed(f"object PUT failed: {response.status_code} {response.text[:200]}", response.status_code)
+        with self._lock:
+            self._bytes_put += len(data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "available": self.available(),
+                "uploads": self._uploads,
+                "failed": self._failed,
+                "fallbacks": self._fallbacks,
+                "bytes_put": self._bytes_put,
+            }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
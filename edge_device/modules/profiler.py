@@ -0,0 +1,86 @@
+"""
+On-demand stack sampler
+
+Periodically snapshots every Python thread's stack via
+``sys._current_frames()`` for a fixed window and aggregates the samples
+into collapsed-stack lines ("thread;outer;...;inner count"), the input
+format of flamegraph.pl / speedscope / inferno.  Nothing runs between
+requests, so an idle sampler costs nothing.
+"""
+
+from __future__ import annotations
+
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, max_seconds: float = 60.0, max_hz: int = 1000):
+        self.max_seconds = float(max_seconds)
+        self.max_hz = int(max_hz)
+        self._busy = threading.Lock()
+
+    def sample(self, seconds: float, hz: int = 100) -> Dict[str, int]:
+        """Sample all threads (except the caller) for ``seconds`` at ``hz``; returns stack → count."""
+        seconds = min(max(float(seconds), 0.01), self.max_seconds)
+        hz = min(max(int(hz), 1), self.max_hz)
+        if not self._busy.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already being collected")
+
+        try:
+            me = threading.get_ident()
+            interval = 1.0 / hz
+            counts: Dict[str, int] = collections.Counter()
+            names: Dict[int, str] = {}
+            deadline = time.perf_counter() + seconds
+            next_tick = time.perf_counter()
+
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+
+                frames = sys._current_frames()
+                if any(tid not in names for tid in frames):
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                for tid, frame in frames.items():
+                    if tid == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stack.append(names.get(tid, f"thread-{tid}").replace(" ", "_"))
+                    counts[";".join(reversed(stack))] += 1
+                del frames
+
+                next_tick += interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()  # fell behind; don't burst
+            return dict(counts)
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    def collapsed(counts: Dict[str, int]) -> str:
+        lines = [f"{stack} {n}" for stack, n in sorted(counts.items(), key=lambda kv: -kv[1])]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def profile(self, seconds: float, hz: Optional[int] = None) -> str:
+        return self.collapsed(self.sample(seconds, hz or 100))
@@ -0,0 +1,422 @@
+"""
+Append-only segment spool
+
+SD-card friendly alternative to LocalBuffer's directory-per-bundle layout
+(``WELDVISION_BUFFER_MODE=segments``).  Bundles are appended as records to
+rotating segment files; deliveries are appended to an ack log; a segment
+is deleted as a whole once every bundle in it is acknowledged.
+
+  buffer_root/
+    seg_00000001.log     record, record, ...   (rotated at ``segment_bytes``)
+    seg_00000002.log
+    acks.log             one delivered bundle id per line
+    quarantine/          header + reason of bundles that could not be replayed
+
+Record:  b"WVS1" | u32 body length | u32 crc32(body) | body
+Body:    u32 header length | header JSON | original JPEG | heatmap JPEG
+Header:  {"id", "created_at", "priority", "metrics", "meta",
+          "original_len", "heatmap_len"}
+
+Writes are flushed per record but fsync'd at most every ``fsync_interval_s``
+(and on rotate / close); a background flusher syncs whatever is still
+unsynced once the interval has passed, so a power cut loses at most that
+window even if no further write comes.  On startup a torn tail of the
+active (last) segment is truncated at the last good record; a corrupt
+range inside a sealed segment is skipped up to the next record ``MAGIC``,
+so one bad sector does not take every later record with it.
+The enqueue / list_pending / list_ready / delete / quarantine / stats API matches
+LocalBuffer, and ``SpoolItem`` has the same ``read_*`` accessors as
+``BufferedItem``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+MAGIC = b"WVS1"
+_RECORD = struct.Struct("<4sII")
+_HEADER_LEN = struct.Struct("<I")
+QUARANTINE_DIR = "quarantine"   # as LocalBuffer's
+QUARANTINE_KEEP = 20
+
+
+@dataclass(frozen=True)
+class SpoolItem:
+    bundle_id: str
+    segment: int
+    offset: int           # of the record body inside the segment file
+    header_len: int
+    original_len: int
+    heatmap_len: int
+    created_at: float
+    size: int
+    header: dict = field(compare=False, hash=False, repr=False)
+    spool: "SegmentSpool" = field(compare=False, hash=False, repr=False)
+
+    def _read(self, start: int, length: int) -> bytes:
+        with open(self.spool.segment_path(self.segment), "rb") as fh:
+            fh.seek(self.offset + start)
+            data = fh.read(length)
+        if len(data) != length:
+            raise OSError(f"short read from segment {self.segment}")
+        return data
+
+    def read_original(self) -> bytes:
+        return self._read(_HEADER_LEN.size + self.header_len, self.original_len)
+
+    def read_heatmap(self) -> Optional[bytes]:
+        if not self.heatmap_len:
+            return None
+        return self._read(_HEADER_LEN.size + self.header_len + self.original_len, self.heatmap_len)
+
+    def read_metrics(self) -> dict:
+        return self.header.get("metrics") or {}
+
+    def read_meta(self) -> dict:
+        return self.header.get("meta") or {}
+
+
+class SegmentSpool:
+    def __init__(
+        self,
+        buffer_root: str,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        *,
+        segment_bytes: int = 16 * 1024 * 1024,
+        fsync_interval_s: float = 1.0,
+    ):
+        self.root = Path(buffer_root)
+        self.max_bytes = int(max_bytes)
+        self.segment_bytes = int(segment_bytes)
+        self.fsync_interval_s = float(fsync_interval_s)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._items: Dict[str, SpoolItem] = {}
+        self._live: Dict[int, Set[str]] = {}          # segment → unacknowledged bundle ids
+        self._ids: Dict[int, Set[str]] = {}           # segment → every bundle id written to it
+        self._segment_sizes: Dict[int, int] = {}
+        self._active: Optional[int] = None
+        self._fh = None
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self._acks_fh = None
+        self._acks_written = 0
+        self._segments_dropped = 0
+        self._pruned = 0
+        self._quarantined = 0
+        self._corrupt_ranges = 0
+        self._flush_stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        self._recover()
+        if self.fsync_interval_s > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="spool-flusher", daemon=True)
+            self._flusher.start()
+
+    # ── layout ───────────────────────────────────────────────────────────
+
+    def segment_path(self, seq: int) -> Path:
+        return self.root / f"seg_{seq:08d}.log"
+
+    @property
+    def _acks_path(self) -> Path:
+        return self.root / "acks.log"
+
+    # ── startup ──────────────────────────────────────────────────────────
+
+    def _recover(self) -> None:
+        acked: Set[str] = set()
+        if self._acks_path.exists():
+            acked = {line.strip() for line in self._acks_path.read_text(encoding="utf-8").splitlines() if line.strip()}
+
+        seqs = sorted(int(p.stem.split("_", 1)[1]) for p in self.root.glob("seg_*.log"))
+        for seq in seqs:
+            live = set()
+            ids = set()
+            for item in self._scan_segment(seq, active=seq == seqs[-1]):
+                ids.add(item.bundle_id)
+                if item.bundle_id not in acked:
+                    self._items[item.bundle_id] = item
+                    live.add(item.bundle_id)
+            self._segment_sizes[seq] = self.segment_path(seq).stat().st_size
+            self._live[seq] = live
+            self._ids[seq] = ids
+
+        for seq in seqs[:-1]:
+            if not self._live[seq]:
+                self._drop_segment(seq)
+
+        # Keep only acks that still matter, then append from here on
+        self._rewrite_acks(self._acked_on_disk())
+        self._open_active(seqs[-1] if seqs else 1)
+
+    def _acked_on_disk(self) -> Set[str]:
+        """Acknowledged ids whose records are still in a segment — the acks worth keeping."""
+        return {i for seq, ids in self._ids.items() for i in ids if i not in self._live.get(seq, ())}
+
+    def _scan_segment(self, seq: int, active: bool) -> List[SpoolItem]:
+        """Parse a segment, skipping corrupt ranges; only the active segment's torn tail is cut off."""
+        path = self.segment_path(seq)
+        items = []
+        good = 0
+        with open(path, "rb") as fh:
+            data = fh.read()
+        pos = 0
+        in_corrupt = False
+        while pos + _RECORD.size <= len(data):
+            magic, body_len, crc = _RECORD.unpack_from(data, pos)
+            body_at = pos + _RECORD.size
+            body = data[body_at:body_at + body_len]
+            if magic != MAGIC or len(body) != body_len or zlib.crc32(body) != crc:
+                # Resync on the next record; the CRC rejects a MAGIC that is really image bytes
+                in_corrupt = True
+                pos = data.find(MAGIC, pos + 1)
+                if pos < 0:
+                    break
+                continue
+            if in_corrupt:
+                self._corrupt_ranges += 1   # left in place; the segment goes once its records are acked
+                in_corrupt = False
+            (header_len,) = _HEADER_LEN.unpack_from(body, 0)
+            header = json.loads(body[_HEADER_LEN.size:_HEADER_LEN.size + header_len])
+            items.append(self._item(seq, body_at, header_len, header, body_len))
+            pos = good = body_at + body_len
+        if good < len(data):
+            if active:
+                with open(path, "r+b") as fh:
+                    fh.truncate(good)   # a write cut short by the power going: append after the last good record
+            else:
+                self._corrupt_ranges += 1
+        return items
+
+    def _item(self, seq: int, offset: int, header_len: int, header: dict, body_len: int) -> SpoolItem:
+        return SpoolItem(
+            bundle_id=header["id"],
+            segment=seq,
+            offset=offset,
+            header_len=header_len,
+            original_len=int(header.get("original_len", 0)),
+            heatmap_len=int(header.get("heatmap_len", 0)),
+            created_at=float(header.get("created_at", 0.0)),
+            size=_RECORD.size + body_len,
+            header=header,
+            spool=self,
+        )
+
+    def _rewrite_acks(self, ids: Set[str]) -> None:
+        if self._acks_fh is not None:
+            self._acks_fh.close()
+        tmp = self._acks_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.writelines(f"{i}\n" for i in sorted(ids))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._acks_path)
+        self._acks_written = len(ids)
+        self._acks_fh = open(self._acks_path, "a", encoding="utf-8")
+
+    def _open_active(self, seq: int) -> None:
+        self._active = seq
+        self._fh = open(self.segment_path(seq), "ab")
+        self._segment_sizes.setdefault(seq, self._fh.tell())
+        self._live.setdefault(seq, set())
+        self._ids.setdefault(seq, set())
+
+    # ── write path ───────────────────────────────────────────────────────
+
+    def _sync(self, force: bool = False) -> None:
+        if not self._dirty:
+            return
+        if force or time.monotonic() - self._last_fsync >= self.fsync_interval_s:
+            os.fsync(self._fh.fileno())
+            self._acks_fh.flush()
+            os.fsync(self._acks_fh.fileno())
+            self._last_fsync = time.monotonic()
+            self._dirty = False
+
+    def _flush_loop(self) -> None:
+        # Syncs the last write of a burst, which no later write would have synced
+        while not self._flush_stop.wait(self.fsync_interval_s):
+            with self._lock:
+                if self._fh is not None:
+                    self._sync(force=True)
+
+    def _rotate(self) -> None:
+        self._sync(force=True)
+        self._fh.close()
+        previous = self._active
+        self._open_active(previous + 1)
+        if not self._live.get(previous):
+            self._drop_segment(previous)
+
+    def enqueue(
+        self,
+        *,
+        image_bgr=None,
+        heatmap_bgr=None,
+        metrics_json: dict,
+        meta: dict,
+        jpeg_quality: int = 85,
+        image_jpeg: Optional[bytes] = None,
+        heatmap_jpeg: Optional[bytes] = None,
+        priority: int = 0,
+    ) -> SpoolItem:
+        """Append one assessment (same arguments as ``LocalBuffer.enqueue``)."""
+        from .buffering import LocalBuffer
+
+        image_jpeg = image_jpeg if image_jpeg is not None else LocalBuffer._encode(image_bgr, jpeg_quality)
+        heatmap_jpeg = heatmap_jpeg if heatmap_jpeg is not None else LocalBuffer._encode(heatmap_bgr, jpeg_quality)
+
+        now = time.time()
+        bundle_id = f"{datetime.fromtimestamp(now, tz=timezone.utc).strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex[:10]}"
+        header = {
+            "id": bundle_id,
+            "created_at": now,
+            "priority": int(priority),
+            "metrics": metrics_json,
+            "meta": meta,
+            "original_len": len(image_jpeg),
+            "heatmap_len": len(heatmap_jpeg),
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+        body = b"".join((_HEADER_LEN.pack(len(header_bytes)), header_bytes, image_jpeg, heatmap_jpeg))
+        record = _RECORD.pack(MAGIC, len(body), zlib.crc32(body)) + body
+
+        with self._lock:
+            if self._segment_sizes[self._active] and self._segment_sizes[self._active] + len(record) > self.segment_bytes:
+                self._rotate()
+            offset = self._segment_sizes[self._active]
+            self._fh.write(record)
+            self._fh.flush()
+            self._dirty = True
+            self._sync()
+            self._segment_sizes[self._active] = offset + len(record)
+            item = self._item(self._active, offset + _RECORD.size, len(header_bytes), header, len(body))
+            self._items[bundle_id] = item
+            self._live[self._active].add(bundle_id)
+            self._ids[self._active].add(bundle_id)
+            self._prune_if_needed()
+        return item
+
+    def _prune_if_needed(self) -> None:
+        """Over ``max_bytes``: drop whole segments, oldest first (never the active one)."""
+        while sum(self._segment_sizes.values()) > self.max_bytes:
+            sealed = sorted(seq for seq in self._segment_sizes if seq != self._active)
+            if not sealed:
+                return
+            seq = sealed[0]
+            self._pruned += len(self._live.get(seq, ()))
+            self._drop_segment(seq)
+
+    def _drop_segment(self, seq: int) -> None:
+        for bundle_id in self._live.pop(seq, set()):
+            self._items.pop(bundle_id, None)
+        self._ids.pop(seq, None)
+        self._segment_sizes.pop(seq, None)
+        try:
+            self.segment_path(seq).unlink()
+        except FileNotFoundError:
+            pass
+        self._segments_dropped += 1
+
+    # ── read / acknowledge ───────────────────────────────────────────────
+
+    def list_pending(self) -> List[SpoolItem]:
+        with self._lock:
+            return sorted(self._items.values(), key=lambda i: (i.segment, i.offset))   # append order
+
+    def backlog(self) -> Tuple[int, Optional[float]]:
+        """(bundles pending, created_at of the oldest); ``_items`` is kept in append order."""
+        with self._lock:
+            oldest = next(iter(self._items.values()), None)
+            return len(self._items), oldest.created_at if oldest is not None else None
+
+    def list_ready(self, limit: Optional[int] = None) -> List[SpoolItem]:
+        with self._lock:
+            items = sorted(self._items.values(), key=lambda i: (i.header.get("priority", 0), i.segment, i.offset))
+        return items[:limit] if limit is not None else items
+
+    def size_of(self, item: SpoolItem) -> int:
+        """Byte size of a bundle (0 if it is no longer buffered)."""
+        with self._lock:
+            return item.size if item.bundle_id in self._items else 0
+
+    def record_failure(self, item: SpoolItem, error: str, *, retry_later: bool = True) -> None:
+        pass  # no per-bundle retry metadata in this mode
+
+    def quarantine(self, item: SpoolItem, reason: str) -> None:
+        """Acknowledge an unreplayable bundle without delivering it; its header and the reason go to ``quarantine/``."""
+        target = self.root / QUARANTINE_DIR
+        try:
+            target.mkdir(exist_ok=True)
+            record = {"bundle_id": item.bundle_id, "segment": item.segment, "reason": reason, "header": item.header}
+            (target / f"{item.bundle_id}.json").write_text(json.dumps(record), encoding="utf-8")
+            for old in sorted(target.glob("*.json"))[:-QUARANTINE_KEEP]:
+                old.unlink()
+        except OSError:
+            pass
+        with self._lock:
+            self._quarantined += 1
+        self.delete(item)
+
+    def delete(self, item: SpoolItem) -> None:
+        """Acknowledge a delivered bundle; its segment goes once nothing in it is pending."""
+        with self._lock:
+            if self._items.pop(item.bundle_id, None) is None:
+                return
+            self._acks_fh.write(f"{item.bundle_id}\n")
+            self._acks_written += 1
+            self._dirty = True
+            live = self._live.get(item.segment)
+            if live is not None:
+                live.discard(item.bundle_id)
+                if not live and item.segment != self._active:
+                    self._drop_segment(item.segment)
+            self._sync()
+            # Acks for dropped segments are dead weight; compact once they dominate the log
+            if self._acks_written > 1000:
+                keep = self._acked_on_disk()
+                if self._acks_written > 2 * len(keep):
+                    self._sync(force=True)
+                    self._rewrite_acks(keep)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "index": "segments",
+                "count": len(self._items),
+                "bytes": sum(self._segment_sizes.values()),
+                "live_bytes": sum(i.size for i in self._items.values()),
+                "max_bytes": self.max_bytes,
+                "segments": len(self._segment_sizes),
+                "segments_dropped": self._segments_dropped,
+                "pruned": self._pruned,
+                "quarantined": self._quarantined,
+                "corrupt_ranges": self._corrupt_ranges,
+            }
+
+    def close(self) -> None:
+        self._flush_stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=2.0)
+            self._flusher = None
+        with self._lock:
+            if self._fh is not None:
+                self._sync(force=True)
+                self._fh.close()
+                self._fh = None
+            if self._acks_fh is not None:
+                self._acks_fh.close()
+                self._acks_fh = None
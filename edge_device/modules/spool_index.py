@@ -0,0 +1,189 @@
+"""
+SQLite spool index
+
+Optional persistent replacement for LocalBuffer's in-memory ``BundleIndex``
+(``WELDVISION_BUFFER_INDEX=sqlite``).  One row per bundle next to the image
+files, in ``<buffer_root>/spool.db`` (WAL journal):
+
+    id          bundle directory name (timestamp-prefixed, so it sorts by age)
+    state       'tmp' while the bundle is being written, 'ready' once renamed
+    size        bytes on disk
+    created_at  epoch seconds
+    priority    lower drains first
+    attempts    delivery attempts so far
+    next_retry  epoch seconds before which the drain skips the bundle
+    last_error  why the last attempt failed
+    tier        retention tier: 'full', or 'compact' once the heatmap was shrunk
+
+``ready()`` answers "next bundles to drain" from an index instead of a
+sorted directory listing, and startup recovery only looks at the rows still
+in state 'tmp' rather than walking the tree.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bundles (
+    id          TEXT PRIMARY KEY,
+    state       TEXT NOT NULL DEFAULT 'ready',
+    size        INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    next_retry  REAL NOT NULL DEFAULT 0,
+    last_error  TEXT,
+    tier        TEXT NOT NULL DEFAULT 'full'
+);
+CREATE INDEX IF NOT EXISTS bundles_drain ON bundles (state, priority, next_retry, id);
+CREATE INDEX IF NOT EXISTS bundles_age ON bundles (state, id);
+"""
+
+
+class SqliteBundleIndex:
+    """Same interface as ``buffering.BundleIndex``; callers serialise access (LocalBuffer's lock)."""
+
+    def __init__(self, db_path: str):
+        self.path = Path(db_path)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(bundles)")}
+        if "tier" not in columns:   # spool.db written before retention tiers existed
+            self._db.execute("ALTER TABLE bundles ADD COLUMN tier TEXT NOT NULL DEFAULT 'full'")
+        self._db.execute("CREATE INDEX IF NOT EXISTS bundles_tier ON bundles (state, tier, id)")
+        self.needs_import = self._db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION
+        self._count, self.total_bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM bundles WHERE state = 'ready'"
+        ).fetchone()
+
+    def mark_imported(self) -> None:
+        """The tree has been indexed once; later starts trust the database."""
+        self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.needs_import = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, bundle_id: str) -> bool:
+        return self.size(bundle_id) is not None
+
+    # ── write path ───────────────────────────────────────────────────────
+
+    def begin(self, bundle_id: str, created_at: Optional[float] = None, priority: int = 0) -> None:
+        """Record a bundle whose ``.tmp`` directory is about to be written."""
+        self._db.execute(
+            "INSERT OR REPLACE INTO bundles (id, state, created_at, priority) VALUES (?, 'tmp', ?, ?)",
+            (bundle_id, created_at or time.time(), int(priority)),
+        )
+
+    def add(
+        self, bundle_id: str, size: int, created_at: Optional[float] = None, priority: int = 0, tier: str = "full",
+    ) -> None:
+        """Mark a bundle ready (keeping the created_at / priority given to ``begin``)."""
+        row = self._db.execute("SELECT size, state FROM bundles WHERE id = ?", (bundle_id,)).fetchone()
+        if row is not None and row[1] == "ready":
+            self._count -= 1
+            self.total_bytes -= row[0]
+        self._db.execute(
+            "INSERT INTO bundles (id, state, size, created_at, priority, tier) VALUES (?, 'ready', ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET state = 'ready', size = excluded.size, tier = excluded.tier",
+            (bundle_id, int(size), created_at or time.time(), int(priority), tier),
+        )
+        self._count += 1
+        self.total_bytes += int(size)
+
+    def remove(self, bundle_id: str) -> Optional[int]:
+        row = self._db.execute("SELECT size, state FROM bundles WHERE id = ?", (bundle_id,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("DELETE FROM bundles WHERE id = ?", (bundle_id,))
+        size, state = row
+        if state != "ready":
+            return None
+        self._count -= 1
+        self.total_bytes -= size
+        return size
+
+    def record_attempt(self, bundle_id: str, error: Optional[str], next_retry: float = 0.0) -> None:
+        self._db.execute(
+            "UPDATE bundles SET attempts = attempts + 1, last_error = ?, next_retry = ? WHERE id = ?",
+            (error, float(next_retry), bundle_id),
+        )
+
+    def set_tier(self, bundle_id: str, tier: str, size: int) -> None:
+        old_size = self.size(bundle_id)
+        if old_size is None:
+            return
+        self._db.execute("UPDATE bundles SET tier = ?, size = ? WHERE id = ?", (tier, int(size), bundle_id))
+        self.total_bytes += int(size) - old_size
+
+    # ── queries ──────────────────────────────────────────────────────────
+
+    def size(self, bundle_id: str) -> Optional[int]:
+        row = self._db.execute(
+            "SELECT size FROM bundles WHERE id = ? AND state = 'ready'", (bundle_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def attempts(self, bundle_id: str) -> int:
+        row = self._db.execute("SELECT attempts FROM bundles WHERE id = ?", (bundle_id,)).fetchone()
+        return row[0] if row else 0
+
+    def oldest(self) -> Optional[str]:
+        row = self._db.execute("SELECT id FROM bundles WHERE state = 'ready' ORDER BY id LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def ids(self) -> List[str]:
+        return [r[0] for r in self._db.execute("SELECT id FROM bundles WHERE state = 'ready' ORDER BY id")]
+
+    def ready(self, now: float, limit: Optional[int] = None) -> List[str]:
+        """Bundles due for delivery: highest priority first, then oldest."""
+        return [
+            r[0]
+            for r in self._db.execute(
+                "SELECT id FROM bundles WHERE state = 'ready' AND next_retry <= ? "
+                "ORDER BY priority, id LIMIT ?",
+                (now, -1 if limit is None else int(limit)),
+            )
+        ]
+
+    def oldest_in_tier(self, tier: str) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT id FROM bundles WHERE state = 'ready' AND tier = ? ORDER BY id LIMIT 1", (tier,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def tier_stats(self) -> dict:
+        return {
+            tier: {"count": count, "bytes": size}
+            for tier, count, size in self._db.execute(
+                "SELECT tier, COUNT(*), COALESCE(SUM(size), 0) FROM bundles WHERE state = 'ready' GROUP BY tier"
+            )
+        }
+
+    def unfinished(self) -> List[str]:
+        """Bundles left in state 'tmp' by an interrupted enqueue."""
+        return [r[0] for r in self._db.execute("SELECT id FROM bundles WHERE state = 'tmp'")]
+
+    def retry_stats(self, now: float) -> Tuple[int, int, Optional[str]]:
+        """(bundles waiting out a retry delay, max attempts, last error seen)."""
+        waiting, max_attempts = self._db.execute(
+            "SELECT COALESCE(SUM(next_retry > ?), 0), COALESCE(MAX(attempts), 0) "
+            "FROM bundles WHERE state = 'ready'",
+            (now,),
+        ).fetchone()
+        row = self._db.execute(
+            "SELECT last_error FROM bundles WHERE last_error IS NOT NULL ORDER BY next_retry DESC LIMIT 1"
+        ).fetchone()
+        return waiting, max_attempts, row[0] if row else None
+
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,161 @@
+"""
+Startup tracking and lazy imports
+
+``InitTracker`` records every initialization phase (start offset, duration,
+outcome) and the first-frame / first-scan milestones relative to process
+start, so time-to-first-scan after power-on can be read from the device's
+``/ready`` endpoint instead of guessed from log timestamps.
+
+``lazy_import`` defers heavy optional dependencies until first use, keeping
+them off the critical path between process start and the first frame.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def _boot_time() -> Optional[float]:
+    try:
+        with open("/proc/stat") as f:
+            for line in f:
+                if line.startswith("btime"):
+                    return float(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def process_start_time() -> float:
+    """Wall-clock start of this process (includes interpreter and import time on Linux)."""
+    btime = _boot_time()
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return btime + int(fields[19]) / os.sysconf("SC_CLK_TCK")  # field 22: starttime
+    except Exception:
+        return time.time()
+
+
+class InitTracker:
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else process_start_time()
+        self._lock = threading.Lock()
+        self._phases: List[dict] = []
+        self._milestones: Dict[str, float] = {}
+        self._ready_at: Optional[float] = None
+
+    def _offset_ms(self, ts: float) -> float:
+        return round((ts - self.started_at) * 1000.0, 1)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time one init phase; yields a dict the caller may annotate (``status``, details)."""
+        info: dict = {}
+        t0 = time.time()
+        p0 = time.perf_counter()
+        try:
+            yield info
+        except Exception as e:
+            info["status"] = "failed"
+            info["error"] = str(e)
+            raise
+        finally:
+            record = {
+                "name": name,
+                "thread": threading.current_thread().name,
+                "started_ms": self._offset_ms(t0),
+                "duration_ms": round((time.perf_counter() - p0) * 1000.0, 1),
+                "status": info.pop("status", "ok"),
+            }
+            record.update(info)
+            with self._lock:
+                self._phases.append(record)
+
+    def skip(self, name: str, reason: str) -> None:
+        with self._lock:
+            self._phases.append({
+                "name": name,
+                "started_ms": self._offset_ms(time.time()),
+                "duration_ms": 0.0,
+                "status": "skipped",
+                "reason": reason,
+            })
+
+    def mark(self, name: str) -> bool:
+        """Record a milestone the first time it is reached; returns True on that first call."""
+        if name in self._milestones:
+            return False
+        with self._lock:
+            if name in self._milestones:
+                return False
+            self._milestones[name] = time.time()
+            return True
+
+    def milestone_ms(self, name: str) -> Optional[float]:
+        ts = self._milestones.get(name)
+        return self._offset_ms(ts) if ts is not None else None
+
+    def set_ready(self) -> None:
+        with self._lock:
+            if self._ready_at is None:
+                self._ready_at = time.time()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready_at is not None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            phases = sorted(self._phases, key=lambda p: p["started_ms"])
+            milestones = {k: self._offset_ms(v) for k, v in self._milestones.items()}
+            ready_at = self._ready_at
+
+        btime = _boot_time()
+        first_scan = self._milestones.get("first_scan")
+        return {
+            "ready": ready_at is not None,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "time_to_ready_ms": self._offset_ms(ready_at) if ready_at is not None else None,
+            "time_to_first_scan_ms": milestones.get("first_scan"),
+            "boot_to_first_scan_ms": (
+                round((first_scan - btime) * 1000.0, 1) if first_scan is not None and btime else None
+            ),
+            "milestones": milestones,
+            "phases": phases,
+        }
+
+
+STARTUP = InitTracker()
@@ -8,6 +8,8 @@ from typing import Optional, Tuple
 import cv2
 import numpy as np
 
+from .telemetry import STAGE_SECONDS
+
 
 @dataclass
 class StereoCalibration:
@@ -99,23 +101,30 @@ class StereoDepthEstimator:
             except Exception:
                 self.use_wls = False
 
+    @classmethod
+    def from_json_path(cls, calib_path: str, **kwargs) -> "StereoDepthEstimator":
+        return cls(load_calibration_json(calib_path), **kwargs)
+
     def rectify(self, left_bgr, right_bgr):
         c = self.calib
-        left_rect = cv2.remap(left_bgr, c.mapLx, c.mapLy, cv2.INTER_LINEAR)
-        right_rect = cv2.remap(right_bgr, c.mapRx, c.mapRy, cv2.INTER_LINEAR)
+        with STAGE_SECONDS.time(stage="rectify"):
+            left_rect = cv2.remap(left_bgr, c.mapLx, c.mapLy, cv2.INTER_LINEAR)
+            right_rect = cv2.remap(right_bgr, c.mapRx, c.mapRy, cv2.INTER_LINEAR)
         return left_rect, right_rect
 
     def disparity(self, left_rect_bgr, right_rect_bgr) -> np.ndarray:
         # CPU — cv2.cvtColor and StereoSGBM.compute run on the quad-core CPU.
         # The metal texture provides enough natural contrast for block matching.
-        left_gray = cv2.cvtColor(left_rect_bgr, cv2.COLOR_BGR2GRAY)
-        right_gray = cv2.cvtColor(right_rect_bgr, cv2.COLOR_BGR2GRAY)
+        with STAGE_SECONDS.time(stage="sgbm"):
+            left_gray = cv2.cvtColor(left_rect_bgr, cv2.COLOR_BGR2GRAY)
+            right_gray = cv2.cvtColor(right_rect_bgr, cv2.COLOR_BGR2GRAY)
 
-        disp_left = self.left_matcher.compute(left_gray, right_gray)  # CPU — StereoSGBM
+            disp_left = self.left_matcher.compute(left_gray, right_gray)  # CPU — StereoSGBM
 
         if self.use_wls and self.right_matcher is not None and self.wls is not None:
-            disp_right = self.right_matcher.compute(right_gray, left_gray)
-            disp = self.wls.filter(disp_left, left_gray, None, disp_right)
+            with STAGE_SECONDS.time(stage="wls"):
+                disp_right = self.right_matcher.compute(right_gray, left_gray)
+                disp = self.wls.filter(disp_left, left_gray, None, disp_right)
         else:
             disp = disp_left
 
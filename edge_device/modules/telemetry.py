@@ -0,0 +1,242 @@
+"""
+Pipeline telemetry
+
+Low-overhead counters and latency histograms for the edge pipeline,
+rendered in the Prometheus text exposition format (served as /metrics by
+OverlayStreamServer).  An observation is a perf_counter delta, a bisect
+into fixed buckets and a short lock — cheap enough for every frame.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS_S = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        self.labels(**labels).inc(amount)
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, child in self._items():
+            lines.append(f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(child.value)}")
+        return lines
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS_S):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        return self.labels(**labels).time()
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, child in self._items():
+            base = list(zip(self.labelnames, key))
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(list(self.buckets) + [float("inf")], counts):
+                cumulative += n
+                labels = _format_labels(base + [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(base)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(base)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: Dict[str, _Family] = {}
+
+    def _register(self, family: _Family) -> _Family:
+        with self._lock:
+            existing = self._families.get(family.name)
+            if existing is not None:
+                return existing
+            self._families[family.name] = family
+            return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS_S,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def get(self, name: str) -> Optional[_Family]:
+        with self._lock:
+            return self._families.get(name)
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda f: f.name)
+        out = []
+        for family in families:
+            out.append(f"# HELP {family.name} {family.documentation}")
+            out.append(f"# TYPE {family.name} {family.kind}")
+            out.extend(family.render())
+        return "\n".join(out) + "\n"
+
+    def export_histograms(self, reset: bool = True) -> list:
+        """Picklable snapshot of histogram observations (used to forward a child process's timings)."""
+        state = []
+        with self._lock:
+            families = [f for f in self._families.values() if isinstance(f, Histogram)]
+        for family in families:
+            for key, child in family._items():
+                with child._lock:
+                    if not child.count:
+                        continue
+                    state.append((family.name, key, list(child.counts), child.sum, child.count))
+                    if reset:
+                        child.counts = [0] * len(child.counts)
+                        child.sum = 0.0
+                        child.count = 0
+        return state
+
+    def merge_histograms(self, state: list) -> None:
+        for name, key, counts, total, count in state or []:
+            family = self.get(name)
+            if not isinstance(family, Histogram):
+                continue
+            child = family.labels(**dict(zip(family.labelnames, key)))
+            with child._lock:
+                for i, n in enumerate(counts[: len(child.counts)]):
+                    child.counts[i] += n
+                child.sum += total
+                child.count += count
+
+
+REGISTRY = MetricsRegistry()
+
+# ── WeldVision pipeline metrics ─────────────────────────────────────────────
+STAGE_SECONDS = REGISTRY.histogram(
+    "weldvision_stage_seconds",
+    "Latency of one pipeline stage in seconds.",
+    ("stage",),
+)
+FRAMES_TOTAL = REGISTRY.counter(
+    "weldvision_frames_total",
+    "Frames by pipeline event (captured, rejected, gated, dropped, processed).",
+    ("event",),
+)
+UPLOADS_TOTAL = REGISTRY.counter(
+    "weldvision_uploads_total",
+    "Backend uploads by kind and outcome.",
+    ("kind", "outcome"),
+)
+SHED_TOTAL = REGISTRY.counter(
+    "weldvision_stages_shed_total",
+    "Optional stages shed by the load shedder.",
+    ("stage", "decision"),
+)
@@ -0,0 +1,203 @@
+"""
+Per-frame tracing in Chrome trace-event format
+
+Opt-in recorder of complete ("ph": "X") span events tagged with the
+frame id, written to rolling ``trace_*.json`` files that load directly in
+chrome://tracing or https://ui.perfetto.dev.  Each thread gets its own
+track, so overlap (or serialization) between capture, BPU, CPU, the
+combine step and uploads is visible per frame.
+
+Files use the JSON Array Format, appended event by event; the closing
+``]`` is optional in that format, so a file is readable while it is still
+being written.  Events are buffered in memory and appended by a
+background writer — the pipeline threads never touch the disk.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "args", "_t0")
+
+    def __init__(self, tracer: "FrameTracer", name: str, args: dict):
+        self._tracer = tracer
+        self._name = name
+        self.args = args
+        self._t0 = 0.0
+
+    def __enter__(self) -> dict:
+        self._t0 = time.perf_counter()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self._tracer._record(self._name, self._t0, t1, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> dict:
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class FrameTracer:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._pending: List[dict] = []
+        self._pid = os.getpid()
+        # perf_counter → wall-clock microseconds, fixed once per process
+        self._epoch_us = time.time() * 1e6 - time.perf_counter() * 1e6
+
+        self._out_dir: Optional[Path] = None
+        self._max_events_per_file = 50000
+        self._max_files = 5
+        self._flush_interval_s = 2.0
+        self._max_pending = 100000
+        self._dropped = 0
+
+        self._file = None
+        self._file_events = 0
+        self._file_seq = 0
+        self._named_tids: set = set()
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def enable(
+        self,
+        out_dir: str,
+        *,
+        max_events_per_file: int = 50000,
+        max_files: int = 5,
+        flush_interval_s: float = 2.0,
+    ) -> None:
+        if self.enabled:
+            return
+        self._out_dir = Path(out_dir)
+        self._out_dir.mkdir(parents=True, exist_ok=True)
+        self._max_events_per_file = max(100, int(max_events_per_file))
+        self._max_files = max(1, int(max_files))
+        self._flush_interval_s = float(flush_interval_s)
+        self._stop.clear()
+        self.enabled = True
+        self._writer = threading.Thread(target=self._writer_loop, name="trace-writer", daemon=True)
+        self._writer.start()
+
+    def close(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=2.0)
+            self._writer = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def span(self, name: str, frame_id=None, **args):
+        """Context manager timing one span; yields its (mutable) args dict."""
+        if not self.enabled:
+            return _NULL_SPAN
+        if frame_id is not None:
+            args["frame_id"] = frame_id
+        return _Span(self, name, args)
+
+    def _record(self, name: str, t0: float, t1: float, args: dict) -> None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": "pipeline",
+            "ph": "X",
+            "ts": round(self._epoch_us + t0 * 1e6, 1),
+            "dur": round((t1 - t0) * 1e6, 1),
+            "pid": self._pid,
+            "tid": thread.ident,
+            "args": args,
+            "_thread_name": thread.name,
+        }
+        with self._lock:
+            if len(self._pending) >= self._max_pending:
+                self._dropped += 1
+                return
+            self._pending.append(event)
+
+    # ── writer side ──────────────────────────────────────────────────────
+
+    def _writer_loop(self) -> None:
+        while not self._stop.wait(self._flush_interval_s):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def _open_next_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file_seq += 1
+        path = self._out_dir / f"trace_{time.strftime('%Y%m%dT%H%M%S')}_{self._pid}_{self._file_seq:04d}.json"
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self._file_events = 0
+        self._named_tids = set()
+
+        traces = sorted(self._out_dir.glob("trace_*.json"), key=lambda p: (p.stat().st_mtime, p.name))
+        for old in traces[: max(0, len(traces) - self._max_files)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def flush(self) -> None:
+        with self._lock:
+            events, self._pending = self._pending, []
+        if not events or self._out_dir is None:
+            return
+
+        for event in events:
+            if self._file is None or self._file_events >= self._max_events_per_file:
+                self._open_next_file()
+            thread_name = event.pop("_thread_name")
+            if event["tid"] not in self._named_tids:
+                self._named_tids.add(event["tid"])
+                meta = {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": event["pid"],
+                    "tid": event["tid"],
+                    "args": {"name": thread_name},
+                }
+                self._file.write(json.dumps(meta) + ",\n")
+            self._file.write(json.dumps(event, default=str) + ",\n")
+            self._file_events += 1
+        self._file.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "pending": len(self._pending),
+                "dropped": self._dropped,
+                "dir": str(self._out_dir) if self._out_dir else None,
+            }
+
+
+TRACER = FrameTracer()
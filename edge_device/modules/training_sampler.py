@@ -0,0 +1,177 @@
+"""
+Informative-frame sampling for training uploads
+
+Most processed frames are near-duplicates of the last one, so uploading
+every frame as training data mostly pays for storage.  ``TrainingSampler``
+scores each frame on three cheap signals and keeps only the best:
+
+    uncertainty — detections near the decision boundary (confidence ~0.5)
+    rarity      — detections of classes seen rarely so far on this device
+    novelty     — perceptual-hash distance to the frames uploaded recently
+
+A frame is uploaded when its score is in the top ``top_fraction`` of the
+recent score window, it is not a near-duplicate of a recent upload, and
+today's ``daily_budget`` is not spent yet.
+"""
+
+from __future__ import annotations
+
+import collections
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def phash(image_bgr: np.ndarray) -> int:
+    """64-bit DCT perceptual hash: sign of the low 8×8 frequencies against their median."""
+    gray = image_bgr if image_bgr.ndim == 2 else cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])   # DC term excluded from the median
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass(frozen=True)
+class SampleDecision:
+    upload: bool
+    reason: str            # selected | below_threshold | duplicate | budget
+    score: float
+    uncertainty: float
+    rarity: float
+    novelty: float
+    label: str
+
+    def as_dict(self) -> dict:
+        return {
+            "upload": self.upload,
+            "reason": self.reason,
+            "score": round(self.score, 3),
+            "uncertainty": round(self.uncertainty, 3),
+            "rarity": round(self.rarity, 3),
+            "novelty": round(self.novelty, 3),
+            "label": self.label,
+        }
+
+
+class TrainingSampler:
+    def __init__(
+        self,
+        *,
+        top_fraction: float = 0.05,
+        daily_budget: int = 200,
+        score_window: int = 200,
+        index_size: int = 500,
+        novelty_bits: int = 16,
+        duplicate_bits: int = 4,
+        weights: tuple = (0.4, 0.3, 0.3),
+        clock: Callable[[], float] = time.time,
+    ):
+        self.top_fraction = min(1.0, max(0.0, float(top_fraction)))
+        self.daily_budget = int(daily_budget)
+        self.novelty_bits = max(1, int(novelty_bits))
+        self.duplicate_bits = int(duplicate_bits)
+        self.w_uncertainty, self.w_rarity, self.w_novelty = weights
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._scores: collections.deque = collections.deque(maxlen=max(1, int(score_window)))
+        self._index: collections.deque = collections.deque(maxlen=max(1, int(index_size)))   # hashes of uploads
+        self._class_counts: Dict[str, int] = collections.Counter()
+        self._day: Optional[str] = None
+        self._used_today = 0
+        self._considered = 0
+        self._decisions: Dict[str, int] = collections.Counter()
+
+    # ── signals ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def uncertainty(detections: Iterable[dict]) -> float:
+        """1 at confidence 0.5, 0 at 0 or 1; the most uncertain detection counts."""
+        best = 0.0
+        for det in detections:
+            conf = float(det.get("confidence", 0.0) or 0.0)
+            best = max(best, 1.0 - abs(2.0 * conf - 1.0))
+        return best
+
+    def _rarity(self, classes: Iterable[str]) -> float:
+        total = sum(self._class_counts.values())
+        best = 0.0
+        for cls in classes:
+            share = self._class_counts.get(cls, 0) / total if total else 0.0
+            best = max(best, 1.0 - share)
+        return best
+
+    def _novelty(self, h: int) -> Tuple[float, Optional[int]]:
+        """(novelty in [0, 1], Hamming distance to the nearest recent upload or None)."""
+        if not self._index:
+            return 1.0, None
+        nearest = min(hamming(h, other) for other in self._index)
+        return min(1.0, nearest / float(self.novelty_bits)), nearest
+
+    def _threshold(self) -> float:
+        ranked = sorted(self._scores, reverse=True)
+        k = max(1, math.ceil(self.top_fraction * len(ranked)))
+        return ranked[k - 1]
+
+    # ── decision ─────────────────────────────────────────────────────────
+
+    def consider(self, image_bgr: np.ndarray, detections: Iterable[dict]) -> SampleDecision:
+        """Score one processed frame and decide whether to upload it (the budget is spent on 'yes')."""
+        detections = list(detections or [])
+        classes = [str(d.get("class_name", "unknown")) for d in detections]
+        h = phash(image_bgr)
+
+        with self._lock:
+            self._considered += 1
+            self._roll_day()
+
+            uncertainty = self.uncertainty(detections)
+            rarity = self._rarity(classes)
+            novelty, nearest = self._novelty(h)
+            self._class_counts.update(classes)
+
+            score = self.w_uncertainty * uncertainty + self.w_rarity * rarity + self.w_novelty * novelty
+            self._scores.append(score)
+
+            if nearest is not None and nearest <= self.duplicate_bits:
+                reason = "duplicate"
+            elif score < self._threshold():
+                reason = "below_threshold"
+            elif self._used_today >= self.daily_budget:
+                reason = "budget"
+            else:
+                reason = "selected"
+                self._used_today += 1
+                self._index.append(h)
+            self._decisions[reason] += 1
+
+        label = max(set(classes), key=classes.count) if classes else "weld"
+        return SampleDecision(reason == "selected", reason, score, uncertainty, rarity, novelty, label)
+
+    def _roll_day(self) -> None:
+        day = datetime.fromtimestamp(self._clock(), tz=timezone.utc).strftime("%Y-%m-%d")
+        if day != self._day:
+            self._day = day
+            self._used_today = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "considered": self._considered,
+                "decisions": dict(self._decisions),
+                "budget": self.daily_budget,
+                "budget_used_today": self._used_today,
+                "threshold": round(self._threshold(), 3) if self._scores else None,
+                "indexed_uploads": len(self._index),
+                "class_counts": dict(self._class_counts),
+            }
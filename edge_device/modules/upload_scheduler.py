@@ -0,0 +1,202 @@
+"""
+Uplink scheduler
+
+Every transfer over the workshop uplink (live assessment uploads, buffer
+replay, training images, R2 model downloads) asks ``UploadScheduler`` for
+its bytes first.  A token bucket caps the aggregate rate; while a
+higher-priority class is waiting for tokens, lower classes do not get
+any, so live results jump the queue ahead of replay, training and model
+pulls.  The bucket may go into debt for a single large transfer, so
+nothing has to be split.
+
+Transfer timings feed a throughput estimate that ``AdaptiveQuality`` uses
+to step live-upload JPEG quality / resolution down on a slow link and
+back up when it recovers.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+LIVE = 0
+REPLAY = 1
+TRAINING = 2
+MODEL = 3
+
+PRIORITY_NAMES = {LIVE: "live", REPLAY: "replay", TRAINING: "training", MODEL: "model"}
+
+
+class UploadScheduler:
+    def __init__(
+        self,
+        rate_bytes_per_s: float = 0.0,
+        *,
+        burst_bytes: Optional[float] = None,
+        ewma_alpha: float = 0.3,
+        min_sample_bytes: int = 32 * 1024,
+    ):
+        self.rate = max(0.0, float(rate_bytes_per_s))
+        self.burst = float(burst_bytes) if burst_bytes else max(self.rate, 64 * 1024)
+        self._alpha = float(ewma_alpha)
+        self._min_sample_bytes = int(min_sample_bytes)
+
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._waiting: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+
+        self._throughput_bps: Optional[float] = None
+        self._classes: Dict[int, dict] = {
+            p: {"transfers": 0, "bytes": 0, "wait_s": 0.0} for p in PRIORITY_NAMES
+        }
+
+    @property
+    def limited(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, priority: int, nbytes: int) -> float:
+        """Block until ``nbytes`` may be sent at ``priority``; returns seconds waited."""
+        if not self.limited:
+            return 0.0
+
+        t0 = time.monotonic()
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    self._refill()
+                    higher_waiting = any(self._waiting[p] for p in self._waiting if p < priority)
+                    if not higher_waiting and self._tokens > 0:
+                        self._tokens -= nbytes
+                        break
+                    deficit_s = (-self._tokens / self.rate) if self._tokens <= 0 else 0.0
+                    self._cond.wait(timeout=min(1.0, max(0.01, deficit_s)))
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+        waited = time.monotonic() - t0
+        with self._cond:
+            self._classes[priority]["wait_s"] += waited
+        return waited
+
+    def throttle(self, priority: int, nbytes: int) -> None:
+        """Rate-limit a transfer already in progress (e.g. a boto3 download ``Callback``)."""
+        self.acquire(priority, nbytes)
+        with self._cond:
+            self._classes[priority]["bytes"] += nbytes
+
+    @contextmanager
+    def transfer(self, priority: int, nbytes: int):
+        """Wrap one request: waits for bandwidth, then times it for the throughput estimate."""
+        self.acquire(priority, nbytes)
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(priority, nbytes, time.perf_counter() - t0, ok)
+
+    def _record(self, priority: int, nbytes: int, seconds: float, ok: bool) -> None:
+        with self._cond:
+            c = self._classes[priority]
+            c["transfers"] += 1
+            c["bytes"] += nbytes
+            if ok and nbytes >= self._min_sample_bytes and seconds > 0:
+                sample = nbytes / seconds
+                prev = self._throughput_bps
+                self._throughput_bps = sample if prev is None else prev + self._alpha * (sample - prev)
+
+    def throughput_bps(self) -> Optional[float]:
+        with self._cond:
+            return self._throughput_bps
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill()
+            return {
+                "rate_limit_bps": self.rate or None,
+                "tokens": round(self._tokens) if self.limited else None,
+                "throughput_bps": round(self._throughput_bps) if self._throughput_bps else None,
+                "waiting": {PRIORITY_NAMES[p]: n for p, n in self._waiting.items() if n},
+                "classes": {
+                    PRIORITY_NAMES[p]: {**c, "wait_s": round(c["wait_s"], 2)} for p, c in self._classes.items()
+                },
+            }
+
+
+# (jpeg quality, resolution scale), best first, and the rough size of each
+# relative to the first — only used until real sizes have been observed.
+DEFAULT_LEVELS: Tuple[Tuple[int, float], ...] = ((95, 1.0), (85, 1.0), (75, 1.0), (70, 0.75), (60, 0.5))
+NOMINAL_SIZE_RATIO: Tuple[float, ...] = (1.0, 0.55, 0.4, 0.25, 0.12)
+
+
+class AdaptiveQuality:
+    """Pick the best encoding level whose expected size uploads within ``target_s`` at the measured throughput.
+
+    Steps down as far as needed at once, but back up one level per decision
+    so a single fast sample does not flip straight back to full size.
+    """
+
+    def __init__(
+        self,
+        target_s: float = 3.0,
+        levels: Sequence[Tuple[int, float]] = DEFAULT_LEVELS,
+        size_ratio: Sequence[float] = NOMINAL_SIZE_RATIO,
+        ewma_alpha: float = 0.3,
+    ):
+        self.target_s = float(target_s)
+        self.levels = tuple(levels)
+        self.size_ratio = tuple(size_ratio[: len(self.levels)]) + (size_ratio[-1],) * max(0, len(self.levels) - len(size_ratio))
+        self._alpha = float(ewma_alpha)
+        self._lock = threading.Lock()
+        self._level = 0
+        self._full_bytes: Optional[float] = None   # estimated upload size at level 0
+        self._changes = 0
+
+    def choose(self, throughput_bps: Optional[float]) -> Tuple[int, float]:
+        with self._lock:
+            if not throughput_bps or self._full_bytes is None or self.target_s <= 0:
+                return self.levels[self._level]
+            wanted = len(self.levels) - 1
+            for idx, ratio in enumerate(self.size_ratio):
+                if self._full_bytes * ratio / throughput_bps <= self.target_s:
+                    wanted = idx
+                    break
+            level = wanted if wanted >= self._level else self._level - 1
+            if level != self._level:
+                self._changes += 1
+                self._level = level
+            return self.levels[level]
+
+    def observe(self, quality: int, scale: float, nbytes: int) -> None:
+        """Learn the real size of an upload made at (quality, scale)."""
+        try:
+            idx = self.levels.index((quality, scale))
+        except ValueError:
+            return
+        estimate = nbytes / self.size_ratio[idx]
+        with self._lock:
+            prev = self._full_bytes
+            self._full_bytes = estimate if prev is None else prev + self._alpha * (estimate - prev)
+
+    def stats(self) -> dict:
+        with self._lock:
+            quality, scale = self.levels[self._level]
+            return {
+                "level": self._level,
+                "jpeg_quality": quality,
+                "scale": scale,
+                "target_s": self.target_s,
+                "full_size_bytes": round(self._full_bytes) if self._full_bytes else None,
+                "level_changes": self._changes,
+            }
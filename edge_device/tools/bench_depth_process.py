@@ -0,0 +1,164 @@
+"""Benchmark: in-process vs out-of-process depth stage.
+
+Runs the SGBM + feature-extraction stage on synthetic 1280x720 stereo pairs
+two ways while a pure-Python "background" thread stands in for inference
+dispatch, uploads and the HTTP stream server:
+
+  in-process     — stage runs on a thread of this interpreter (shares the GIL)
+  out-of-process — stage runs in the depth worker process, frames exchanged
+                   through shared-memory ring slots (DepthProcessClient)
+
+Reported per mode: depth frames/s and background-thread iterations/s.
+
+Usage:
+  python tools/bench_depth_process.py --frames 30
+  python tools/bench_depth_process.py --frames 60 --width 1280 --height 720 --json bench_depth.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.depth_process import DepthProcessClient
+from modules.stereo_depth import (
+    StereoCalibration,
+    StereoDepthEstimator,
+    WeldFeatureExtractor,
+    depth_to_colormap,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FOCAL_PX = 800.0
+BASELINE_MM = 65.0
+
+
+def make_calibration(width: int, height: int) -> StereoCalibration:
+    cx, cy = width / 2.0, height / 2.0
+    Q = np.array([
+        [1, 0, 0, -cx],
+        [0, 1, 0, -cy],
+        [0, 0, 0, FOCAL_PX],
+        [0, 0, 1 / BASELINE_MM, 0],   # OpenCV's -1/Tx with Tx = -baseline: positive Z = f·B/d
+    ], dtype=np.float32)
+    # Identity rectification maps: remap cost is real, geometry unchanged
+    xs, ys = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+    return StereoCalibration(image_size=(width, height), Q=Q, mapLx=xs, mapLy=ys, mapRx=xs.copy(), mapRy=ys.copy())
+
+
+def make_pair(width: int, height: int, shift_px: int = 12):
+    rng = np.random.default_rng(0)
+    left = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    right = np.roll(left, -shift_px, axis=1)
+    return left, right
+
+
+def roi_for(width: int, height: int):
+    return (int(0.08 * width), int(0.15 * height), int(0.84 * width), int(0.70 * height))
+
+
+class BackgroundLoad(threading.Thread):
+    """Pure-Python busy loop; its iteration rate drops when the GIL is contended."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stop_event = threading.Event()
+        self.iterations = 0
+
+    def run(self):
+        acc = 0
+        while not self.stop_event.is_set():
+            for i in range(1000):
+                acc += i * i
+            self.iterations += 1
+
+
+def run_in_process(calib, left, right, roi, frames: int) -> float:
+    estimator = StereoDepthEstimator(calib)
+    extractor = WeldFeatureExtractor(focal_length_px=FOCAL_PX, baseline_mm=BASELINE_MM)
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        lr, rr = estimator.rectify(left, right)
+        disp = estimator.disparity(lr, rr)
+        Z = estimator.depth_map(disp)
+        geo = extractor.extract_features(Z, roi)
+        geo.update(extractor.score_weld(geo))
+        depth_to_colormap(disp)
+    return time.perf_counter() - t0
+
+
+def run_out_of_process(calib, left, right, roi, frames: int, slots: int = 3) -> float:
+    client = DepthProcessClient(calib, focal_length_px=FOCAL_PX, baseline_mm=BASELINE_MM, slots=slots)
+    client.start()
+    try:
+        # Warm-up: child import + first ring allocation are not part of steady state
+        client.submit(left, right, roi).result(timeout=60)
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            client.submit(left, right, roi).result(timeout=60)
+        return time.perf_counter() - t0
+    finally:
+        client.stop()
+
+
+def measure(label, frames, fn, *args) -> dict:
+    load = BackgroundLoad()
+    load.start()
+    try:
+        elapsed = fn(*args, frames)
+    finally:
+        load.stop_event.set()
+        load.join()
+    result = {
+        "mode": label,
+        "frames": frames,
+        "seconds": round(elapsed, 3),
+        "depth_fps": round(frames / elapsed, 2) if elapsed > 0 else None,
+        "background_iter_per_s": round(load.iterations / elapsed, 1) if elapsed > 0 else None,
+    }
+    logger.info(
+        f"{label:>15}: {result['depth_fps']} depth fps, "
+        f"{result['background_iter_per_s']} background iter/s"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--slots", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    calib = make_calibration(args.width, args.height)
+    left, right = make_pair(args.width, args.height)
+    roi = roi_for(args.width, args.height)
+
+    results = [
+        measure("in-process", args.frames, run_in_process, calib, left, right, roi),
+        measure("out-of-process", args.frames, functools.partial(run_out_of_process, slots=args.slots), calib, left, right, roi),
+    ]
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
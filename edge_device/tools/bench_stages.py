@@ -0,0 +1,263 @@
+"""Benchmark: per-stage timings with baseline regression check.
+
+Times each hot function of the edge pipeline on synthetic inputs at
+production resolution (default 1280x720):
+
+  rectify, disparity, depth_map, extract_features   — stereo (CPU)
+  parse_yolo_output                                  — BPU output decode + NMS
+  draw_overlay                                       — annotate + heatmap blend
+  write_ply, generate_preview_json                   — point cloud export
+  buffer_enqueue                                     — LocalBuffer.enqueue
+
+Every stage runs ``--warmup`` untimed calls and then ``--repeat`` timed
+calls; median / p90 / min are reported in milliseconds.
+
+Baselines are per machine — record one on the target device, then compare
+later runs against it.  A stage regresses when its median exceeds the
+baseline median by more than ``--threshold`` percent (and by at least
+``--min-delta-ms``, so sub-millisecond stages don't flap); the exit status
+is 1 if any stage regressed.
+
+Usage:
+  python tools/bench_stages.py --save-baseline bench_baseline.json
+  python tools/bench_stages.py --baseline bench_baseline.json --threshold 15
+  python tools/bench_stages.py --stages disparity,write_ply --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# Add parent directory to path to import modules (and main.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing main.py configures logging; keep its log file out of the device path
+os.environ.setdefault('WELDVISION_LOG_PATH', os.path.join(tempfile.gettempdir(), 'weldvision_bench.log'))
+
+import main as edge  # noqa: E402
+from bench_depth_process import BASELINE_MM, FOCAL_PX, make_calibration, make_pair, roi_for  # noqa: E402
+from modules.buffering import LocalBuffer  # noqa: E402
+from modules.ply_exporter import _write_ply, generate_preview_json  # noqa: E402
+from modules.stereo_depth import StereoDepthEstimator, WeldFeatureExtractor, depth_to_colormap  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _OutputTensor:
+    """Stand-in for a hobot_dnn output: only ``.buffer`` is read."""
+
+    def __init__(self, buffer: np.ndarray):
+        self.buffer = buffer
+
+
+def make_yolo_output(num_classes: int = 5, anchors: int = 8400, hits: int = 40) -> list:
+    """(1, 5+C, N) tensor with ``hits`` confident, partly overlapping boxes."""
+    rng = np.random.default_rng(1)
+    pred = rng.uniform(0.0, 0.3, (5 + num_classes, anchors)).astype(np.float32)
+    pred[0] *= 640.0
+    pred[1] *= 640.0
+    pred[2] = rng.uniform(10, 80, anchors)
+    pred[3] = rng.uniform(10, 80, anchors)
+    idx = rng.choice(anchors, hits, replace=False)
+    pred[4, idx] = rng.uniform(0.8, 1.0, hits)
+    pred[5 + rng.integers(0, num_classes, hits), idx] = rng.uniform(0.8, 1.0, hits)
+    return [_OutputTensor(pred[np.newaxis, ...])]
+
+
+class StageInputs:
+    """Synthetic inputs for every stage, built once (outside the timed region)."""
+
+    def __init__(self, width: int, height: int, work_dir: str):
+        self.work_dir = work_dir
+        self.calib = make_calibration(width, height)
+        self.left, self.right = make_pair(width, height)
+        self.roi = roi_for(width, height)
+
+        self.estimator = StereoDepthEstimator(self.calib)
+        self.extractor = WeldFeatureExtractor(focal_length_px=FOCAL_PX, baseline_mm=BASELINE_MM)
+        self.left_rect, self.right_rect = self.estimator.rectify(self.left, self.right)
+        self.disp = self.estimator.disparity(self.left_rect, self.right_rect)
+        self.Z = self.estimator.depth_map(self.disp)
+        self.heat = depth_to_colormap(self.disp)
+
+        self.engine = edge.InferenceEngine(None)
+        self.yolo_outputs = make_yolo_output(num_classes=len(edge.DEFECT_CLASSES))
+        self.detections = self.engine._parse_yolo_output(self.yolo_outputs, self.left.shape)
+
+        points_3d = cv2.reprojectImageTo3D(self.disp, self.calib.Q)
+        mask = np.isfinite(points_3d[:, :, 2]) & (points_3d[:, :, 2] > 0) & (points_3d[:, :, 2] < 10000)
+        self.ply_points = points_3d[mask]
+        self.ply_colors = cv2.cvtColor(self.left, cv2.COLOR_BGR2RGB)[mask]
+        self.ply_path = os.path.join(work_dir, 'bench.ply')
+        # An empty cloud would time nothing but file headers: insist on a real export
+        assert len(self.ply_points) > 0, "synthetic calibration yields no points in the PLY depth range"
+        preview = generate_preview_json(self.disp, self.left, self.calib.Q, target_points=edge.PLY_DECIMATE_POINTS)
+        assert preview['count'] > 0, "synthetic calibration yields an empty preview cloud"
+
+        self.buffer = LocalBuffer(os.path.join(work_dir, 'buffer'), max_bytes=1 << 40)
+        self.metrics_json = {'geometric': self.extractor.extract_features(self.Z, self.roi), 'visual': {}}
+
+
+def build_stages(inp: StageInputs) -> dict:
+    """name → (fn, teardown).  ``teardown`` receives fn's result and is not timed."""
+    return {
+        'rectify': (lambda: inp.estimator.rectify(inp.left, inp.right), None),
+        'disparity': (lambda: inp.estimator.disparity(inp.left_rect, inp.right_rect), None),
+        'depth_map': (lambda: inp.estimator.depth_map(inp.disp), None),
+        'extract_features': (lambda: inp.extractor.extract_features(inp.Z, inp.roi), None),
+        'parse_yolo_output': (lambda: inp.engine._parse_yolo_output(inp.yolo_outputs, inp.left.shape), None),
+        'draw_overlay': (lambda: edge.draw_overlay(inp.left, inp.detections, inp.heat), None),
+        'write_ply': (lambda: _write_ply(inp.ply_path, inp.ply_points, inp.ply_colors), None),
+        'generate_preview_json': (
+            lambda: generate_preview_json(inp.disp, inp.left, inp.calib.Q, target_points=edge.PLY_DECIMATE_POINTS),
+            None,
+        ),
+        'buffer_enqueue': (
+            lambda: inp.buffer.enqueue(
+                image_bgr=inp.left,
+                heatmap_bgr=inp.heat,
+                metrics_json=inp.metrics_json,
+                meta={'kind': 'assessment', 'device_id': edge.DEVICE_ID},
+            ),
+            inp.buffer.delete,  # keep the spool empty so every call sees the same directory
+        ),
+    }
+
+
+def time_stage(fn, teardown, warmup: int, repeat: int) -> dict:
+    for _ in range(warmup):
+        out = fn()
+        if teardown is not None:
+            teardown(out)
+
+    runs_ms = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        runs_ms.append((time.perf_counter() - t0) * 1000.0)
+        if teardown is not None:
+            teardown(out)
+
+    ordered = sorted(runs_ms)
+    p90 = ordered[min(len(ordered) - 1, int(round(0.9 * (len(ordered) - 1))))]
+    return {
+        'median_ms': round(statistics.median(ordered), 3),
+        'p90_ms': round(p90, 3),
+        'min_ms': round(ordered[0], 3),
+        'runs': len(ordered),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold_pct: float, min_delta_ms: float) -> list:
+    """Regressed stages as (name, baseline_ms, current_ms, change_pct)."""
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not base or not base.get('median_ms'):
+            logger.info(f"{name:>22}: no baseline")
+            continue
+        base_ms, cur_ms = base['median_ms'], result['median_ms']
+        change_pct = (cur_ms - base_ms) / base_ms * 100.0
+        regressed = change_pct > threshold_pct and (cur_ms - base_ms) >= min_delta_ms
+        logger.info(
+            f"{name:>22}: {base_ms:9.2f} → {cur_ms:9.2f} ms ({change_pct:+6.1f}%)"
+            + ("  REGRESSION" if regressed else "")
+        )
+        if regressed:
+            regressions.append((name, base_ms, cur_ms, round(change_pct, 1)))
+    return regressions
+
+
+def environment(args) -> dict:
+    return {
+        'width': args.width,
+        'height': args.height,
+        'warmup': args.warmup,
+        'repeat': args.repeat,
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--stages', default=None, help='Comma-separated subset of stages to run')
+    parser.add_argument('--baseline', default=None, help='Compare against this baseline JSON')
+    parser.add_argument('--save-baseline', default=None, help='Write results as a new baseline JSON')
+    parser.add_argument('--threshold', type=float, default=15.0, help='Allowed median slowdown in percent')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='Ignore slowdowns smaller than this')
+    parser.add_argument('--json', dest='json_path', default=None, help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='weldvision_bench_')
+    try:
+        logger.info(f"Preparing synthetic {args.width}x{args.height} inputs...")
+        inputs = StageInputs(args.width, args.height, work_dir)
+        stages = build_stages(inputs)
+
+        selected = list(stages)
+        if args.stages:
+            selected = [s.strip() for s in args.stages.split(',') if s.strip()]
+            unknown = [s for s in selected if s not in stages]
+            if unknown:
+                parser.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(stages)})")
+
+        results = {}
+        for name in selected:
+            fn, teardown = stages[name]
+            results[name] = time_stage(fn, teardown, args.warmup, args.repeat)
+            r = results[name]
+            logger.info(f"{name:>22}: median {r['median_ms']:9.2f} ms  p90 {r['p90_ms']:9.2f} ms  min {r['min_ms']:9.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {'environment': environment(args), 'stages': results}
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Results written to {args.json_path}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        env = baseline.get('environment', {})
+        if (env.get('width'), env.get('height')) != (args.width, args.height):
+            logger.warning(f"Baseline was recorded at {env.get('width')}x{env.get('height')}; comparison is not like-for-like")
+        regressions = compare(results, baseline.get('stages', {}), args.threshold, args.min_delta_ms)
+        if regressions:
+            logger.error(
+                f"{len(regressions)} stage(s) regressed by more than {args.threshold:g}%: "
+                + ', '.join(f"{n} ({pct:+.1f}%)" for n, _, _, pct in regressions)
+            )
+            sys.exit(1)
+        logger.info(f"No stage regressed by more than {args.threshold:g}%")
+
+
+if __name__ == '__main__':
+    main()
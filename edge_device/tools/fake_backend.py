@@ -0,0 +1,353 @@
+"""Local stand-in for the WeldVision cloud API (edge-device endpoints only).
+
+Serves just enough of the Worker's API to exercise the edge uploader end
+to end without the cloud:
+
+  POST /api/upload-assessment         multipart, one assessment → 201
+  POST /api/upload-assessment/batch   multipart manifest + parts → per-item results
+  POST /api/upload-assessment/presign JSON part list → presigned PUT URLs on /objects/
+  PUT  /objects/<key>?expires=&sig=   S3-style object store (signature + expiry checked)
+  POST /api/upload-assessment/commit  JSON fields + <part>_key → 201, keys must exist
+  POST /api/storage/upload            training image → 201 {"key"}
+  GET  /api/stereo-calibrations/active, /api/models/deployed → 404
+  GET  /stats                         request / item counters as JSON
+
+Fault injection: --latency-ms adds a delay per request, --fail-rate rejects
+that fraction of items (503 / per-item 500), --no-batch answers the batch
+endpoint with 404 (an older backend) to test the fallback; --no-presign does
+the same for the presign endpoint.
+
+Usage:
+  python tools/fake_backend.py --port 8000
+  BACKEND_URL=http://127.0.0.1:8000 python main.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict:
+    """name → (filename or None, bytes) for every part of a multipart/form-data body."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    parts = {}
+    if not message.is_multipart():
+        return parts
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            parts[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return parts
+
+
+class FakeBackendState:
+    def __init__(
+        self, *, latency_ms: float = 0.0, fail_rate: float = 0.0, batch: bool = True, presign: bool = True,
+        presign_ttl_s: float = 300.0, seed: int = 0,
+    ):
+        self.latency_ms = float(latency_ms)
+        self.fail_rate = float(fail_rate)
+        self.batch = bool(batch)
+        self.presign = bool(presign)
+        self.presign_ttl_s = float(presign_ttl_s)
+        self.secret = uuid.uuid4().bytes
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "single_uploads": 0,
+            "batch_requests": 0,
+            "batch_items": 0,
+            "items_failed": 0,
+            "training_uploads": 0,
+            "presign_requests": 0,
+            "object_puts": 0,
+            "commits": 0,
+            "bytes_received": 0,
+        }
+        self.assessments = []   # (id, student_id, original_bytes, heatmap_bytes)
+        self.objects = {}       # key → bytes (the object store)
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += n
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.fail_rate
+
+    def store(self, student_id, original: int, heatmap: int) -> int:
+        with self._lock:
+            assessment_id = len(self.assessments) + 1
+            self.assessments.append((assessment_id, student_id, original, heatmap))
+            return assessment_id
+
+    def sign(self, key: str, expires: int) -> str:
+        return hmac.new(self.secret, f"{key}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def put_object(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self.objects[key] = data
+
+    def object_size(self, key: str):
+        with self._lock:
+            data = self.objects.get(key)
+            return None if data is None else len(data)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counters, assessments=len(self.assessments), objects=len(self.objects))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "WeldVisionFakeBackend/1.0"
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real Worker
+
+    @property
+    def state(self) -> FakeBackendState:
+        return self.server.state  # type: ignore[attr-defined]
+
+    def log_message(self, fmt, *args):
+        return
+
+    def _json(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        self.state.count("bytes_received", len(data))
+        return data
+
+    def _begin(self) -> None:
+        self.state.count("requests")
+        if self.state.latency_ms > 0:
+            time.sleep(self.state.latency_ms / 1000.0)
+
+    def do_GET(self):
+        self._begin()
+        path = self.path.split("?", 1)[0]
+        if path == "/stats":
+            self._json(200, self.state.snapshot())
+            return
+        self._json(404, {"error": "Not found"})
+
+    def do_PUT(self):
+        self._begin()
+        url = urlsplit(self.path)
+        body = self._body()
+        if not url.path.startswith("/objects/"):
+            self._json(404, {"error": "Not found"})
+            return
+        key = unquote(url.path[len("/objects/"):])
+        query = parse_qs(url.query)
+        try:
+            expires = int(query["expires"][0])
+            sig = query["sig"][0]
+        except (KeyError, ValueError, IndexError):
+            self._json(403, {"error": "missing signature"})
+            return
+        if not hmac.compare_digest(sig, self.state.sign(key, expires)) or time.time() > expires:
+            self._json(403, {"error": "signature invalid or expired"})
+            return
+        if self.state.should_fail():
+            self._json(503, {"error": "injected failure"})
+            return
+        self.state.put_object(key, body)
+        self.state.count("object_puts")
+        self.send_response(200)
+        self.send_header("ETag", f'"{hashlib.md5(body).hexdigest()}"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self._begin()
+        path = self.path.split("?", 1)[0]
+        body = self._body()
+        content_type = self.headers.get("Content-Type", "")
+
+        if path == "/api/upload-assessment/presign":
+            self._handle_presign(body)
+        elif path == "/api/upload-assessment/commit":
+            self._handle_commit(body)
+        elif path == "/api/upload-assessment/batch":
+            self._handle_batch(content_type, body)
+        elif path == "/api/upload-assessment":
+            self._handle_single(content_type, body)
+        elif path == "/api/storage/upload":
+            parts = parse_multipart(content_type, body)
+            filename, _ = parts.get("file", ("frame.jpg", b""))
+            folder = (parts.get("folder", (None, b"images/training"))[1] or b"").decode()
+            self.state.count("training_uploads")
+            self._json(201, {"key": f"{folder}/{filename}"})
+        else:
+            self._json(404, {"error": "Not found"})
+
+    def _handle_single(self, content_type: str, body: bytes) -> None:
+        parts = parse_multipart(content_type, body)
+        student_id = (parts.get("student_id", (None, b""))[1] or b"").decode()
+        if not student_id:
+            self._json(400, {"error": "student_id is required"})
+            return
+        if "image_original" not in parts:
+            self._json(400, {"error": "image_original is required"})
+            return
+        if self.state.should_fail():
+            self._json(503, {"error": "injected failure"})
+            return
+        self.state.count("single_uploads")
+        assessment_id = self.state.store(
+            student_id, len(parts["image_original"][1]), len(parts.get("image_heatmap", (None, b""))[1])
+        )
+        self._json(201, {"id": assessment_id, "message": "OK"})
+
+    def _handle_presign(self, body: bytes) -> None:
+        if not self.state.presign:
+            self._json(404, {"error": "Not found"})
+            return
+        try:
+            request = json.loads(body)
+            parts = request["parts"]
+        except Exception:
+            self._json(400, {"error": "parts are required"})
+            return
+        self.state.count("presign_requests")
+        upload_id = uuid.uuid4().hex
+        expires = int(time.time() + self.state.presign_ttl_s)
+        host, port = self.server.server_address[:2]
+        granted = {}
+        for part in parts:
+            key = f"assessments/{request.get('device_id') or 'unknown'}/{upload_id}/{part['name']}.jpg"
+            granted[part["name"]] = {
+                "key": key,
+                "url": f"http://{host}:{port}/objects/{quote(key)}?expires={expires}&sig={self.state.sign(key, expires)}",
+                "headers": {},
+            }
+        self._json(200, {"upload_id": upload_id, "expires_at": expires, "parts": granted})
+
+    def _handle_commit(self, body: bytes) -> None:
+        try:
+            record = json.loads(body)
+        except Exception:
+            self._json(400, {"error": "invalid JSON"})
+            return
+        if not record.get("student_id"):
+            self._json(400, {"error": "student_id is required"})
+            return
+        original = self.state.object_size(record.get("image_original_key") or "")
+        if original is None:
+            self._json(400, {"error": "image_original_key does not exist"})
+            return
+        heatmap = self.state.object_size(record.get("image_heatmap_key") or "") or 0
+        self.state.count("commits")
+        assessment_id = self.state.store(record["student_id"], original, heatmap)
+        self._json(201, {"id": assessment_id, "message": "OK"})
+
+    def _handle_batch(self, content_type: str, body: bytes) -> None:
+        if not self.state.batch:
+            self._json(404, {"error": "Not found"})
+            return
+        parts = parse_multipart(content_type, body)
+        try:
+            manifest = json.loads(parts["manifest"][1])
+            items = manifest["items"]
+        except Exception:
+            self._json(400, {"error": "manifest is required"})
+            return
+
+        self.state.count("batch_requests")
+        results = []
+        for item in items:
+            self.state.count("batch_items")
+            item_id = item.get("id")
+            original = parts.get(item.get("image_original") or "")
+            if not item.get("student_id"):
+                results.append({"id": item_id, "status": 400, "error": "student_id is required"})
+            elif original is None:
+                results.append({"id": item_id, "status": 400, "error": "image_original part missing"})
+            elif self.state.should_fail():
+                results.append({"id": item_id, "status": 500, "error": "injected failure"})
+            else:
+                heatmap = parts.get(item.get("image_heatmap") or "", (None, b""))
+                assessment_id = self.state.store(item["student_id"], len(original[1]), len(heatmap[1]))
+                results.append({"id": item_id, "status": 201, "assessment_id": assessment_id})
+            if results[-1]["status"] >= 300:
+                self.state.count("items_failed")
+        self._json(207, {"results": results})
+
+
+class FakeBackend:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **state_kwargs):
+        self.state = FakeBackendState(**state_kwargs)
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.state = self.state  # type: ignore[attr-defined]
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--no-batch", action="store_true", help="Answer the batch endpoint with 404")
+    parser.add_argument("--no-presign", action="store_true", help="Answer the presign endpoint with 404")
+    args = parser.parse_args()
+
+    backend = FakeBackend(
+        args.host, args.port, latency_ms=args.latency_ms, fail_rate=args.fail_rate, batch=not args.no_batch,
+        presign=not args.no_presign,
+    ).start()
+    logger.info(
+        f"Fake backend on {backend.url} (batch={'off' if args.no_batch else 'on'}, "
+        f"presign={'off' if args.no_presign else 'on'})"
+    )
+    try:
+        while True:
+            time.sleep(10.0)
+            logger.info(json.dumps(backend.state.snapshot()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Load test: stream-server CPU use against the number of MJPEG viewers.
+
+Runs the overlay stream server in this process with a synthetic publisher
+(``--fps`` frames of ``--jpeg-kb`` KB, as the ProcessWorker would), then
+for each viewer count in ``--viewers`` opens that many ``/stream.mjpg``
+connections from a separate process and measures, over ``--seconds``:
+
+  cpu_%        server process CPU time / wall time (100 = one full core)
+  threads      live threads in the server process
+  fps/viewer   mean frames received per viewer per second
+  skipped      frames the server skipped for viewers that fell behind
+
+The viewers live in a child process so their socket reads do not count
+against the server's CPU.  ``--slow N`` makes N of the viewers read at
+~256 KB/s to exercise backpressure.
+
+Usage:
+  python tools/stream_load_test.py --server asyncio --viewers 1,10,30
+  python tools/stream_load_test.py --server threaded --viewers 1,10,30 --fps 15
+  python tools/stream_load_test.py --server asyncio --viewers 30 --slow 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.async_stream import AsyncStreamServer  # noqa: E402
+from modules.overlay_stream import LiveState, OverlayStreamServer  # noqa: E402
+
+SLOW_READ_BYTES_PER_S = 256 * 1024
+WARMUP_S = 0.5   # frames queued while the other viewers were connecting are read, not counted
+
+
+def _viewer_process(port: int, viewers: int, slow: int, seconds: float, results) -> None:
+    """Open ``viewers`` stream connections, read for ``seconds``, report frames/s per connection."""
+    sel = selectors.DefaultSelector()
+    frames = {}
+    for i in range(viewers):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if i < slow:
+            # Loopback buffers hold seconds of video; a Wi-Fi phone's do not
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 64 * 1024)
+        sock.connect(("127.0.0.1", port))
+        sock.sendall(b"GET /stream.mjpg HTTP/1.0\r\n\r\n")
+        sock.setblocking(False)
+        frames[sock] = 0
+        sel.register(sock, selectors.EVENT_READ, data=i < slow)
+
+    budget = {sock: 0.0 for sock in frames}   # slow viewers: bytes they may read so far
+    results.put("connected")
+    start = time.perf_counter()
+    counting = False
+    while (now := time.perf_counter()) - start < seconds + WARMUP_S:
+        if not counting and now - start >= WARMUP_S:
+            counting, counted_from = True, now
+            frames = dict.fromkeys(frames, 0)
+        for key, _ in sel.select(timeout=0.05):
+            sock, is_slow = key.fileobj, key.data
+            size = 65536
+            if is_slow:
+                allowed = (now - start) * SLOW_READ_BYTES_PER_S - budget[sock]
+                if allowed < 4096:
+                    continue
+                size = int(min(size, allowed))
+            try:
+                data = sock.recv(size)
+            except BlockingIOError:
+                continue
+            if not data:
+                sel.unregister(sock)
+                continue
+            budget[sock] += len(data)
+            frames[sock] += data.count(b"--frame\r\n")
+        if slow:
+            time.sleep(0.005)   # slow sockets stay readable; don't spin on them
+    elapsed = time.perf_counter() - counted_from
+    results.put([frames[sock] / elapsed for sock in frames])   # slow viewers first
+    for sock in frames:
+        sock.close()
+
+
+def _publisher(live: LiveState, fps: float, jpeg_kb: int, stop: threading.Event) -> None:
+    payload = os.urandom(jpeg_kb * 1024)
+    n = 0
+    while not stop.is_set():
+        n += 1
+        live.update(jpeg_bytes=b"\xff\xd8" + payload + b"\xff\xd9", metrics={"frame": n})
+        stop.wait(1.0 / fps)
+
+
+def run_level(server, live: LiveState, port: int, viewers: int, slow: int, seconds: float, fps: float) -> dict:
+    results = mp.Queue()
+    proc = mp.Process(target=_viewer_process, args=(port, viewers, slow, seconds + 1.0, results), daemon=True)
+    proc.start()
+    results.get(timeout=30)
+    time.sleep(0.5)   # connections up and streaming before measuring
+
+    before = server.stats()
+    threads = threading.active_count()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+    threads = max(threads, threading.active_count())
+    after = server.stats()
+
+    rates = results.get(timeout=seconds + 10)
+    proc.join(timeout=5)
+    time.sleep(0.5)   # let the server notice the hang-ups before the next level
+    fast = rates[slow:] if slow < len(rates) else rates
+    return {
+        "viewers": viewers,
+        "cpu_pct": 100.0 * cpu / wall,
+        "threads": threads,
+        "fps_per_viewer": sum(fast) / len(fast) if fast else 0.0,
+        "target_fps": fps,
+        "skipped": after["frames_skipped"] - before["frames_skipped"],
+        "rejected": after.get("rejected", 0) - before.get("rejected", 0),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=("threaded", "asyncio"), default="asyncio")
+    parser.add_argument("--viewers", default="1,5,10,20,30", help="comma-separated viewer counts")
+    parser.add_argument("--slow", type=int, default=0, help="viewers per level that read at ~256 KB/s")
+    parser.add_argument("--fps", type=float, default=15.0, help="published frames per second")
+    parser.add_argument("--jpeg-kb", type=int, default=80, help="synthetic JPEG size")
+    parser.add_argument("--seconds", type=float, default=5.0, help="measurement window per level")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--max-clients", type=int, default=64, help="asyncio server client limit")
+    args = parser.parse_args()
+
+    live = LiveState()
+    if args.server == "asyncio":
+        server = AsyncStreamServer("127.0.0.1", args.port, live, max_clients=args.max_clients)
+    else:
+        server = OverlayStreamServer("127.0.0.1", args.port, live)
+    server.start()
+
+    stop = threading.Event()
+    threading.Thread(target=_publisher, args=(live, args.fps, args.jpeg_kb, stop), daemon=True).start()
+
+    print(f"server={args.server} fps={args.fps:g} jpeg={args.jpeg_kb}KB window={args.seconds:g}s slow={args.slow}")
+    print(f"{'viewers':>8} {'cpu_%':>7} {'threads':>8} {'fps/viewer':>11} {'skipped':>8} {'rejected':>9}")
+    try:
+        for viewers in (int(v) for v in args.viewers.split(",") if v.strip()):
+            r = run_level(server, live, args.port, viewers, min(args.slow, viewers), args.seconds, args.fps)
+            print(
+                f"{r['viewers']:>8} {r['cpu_pct']:>7.1f} {r['threads']:>8} "
+                f"{r['fps_per_viewer']:>11.1f} {r['skipped']:>8} {r['rejected']:>9}"
+            )
+    finally:
+        stop.set()
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
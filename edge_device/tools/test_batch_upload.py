@@ -0,0 +1,157 @@
+"""End-to-end check of buffered-assessment replay against tools/fake_backend.py.
+
+Spools synthetic assessments into a temporary LocalBuffer, then runs one
+pass of the UploadWorker's DrainEngine (``drain.drain_once()``, sending
+through ``UploadWorker._send_buffered``) with the batch endpoint enabled,
+with per-item failures injected, with the batch endpoint missing (404 →
+one request per assessment), with a bundle the backend rejects (held back
+for a retry; the circuit breaker stays closed) and with a truncated JPEG
+in the spool (quarantined; the breaker stays closed).
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_backend import FakeBackend
+
+# Presign off: single-upload fallbacks should go through the multipart endpoint counted below
+backend = FakeBackend(presign=False).start()
+
+# main.py reads its endpoints and batch limits from the environment at import
+os.environ['BACKEND_URL'] = backend.url
+os.environ['WELDVISION_UPLOAD_BATCH_MAX_ITEMS'] = '20'
+os.environ.setdefault('WELDVISION_LOG_PATH', os.path.join(tempfile.gettempdir(), 'weldvision_test.log'))
+
+import threading  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import main as edge  # noqa: E402
+from modules.batch_upload import BatchUploader  # noqa: E402
+from modules.buffering import QUARANTINE_DIR, LocalBuffer  # noqa: E402
+
+
+def spool(buffer: LocalBuffer, count: int, student_id: str = '1') -> None:
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        image = rng.integers(0, 255, (180, 320, 3), dtype=np.uint8)
+        ok, jpeg = cv2.imencode('.jpg', image)
+        assert ok
+        buffer.enqueue(
+            image_jpeg=jpeg.tobytes(),
+            heatmap_jpeg=jpeg.tobytes(),
+            metrics_json={'geometric': {'bead_width_mm': 8.0 + i * 0.01}, 'visual': {'porosity': i % 3}},
+            meta={'student_id': student_id, 'device_id': edge.DEVICE_ID, 'created_at': f'2024-01-01T00:00:{i % 60:02d}Z'},
+        )
+
+
+def drain(buffer: LocalBuffer, batch: bool) -> None:
+    batcher = BatchUploader(edge.BACKEND, edge.UPLOAD_BATCH_ENDPOINT) if batch else None
+    worker = edge.UploadWorker(threading.Event(), in_q=None, buffer_obj=buffer, batcher=batcher)
+    worker.drain.drain_once()
+
+
+def test_batched_replay():
+    backend.state.counters.update(batch_requests=0, single_uploads=0)
+    with tempfile.TemporaryDirectory() as root:
+        buffer = LocalBuffer(root)
+        spool(buffer, 45)
+        drain(buffer, batch=True)
+        stats = backend.state.snapshot()
+        assert len(buffer.list_pending()) == 0, buffer.list_pending()
+        assert stats['batch_requests'] == 3, stats      # 20 + 20 + 5
+        assert stats['single_uploads'] == 0, stats
+    print("✅ batched replay: 45 bundles in 3 requests")
+
+
+def test_partial_failures_stay_buffered():
+    backend.state.fail_rate = 0.3
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            buffer = LocalBuffer(root)
+            spool(buffer, 30)
+            failed_before = backend.state.snapshot()['items_failed']
+            drain(buffer, batch=True)
+            failed = backend.state.snapshot()['items_failed'] - failed_before
+            assert failed > 0
+            assert len(buffer.list_pending()) == failed, (len(buffer.list_pending()), failed)
+    finally:
+        backend.state.fail_rate = 0.0
+    print(f"✅ per-item results: {failed} rejected items kept in the buffer")
+
+
+def test_fallback_without_batch_endpoint():
+    backend.state.batch = False
+    backend.state.counters.update(single_uploads=0)
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            buffer = LocalBuffer(root)
+            spool(buffer, 5)
+            drain(buffer, batch=True)
+            stats = backend.state.snapshot()
+            assert len(buffer.list_pending()) == 0
+            assert stats['single_uploads'] == 5, stats
+    finally:
+        backend.state.batch = True
+    print("✅ 404 on batch endpoint falls back to single uploads")
+
+
+def test_rejected_single_upload_leaves_breaker_closed():
+    backend.state.batch = False
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            buffer = LocalBuffer(root, index='sqlite')   # keeps per-bundle retry metadata
+            spool(buffer, 1, student_id='')   # the backend answers 400: student_id is required
+            spool(buffer, 3)
+            batcher = BatchUploader(edge.BACKEND, edge.UPLOAD_BATCH_ENDPOINT)
+            worker = edge.UploadWorker(threading.Event(), in_q=None, buffer_obj=buffer, batcher=batcher)
+            for _ in range(edge.BREAKER_FAILURES + 1):
+                delivered, failed = worker.drain.drain_once()
+                assert not failed
+            assert len(buffer.list_pending()) == 1 and buffer.list_ready() == [], buffer.list_pending()
+            breaker = worker.breaker.stats()
+            assert breaker['state'] == 'closed' and breaker['consecutive_failures'] == 0, breaker
+            buffer.close()
+    finally:
+        backend.state.batch = True
+    print("✅ 4xx on a single replay backs the bundle off without tripping the breaker")
+
+
+def test_corrupt_bundle_is_quarantined():
+    for batch in (True, False):
+        with tempfile.TemporaryDirectory() as root:
+            buffer = LocalBuffer(root, index='sqlite')
+            spool(buffer, 4)
+            # A write cut short on the SD card: the oldest bundle's original loses its tail
+            bad = buffer.list_ready()[0]
+            bad.original_path.write_bytes(bad.original_path.read_bytes()[:500])
+
+            batcher = BatchUploader(edge.BACKEND, edge.UPLOAD_BATCH_ENDPOINT) if batch else None
+            worker = edge.UploadWorker(threading.Event(), in_q=None, buffer_obj=buffer, batcher=batcher)
+            delivered, failed = worker.drain.drain_once()
+            assert (delivered, failed) == (3, False), (delivered, failed)
+            assert buffer.list_pending() == [], buffer.list_pending()
+            assert (Path(root) / QUARANTINE_DIR / bad.bundle_id / 'quarantine_reason.txt').exists()
+            breaker = worker.breaker.stats()
+            assert breaker['state'] == 'closed' and breaker['consecutive_failures'] == 0, breaker
+            assert buffer.stats()['quarantined'] == 1
+            buffer.close()
+    print("✅ truncated JPEG in the spool is quarantined without tripping the breaker")
+
+
+if __name__ == "__main__":
+    try:
+        test_batched_replay()
+        test_partial_failures_stay_buffered()
+        test_fallback_without_batch_endpoint()
+        test_rejected_single_upload_leaves_breaker_closed()
+        test_corrupt_bundle_is_quarantined()
+        print(json.dumps(backend.state.snapshot()))
+    finally:
+        backend.stop()
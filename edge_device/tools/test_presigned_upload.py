@@ -0,0 +1,89 @@
+"""End-to-end check of the two-phase assessment upload against tools/fake_backend.py.
+
+Uploads synthetic assessments through main.upload_assessment: images must
+land in the fake object store via presigned PUTs with only a JSON commit
+going to the API, an expired / tampered URL must fail the upload, and a
+backend without the presign endpoint must get the multipart upload.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_backend import FakeBackend
+
+backend = FakeBackend().start()
+
+# main.py reads its endpoints from the environment at import
+os.environ['BACKEND_URL'] = backend.url
+os.environ['WELDVISION_PRESIGNED_UPLOAD'] = '1'
+os.environ.setdefault('WELDVISION_LOG_PATH', os.path.join(tempfile.gettempdir(), 'weldvision_test.log'))
+
+import main as edge  # noqa: E402
+from modules.artifacts import ResultArtifact  # noqa: E402
+
+RNG = np.random.default_rng(0)
+
+
+def upload() -> str:
+    image = RNG.integers(0, 255, (180, 320, 3), dtype=np.uint8)
+    overlay = RNG.integers(0, 255, (180, 320, 3), dtype=np.uint8)
+    return edge.upload_assessment(
+        image,
+        {'bead_width_mm': 8.0},
+        {'porosity': 0},
+        artifact=ResultArtifact(original=image, overlay=overlay),
+    )
+
+
+def test_images_bypass_the_api():
+    before = backend.state.snapshot()
+    for _ in range(3):
+        assert upload() == edge.UPLOAD_OK
+    after = backend.state.snapshot()
+    assert after['presign_requests'] - before['presign_requests'] == 3, after
+    assert after['object_puts'] - before['object_puts'] == 6, after      # original + heatmap each
+    assert after['commits'] - before['commits'] == 3, after
+    assert after['single_uploads'] == before['single_uploads'], after
+    _, _, original, heatmap = backend.state.assessments[-1]
+    assert original > 0 and heatmap > 0
+    print("✅ presigned upload: 3 assessments, 6 direct PUTs, JSON-only commits")
+
+
+def test_expired_url_fails():
+    backend.state.presign_ttl_s = -1
+    try:
+        commits = backend.state.snapshot()['commits']
+        assert upload() == edge.UPLOAD_REJECTED   # a 403 from storage, not a dead link
+        assert backend.state.snapshot()['commits'] == commits
+    finally:
+        backend.state.presign_ttl_s = 300
+    print("✅ expired presigned URL: upload reported as rejected, nothing committed")
+
+
+def test_fallback_without_presign_endpoint():
+    backend.state.presign = False
+    try:
+        single = backend.state.snapshot()['single_uploads']
+        assert upload() == edge.UPLOAD_OK
+        assert upload() == edge.UPLOAD_OK
+        assert backend.state.snapshot()['single_uploads'] - single == 2
+        assert not edge.PRESIGNED.available()
+    finally:
+        backend.state.presign = True
+    print("✅ 404 on presign endpoint falls back to multipart uploads")
+
+
+if __name__ == "__main__":
+    try:
+        test_images_bypass_the_api()
+        test_expired_url_fails()
+        test_fallback_without_presign_endpoint()
+        print(json.dumps(backend.state.snapshot()))
+    finally:
+        backend.stop()